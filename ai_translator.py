@@ -1,58 +1,370 @@
 # ai_translator.py
-import google.generativeai as genai
-import streamlit as st
+import json
+import logging
+import os
+import re
+import textwrap
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from metrics import increment
+from resilience import resilient_call
+
+logger = logging.getLogger('healthcare.ai')
+
+GEMINI_MODEL_NAME = "models/gemini-2.5-flash"
+
+# Per-attempt deadline for a Gemini request and total budget across retries
+GEMINI_TIMEOUT = 30
+GEMINI_DEADLINE = 60
+
+# Generation limits per deployment profile (GEMINI_PROFILE). Gemini 2.5 counts its
+# internal reasoning against max_output_tokens, so the caps leave room for it.
+GENERATION_PROFILES = {
+    'economy': {'max_output_tokens': 1024, 'temperature': 0.2},
+    'standard': {'max_output_tokens': 2048, 'temperature': 0.3},
+    'detailed': {'max_output_tokens': 4096, 'temperature': 0.4},
+}
+GEMINI_PROFILE = os.environ.get("GEMINI_PROFILE", "standard")
+# Gemini's ceiling on the output tokens of one response
+MAX_OUTPUT_TOKENS = 65536
+
+# Cases packed into one batch prompt (1 sends every case as its own request),
+# and how many batch requests are in flight at once
+GEMINI_BATCH_SIZE = int(os.environ.get("GEMINI_BATCH_SIZE", "8"))
+GEMINI_BATCH_WORKERS = int(os.environ.get("GEMINI_BATCH_WORKERS", "4"))
+
+# Longest symptom description sent to the model; the rest is cut at a word boundary
+MAX_SYMPTOMS_CHARS = int(os.environ.get("MAX_SYMPTOMS_CHARS", "1000"))
+
+DISCLAIMER = (
+    '"*Disclaimer:* I am an AI assistant and not a medical professional. '
+    'This information is not a diagnosis. Please consult a qualified healthcare provider for medical advice."'
+)
+
+class PromptTemplate:
+    """A prompt for one language, dedented and checked once when the module loads"""
+    
+    def __init__(self, language, version, text):
+        self.language = language
+        self.version = version
+        self.text = textwrap.dedent(text).strip().replace("{disclaimer}", DISCLAIMER)
+        if "{symptoms}" not in self.text:
+            raise ValueError(f"Prompt for {language} has no {{symptoms}} placeholder")
+    
+    def render(self, symptoms):
+        return self.text.replace("{symptoms}", symptoms)
+
+# Bump PROMPT_VERSION whenever the wording changes; it is reported with every analysis
+PROMPT_VERSION = 2
+PROMPTS = {
+    'en': PromptTemplate('en', PROMPT_VERSION, """
+        As a medical information assistant, analyze these symptoms: "{symptoms}"
+        
+        Provide 3-5 possible medical conditions with brief, clear descriptions.
+        Format with bullet points for easy reading.
+        Maintain professional medical tone.
+        
+        End with this exact disclaimer:
+        {disclaimer}
+    """),
+    'hi': PromptTemplate('hi', PROMPT_VERSION, """
+        एक चिकित्सा सूचना सहायक के रूप में, इन लक्षणों का विश्लेषण करें: "{symptoms}"
+        
+        3-5 संभावित चिकित्सा स्थितियाँ संक्षिप्त, स्पष्ट विवरण के साथ प्रदान करें।
+        आसान पठन के लिए बुलेट पॉइंट्स में प्रारूपित करें।
+        पेशेवर चिकित्सा स्वर बनाए रखें।
+        
+        इस सटीक अस्वीकरण के साथ समाप्त करें:
+        {disclaimer}
+    """),
+    'pa': PromptTemplate('pa', PROMPT_VERSION, """
+        ਇੱਕ ਮੈਡੀਕਲ ਜਾਣਕਾਰੀ ਸਹਾਇਕ ਦੇ ਰੂਪ ਵਿੱਚ, ਇਹਨਾਂ ਲੱਛਣਾਂ ਦਾ ਵਿਸ਼ਲੇਸ਼ਣ ਕਰੋ: "{symptoms}"
+        
+        3-5 ਸੰਭਾਵਿਤ ਡਾਕਟਰੀ ਸਥਿਤੀਆਂ ਸੰਖੇਪ, ਸਾਫ਼ ਵਰਣਨਾਂ ਨਾਲ ਪ੍ਰਦਾਨ ਕਰੋ।
+        ਆਸਾਨ ਪੜ੍ਹਨ ਲਈ ਬੁਲੇਟ ਪੁਆਇੰਟਾਂ ਵਿੱਚ ਫਾਰਮੈਟ ਕਰੋ।
+        ਪੇਸ਼ੇਵਰ ਡਾਕਟਰੀ ਟੋਨ ਬਣਾਈ ਰੱਖੋ।
+        
+        ਇਸ ਸਹੀ ਇਨਕਾਰ ਨਾਲ ਖਤਮ ਕਰੋ:
+        {disclaimer}
+    """),
+}
+
+# Several cases in one request; the reply is a JSON array matched back to the cases by id
+BATCH_PROMPT = PromptTemplate('batch', PROMPT_VERSION, """
+    As a medical information assistant, analyze each case in this JSON list:
+    {symptoms}
+    
+    For every case, provide 3-5 possible medical conditions with brief, clear descriptions,
+    written in the case's "language" and formatted with bullet points.
+    Maintain professional medical tone.
+    End every analysis with this exact disclaimer:
+    {disclaimer}
+    
+    Reply with a JSON array holding one object per case: {"id": <case id>, "analysis": "<analysis>"}
+""")
+LANGUAGE_NAMES = {'en': 'English', 'hi': 'Hindi', 'pa': 'Punjabi'}
+
+def generation_profile():
+    return GENERATION_PROFILES.get(GEMINI_PROFILE, GENERATION_PROFILES['standard'])
+
+def render_batch(cases):
+    """The batch prompt for (symptoms, language) cases; each case's id is its position"""
+    return BATCH_PROMPT.render(json.dumps([
+        {'id': case_id, 'language': LANGUAGE_NAMES.get(language, 'English'), 'symptoms': normalize_symptoms(symptoms)}
+        for case_id, (symptoms, language) in enumerate(cases)
+    ], ensure_ascii=False))
+
+def parse_batch_reply(text):
+    """{case id: analysis} from a batch reply; cases missing or malformed in it are left out"""
+    try:
+        items = json.loads(text)
+    except ValueError:
+        # Tolerate a code fence or prose around the array
+        start, end = text.find('['), text.rfind(']')
+        try:
+            items = json.loads(text[start:end + 1]) if start != -1 else []
+        except ValueError:
+            return {}
+    if not isinstance(items, list):
+        return {}
+    analyses = {}
+    for item in items:
+        if not isinstance(item, dict):
+            continue
+        case_id, analysis = item.get('id'), item.get('analysis')
+        if isinstance(case_id, int) and isinstance(analysis, str) and analysis.strip():
+            analyses[case_id] = analysis.strip()
+    return analyses
+
+def get_prompt(language):
+    """The prompt template for a language, English if there is none"""
+    return PROMPTS.get(language, PROMPTS['en'])
+
+def normalize_symptoms(symptoms, max_chars=MAX_SYMPTOMS_CHARS):
+    """Collapse whitespace, drop control characters and quotes, and cap the length"""
+    # Double quotes delimit the symptoms in the prompt, so they can't appear inside
+    text = re.sub(r'[\x00-\x1f\x7f"]', ' ', symptoms)
+    text = " ".join(text.split())
+    if len(text) > max_chars:
+        cut = text[:max_chars]
+        text = (cut.rsplit(" ", 1)[0] if " " in cut else cut) + "…"
+    return text
+
+def is_transient_gemini_error(exc):
+    """Deadline, overload and server-side errors are worth retrying"""
+    from model_providers import ProviderUnavailable
+    if isinstance(exc, ProviderUnavailable):
+        return True
+    from google.api_core import exceptions as google_exceptions
+    return isinstance(exc, (
+        google_exceptions.DeadlineExceeded,
+        google_exceptions.InternalServerError,
+        google_exceptions.ResourceExhausted,
+        google_exceptions.ServiceUnavailable,
+    ))
+
+_default_translator = None
+_default_translator_lock = threading.Lock()
+
+def get_default_translator(db):
+    """Build the process-wide translator on first use.
+    
+    Importing google.generativeai and configuring the client is the slowest
+    part of app start-up, so it waits until an analysis is requested and then
+    happens once per process rather than on every rerun. The provider is
+    chosen by AI_PROVIDER; if it can't be set up, AI_FALLBACK_PROVIDER is
+    used instead (see model_providers.py).
+    """
+    global _default_translator
+    if _default_translator is None:
+        with _default_translator_lock:
+            if _default_translator is None:
+                from model_providers import AI_FALLBACK_PROVIDER, AI_PROVIDER, create_provider
+                from semantic_cache import SemanticCache
+                
+                fallback = None
+                if AI_FALLBACK_PROVIDER and AI_FALLBACK_PROVIDER != AI_PROVIDER:
+                    fallback = create_provider(AI_FALLBACK_PROVIDER)
+                try:
+                    provider = create_provider(AI_PROVIDER)
+                except Exception as e:
+                    if fallback is None:
+                        raise
+                    increment('ai_provider_fallbacks')
+                    logger.warning("AI provider %s unavailable (%s), using %s", AI_PROVIDER, e, fallback.name)
+                    _default_translator = AITranslator(fallback, SemanticCache(db), degraded=True)
+                else:
+                    _default_translator = AITranslator(provider, SemanticCache(db), fallback)
+    return _default_translator
+
+def reset_default_translator():
+    """Drop the process-wide translator so the next call rebuilds it"""
+    global _default_translator
+    with _default_translator_lock:
+        _default_translator = None
+
+def analysis_result(text, cached=False, prompt_version=None, usage=None, failed=False, provider=None, degraded=False):
+    """The dict AITranslator.analyze() returns for one case"""
+    return {
+        'text': text, 'cached': cached, 'prompt_version': prompt_version, 'usage': usage,
+        'failed': failed, 'provider': provider, 'degraded': degraded,
+    }
 
 class AITranslator:
-    def __init__(self, gemini_model):
-        self.gemini_model = gemini_model
+    """Symptom analysis on top of a model provider (see model_providers.py).
+    
+    `fallback`, if given, answers the cases the provider fails; those
+    results are marked degraded, as are all results when `degraded` says the
+    provider itself is a stand-in.
+    """
+    
+    def __init__(self, provider, semantic_cache=None, fallback=None, degraded=False):
+        self.provider = provider
+        self.semantic_cache = semantic_cache
+        self.fallback = fallback
+        self.degraded = degraded
     
     def get_multi_lingual_suggestion(self, symptoms, language):
         """Get disease suggestions in the specified language with smart prompting"""
+        return self.analyze(symptoms, language)['text']
+    
+    def analyze(self, symptoms, language):
+        """Analysis text plus what it cost, as made by analysis_result().
         
-        language_prompts = {
-            'en': f"""
-            As a medical information assistant, analyze these symptoms: "{symptoms}"
-            
-            Provide 3-5 possible medical conditions with brief, clear descriptions.
-            Format with bullet points for easy reading.
-            Maintain professional medical tone.
-            
-            End with this exact disclaimer:
-            "*Disclaimer:* I am an AI assistant and not a medical professional. This information is not a diagnosis. Please consult a qualified healthcare provider for medical advice."
-            """,
-            
-            'hi': f"""
-            एक चिकित्सा सूचना सहायक के रूप में, इन लक्षणों का विश्लेषण करें: "{symptoms}"
-            
-            3-5 संभावित चिकित्सा स्थितियाँ संक्षिप्त, स्पष्ट विवरण के साथ प्रदान करें।
-            आसान पठन के लिए बुलेट पॉइंट्स में प्रारूपित करें।
-            पेशेवर चिकित्सा स्वर बनाए रखें।
-            
-            इस सटीक अस्वीकरण के साथ समाप्त करें:
-            "*Disclaimer:* I am an AI assistant and not a medical professional. This information is not a diagnosis. Please consult a qualified healthcare provider for medical advice."
-            """,
-            
-            'pa': f"""
-            ਇੱਕ ਮੈਡੀਕਲ ਜਾਣਕਾਰੀ ਸਹਾਇਕ ਦੇ ਰੂਪ ਵਿੱਚ, ਇਹਨਾਂ ਲੱਛਣਾਂ ਦਾ ਵਿਸ਼ਲੇਸ਼ਣ ਕਰੋ: "{symptoms}"
-            
-            3-5 ਸੰਭਾਵਿਤ ਡਾਕਟਰੀ ਸਥਿਤੀਆਂ ਸੰਖੇਪ, ਸਾਫ਼ ਵਰਣਨਾਂ ਨਾਲ ਪ੍ਰਦਾਨ ਕਰੋ।
-            ਆਸਾਨ ਪੜ੍ਹਨ ਲਈ ਬੁਲੇਟ ਪੁਆਇੰਟਾਂ ਵਿੱਚ ਫਾਰਮੈਟ ਕਰੋ।
-            ਪੇਸ਼ੇਵਰ ਡਾਕਟਰੀ ਟੋਨ ਬਣਾਈ ਰੱਖੋ।
-            
-            ਇਸ ਸਹੀ ਇਨਕਾਰ ਨਾਲ ਖਤਮ ਕਰੋ:
-            "*Disclaimer:* I am an AI assistant and not a medical professional. This information is not a diagnosis. Please consult a qualified healthcare provider for medical advice."
-            """
-        }
+        usage holds the prompt/output/total token counts the model reported,
+        or None when no model call was made; provider names the provider
+        that answered. An answer from the fallback provider is degraded.
+        When every attempt fails, text is an error message and failed is True.
+        """
+        cached = self._cached(symptoms, language)
+        if cached:
+            return cached
+        return self._analyze_one(symptoms, language)
+    
+    def analyze_batch(self, cases, batch_size=GEMINI_BATCH_SIZE, workers=GEMINI_BATCH_WORKERS, progress=None):
+        """analyze() results for a list of (symptoms, language) cases, in the same order.
         
-        prompt = language_prompts.get(language, language_prompts['en'])
+        Batches (API batches, the history backfill) never read the semantic
+        cache: each case gets its own answer. Repeated cases are analyzed once.
+        They go to Gemini `batch_size` cases per prompt, at most `workers`
+        prompts at a time; a case the batch reply misses is retried on its
+        own. Batched cases share their prompt's token usage evenly.
+        progress(done, total) is called as cases finish.
+        """
+        results = [None] * len(cases)
+        pending = {}
+        for index, (symptoms, language) in enumerate(cases):
+            key = (normalize_symptoms(symptoms), language)
+            pending.setdefault(key, ((symptoms, language), []))[1].append(index)
+        total = len(cases)
+        done = 0
+        if progress:
+            progress(done, total)
+        keys = list(pending)
+        step = max(batch_size, 1)
+        chunks = [keys[i:i + step] for i in range(0, len(keys), step)]
+        pool = ThreadPoolExecutor(max_workers=max(workers, 1), thread_name_prefix='gemini-batch')
+        try:
+            futures = {pool.submit(self._analyze_chunk, [pending[key][0] for key in chunk]): chunk for chunk in chunks}
+            for future in as_completed(futures):
+                for key, outcome in zip(futures[future], future.result()):
+                    for index in pending[key][1]:
+                        results[index] = dict(outcome)
+                        done += 1
+                if progress:
+                    progress(done, total)
+        finally:
+            pool.shutdown(wait=True, cancel_futures=True)
+        return results
+    
+    def _cached(self, symptoms, language):
+        """The stored analysis of a near-identical past query (see semantic_cache.py) as an analyze() result, or None"""
+        if self.semantic_cache is not None:
+            cached = self.semantic_cache.lookup(symptoms, language)
+            if cached:
+                return analysis_result(cached, cached=True)
+        return None
+    
+    def _generate(self, prompt, **kwargs):
+        return resilient_call(
+            self.provider.name,
+            self.provider.generate_content,
+            prompt,
+            request_options={'timeout': GEMINI_TIMEOUT},
+            deadline=GEMINI_DEADLINE,
+            transient=is_transient_gemini_error,
+            **kwargs
+        )
+    
+    def _analyze_chunk(self, chunk):
+        """Results for a few cases: one batch prompt, then single requests for what its reply missed"""
+        if len(chunk) == 1:
+            return [self._analyze_one(*chunk[0])]
+        generation_config = {
+            'response_mime_type': 'application/json',
+            'max_output_tokens': min(MAX_OUTPUT_TOKENS, generation_profile()['max_output_tokens'] * len(chunk)),
+        }
+        try:
+            response = self._generate(render_batch(chunk), generation_config=generation_config)
+            analyses = parse_batch_reply(response.text)
+            usage = token_usage(response)
+        except Exception:
+            analyses, usage = {}, None
+        share = usage and {name: (count or 0) // len(chunk) for name, count in usage.items()}
+        results = []
+        for case_id, (symptoms, language) in enumerate(chunk):
+            if case_id in analyses:
+                results.append(analysis_result(
+                    analyses[case_id], prompt_version=BATCH_PROMPT.version, usage=share,
+                    provider=self.provider.name, degraded=self.degraded
+                ))
+            else:
+                increment('gemini_batch_retries')
+                results.append(self._analyze_one(symptoms, language))
+        return results
+    
+    def _analyze_one(self, symptoms, language):
+        template = get_prompt(language)
+        prompt = template.render(normalize_symptoms(symptoms))
         
         try:
-            response = self.gemini_model.generate_content(prompt)
-            return response.text
+            response = self._generate(prompt)
+            return analysis_result(
+                response.text, prompt_version=template.version, usage=token_usage(response),
+                provider=self.provider.name, degraded=self.degraded
+            )
         except Exception as e:
+            if self.fallback is not None:
+                try:
+                    response = self.fallback.generate_content(prompt)
+                    increment('ai_fallback_answers')
+                    return analysis_result(
+                        response.text, prompt_version=template.version, usage=token_usage(response),
+                        provider=self.fallback.name, degraded=True
+                    )
+                except Exception:
+                    pass
             error_messages = {
                 'en': f"Error analyzing symptoms: {str(e)}",
                 'hi': f"लक्षणों का विश्लेषण करने में त्रुटि: {str(e)}",
                 'pa': f"ਲੱਛਣਾਂ ਦਾ ਵਿਸ਼ਲੇਸ਼ਣ ਕਰਨ ਵਿੱਚ ਤਰੁਟੀ: {str(e)}"
             }
-            return error_messages.get(language, error_messages['en'])
\ No newline at end of file
+            return analysis_result(
+                error_messages.get(language, error_messages['en']), prompt_version=template.version, failed=True
+            )
+
+def token_usage(response):
+    """Token counts of a Gemini response, also added to the gemini_*_tokens counters"""
+    metadata = getattr(response, 'usage_metadata', None)
+    if metadata is None:
+        return None
+    usage = {
+        'prompt_tokens': metadata.prompt_token_count,
+        'output_tokens': metadata.candidates_token_count,
+        'total_tokens': metadata.total_token_count,
+    }
+    increment('gemini_prompt_tokens', usage['prompt_tokens'])
+    increment('gemini_output_tokens', usage['output_tokens'])
+    increment('gemini_total_tokens', usage['total_tokens'])
+    return usage
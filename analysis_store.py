@@ -0,0 +1,264 @@
+# analysis_store.py
+"""
+Compressed, deduplicated storage for AI analysis text.
+
+An analysis is stored once in `analysis_texts`, keyed by a hash of its text,
+and symptom_history rows point at it through `analysis_id`. Bodies are
+zlib streams primed with a preset dictionary: the shared boilerplate every
+response repeats (the disclaimer, the bullet layout) then costs a few
+bytes instead of a few hundred. Dictionaries are trained from stored
+responses and kept in `compression_dicts`; every body records the id of
+the dictionary it was written with, so retraining never breaks old rows.
+
+Rows written before compression keep their plain text in
+suggested_conditions; readers accept either form through decode(), and
+the 'compress_history' job migrates old rows in batches.
+"""
+import hashlib
+import struct
+import threading
+import zlib
+from collections import Counter
+from functools import lru_cache
+
+from metrics import timed
+from query_trace import connect
+
+# Header of a compressed body: marker byte, then the dictionary id
+MAGIC = b'\xa5'
+HEADER = struct.Struct('>cH')
+COMPRESSION_LEVEL = 9
+DICT_SIZE = 32 * 1024
+TRAINING_SAMPLES = 2000
+
+DISCLAIMER = (
+    "*Disclaimer:* I am an AI assistant and not a medical professional. "
+    "This information is not a diagnosis. Please consult a qualified healthcare "
+    "provider for medical advice."
+)
+# Dictionary 0 needs no training: text every response shares, most common last
+SEED_DICTIONARY = (
+    "Here are some possible medical conditions based on the symptoms you described:\n\n"
+    "* **Common Cold:** \n* **Influenza (Flu):** \n* **Migraine:** \n* **Gastroenteritis:** \n"
+    "* **Tension Headache:** \n* **Sinusitis:** \n* **Allergies:** \n* **Dehydration:** \n"
+    "* **Viral Infection:** \n* **Food Poisoning:** \n* **Anxiety:** \n"
+    "Please consult a doctor if your symptoms worsen or persist.\n\n"
+    + DISCLAIMER
+).encode()
+
+
+def analysis_sql(table='symptom_history'):
+    """SQL for a live symptom_history row's analysis, compressed or legacy plain text"""
+    return (
+        f"COALESCE((SELECT body FROM analysis_texts WHERE analysis_texts.id = {table}.analysis_id), "
+        f"{table}.suggested_conditions)"
+    )
+
+
+def text_hash(text):
+    """Key of a text in analysis_texts"""
+    return hashlib.sha256(text.encode()).digest()[:16]
+
+
+def is_compressed(value):
+    return isinstance(value, bytes) and value[:1] == MAGIC
+
+
+def train_dictionary(samples, size=DICT_SIZE):
+    """Build a zlib preset dictionary from the lines that recur across `samples`.
+
+    zlib only looks back 32 KiB and finds matches closer to the end more
+    cheaply, so the most valuable lines (frequency x length) go last.
+    """
+    counts = Counter()
+    for text in samples:
+        counts.update(set(line for line in text.splitlines() if len(line) > 8))
+    scored = sorted(
+        ((count * len(line.encode()), line) for line, count in counts.items() if count > 1),
+        reverse=True
+    )
+    chosen, used = [], len(SEED_DICTIONARY)
+    for _, line in scored:
+        encoded = line.encode() + b"\n"
+        if used + len(encoded) > size:
+            break
+        chosen.append(encoded)
+        used += len(encoded)
+    return b"".join(reversed(chosen)) + SEED_DICTIONARY
+
+
+class AnalysisStore:
+    """Stores and decodes analysis bodies for one database"""
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self._dicts = {0: SEED_DICTIONARY}
+        self._current_dict_id = None
+        self._lock = threading.Lock()
+        self.decompress = lru_cache(maxsize=4096)(self._decompress)
+
+    def get_connection(self):
+        return connect(self.db_path, check_same_thread=False, timeout=30)
+
+    # --- DICTIONARIES ---
+    def _load_dictionaries(self):
+        conn = self.get_connection()
+        try:
+            cursor = conn.cursor()
+            cursor.execute("SELECT id, dict FROM compression_dicts")
+            for dict_id, zdict in cursor.fetchall():
+                self._dicts[dict_id] = zdict
+        finally:
+            conn.close()
+        self._current_dict_id = max(self._dicts)
+
+    def _dictionary(self, dict_id):
+        zdict = self._dicts.get(dict_id)
+        if zdict is None:
+            with self._lock:
+                self._load_dictionaries()
+            zdict = self._dicts[dict_id]
+        return zdict
+
+    def current_dict_id(self):
+        if self._current_dict_id is None:
+            with self._lock:
+                if self._current_dict_id is None:
+                    self._load_dictionaries()
+        return self._current_dict_id
+
+    @timed('analysis.train_dictionary')
+    def train(self, samples=TRAINING_SAMPLES):
+        """Train a dictionary on the most recent analyses and make it current; returns its id"""
+        conn = self.get_connection()
+        try:
+            cursor = conn.cursor()
+            cursor.execute(f'''
+                SELECT {analysis_sql()} FROM symptom_history
+                ORDER BY id DESC LIMIT ?
+            ''', (samples,))
+            texts = [self.decode(row[0]) for row in cursor.fetchall()]
+            cursor.execute("INSERT INTO compression_dicts (dict) VALUES (?)", (train_dictionary(texts),))
+            conn.commit()
+            dict_id = cursor.lastrowid
+        finally:
+            conn.close()
+        with self._lock:
+            self._load_dictionaries()
+        return dict_id
+
+    # --- ENCODING ---
+    def compress(self, text):
+        dict_id = self.current_dict_id()
+        compressor = zlib.compressobj(COMPRESSION_LEVEL, zdict=self._dictionary(dict_id))
+        return HEADER.pack(MAGIC, dict_id) + compressor.compress(text.encode()) + compressor.flush()
+
+    def _decompress(self, body):
+        _, dict_id = HEADER.unpack_from(body)
+        decompressor = zlib.decompressobj(zdict=self._dictionary(dict_id))
+        return (decompressor.decompress(body[HEADER.size:]) + decompressor.flush()).decode()
+
+    def decode(self, value):
+        """Text of a stored analysis, whether compressed or legacy plain text"""
+        if value is None:
+            return ""
+        if is_compressed(value):
+            return self.decompress(value)
+        return value
+
+    def store(self, cursor, text):
+        """Store `text` (once per distinct text) inside the caller's transaction; returns its analysis_id.
+
+        Writing first takes the write lock, so a concurrent writer can't insert
+        the same text in between and collect_garbage can't delete the body
+        before the caller's row points at it.
+        """
+        digest = text_hash(text)
+        cursor.execute(
+            "INSERT OR IGNORE INTO analysis_texts (hash, body) VALUES (?, ?)", (digest, self.compress(text))
+        )
+        cursor.execute("SELECT id FROM analysis_texts WHERE hash = ?", (digest,))
+        return cursor.fetchone()[0]
+
+    # --- MAINTENANCE ---
+    @timed('analysis.compress_history')
+    def compress_history(self, progress=None, batch_size=1000):
+        """Move legacy plain-text analyses into analysis_texts in batches; returns rows converted"""
+        if self.current_dict_id() == 0:
+            self.train()
+        conn = connect(self.db_path, check_same_thread=False, timeout=30, isolation_level=None)
+        try:
+            cursor = conn.cursor()
+            cursor.execute("SELECT COUNT(*) FROM symptom_history WHERE suggested_conditions IS NOT NULL")
+            total = cursor.fetchone()[0]
+            done = 0
+            last_id = 0
+            while True:
+                cursor.execute('''
+                    SELECT id, suggested_conditions FROM symptom_history
+                    WHERE id > ? AND suggested_conditions IS NOT NULL
+                    ORDER BY id LIMIT ?
+                ''', (last_id, batch_size))
+                rows = cursor.fetchall()
+                if not rows:
+                    break
+                cursor.execute("BEGIN IMMEDIATE")
+                updates = [(self.store(cursor, self.decode(text)), row_id) for row_id, text in rows]
+                cursor.executemany(
+                    "UPDATE symptom_history SET analysis_id = ?, suggested_conditions = NULL WHERE id = ?",
+                    updates
+                )
+                cursor.execute("COMMIT")
+                done += len(rows)
+                last_id = rows[-1][0]
+                if progress:
+                    progress(done, total)
+            return done
+        except BaseException:
+            if conn.in_transaction:
+                conn.rollback()
+            raise
+        finally:
+            conn.close()
+
+    @timed('analysis.collect_garbage')
+    def collect_garbage(self, batch_size=1000):
+        """Delete bodies no symptom_history row points at any more; returns bodies removed.
+
+        Each batch runs under BEGIN IMMEDIATE, so it waits for any transaction
+        that has stored a body (see store()) to commit the row pointing at it.
+        """
+        conn = connect(self.db_path, check_same_thread=False, timeout=30, isolation_level=None)
+        try:
+            cursor = conn.cursor()
+            removed = 0
+            while True:
+                cursor.execute("BEGIN IMMEDIATE")
+                cursor.execute('''
+                    DELETE FROM analysis_texts WHERE id IN (
+                        SELECT id FROM analysis_texts
+                        WHERE NOT EXISTS (SELECT 1 FROM symptom_history WHERE analysis_id = analysis_texts.id)
+                        LIMIT ?
+                    )
+                ''', (batch_size,))
+                deleted = cursor.rowcount
+                cursor.execute("COMMIT")
+                removed += deleted
+                if deleted < batch_size:
+                    break
+            return removed
+        finally:
+            conn.close()
+
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def get_store(db_path):
+    """The shared AnalysisStore for a database file"""
+    with _stores_lock:
+        store = _stores.get(db_path)
+        if store is None:
+            store = _stores[db_path] = AnalysisStore(db_path)
+        return store
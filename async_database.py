@@ -0,0 +1,182 @@
+# async_database.py
+"""
+Asyncio counterparts of UserDatabase and DatabaseAdmin.
+
+SQLite has no useful async driver, so each async database owns one
+dedicated thread that holds the only connection and works through a
+request queue. Coroutines never block the event loop: a call enqueues
+(method, args) and awaits a future that the DB thread resolves.
+
+The DB thread drains everything queued since its last pass and runs it in
+order. Identical read calls in that batch (same method and arguments, no
+write in between) run once and share the result, so a burst of callers
+asking for the same profile or page costs one query.
+
+    db = AsyncUserDatabase()
+    profile = await db.get_user_profile("alice")
+    await db.close()
+
+Every public method of the blocking class is available under the same
+name and signature, as a coroutine.
+"""
+import asyncio
+import queue
+import threading
+
+from database import DB_PATH, UserDatabase
+from database_admin import DatabaseAdmin
+from metrics import timed
+
+# Upper bound on requests handled per pass of the DB thread
+MAX_BATCH = 512
+
+USER_DB_READS = frozenset({
+    'authenticate_user', 'get_symptom_history', 'get_symptom_history_page',
+    'get_history_analysis', 'get_analyses_since', 'get_analysis_text',
+    'get_unanalyzed_history', 'count_unanalyzed_history',
+    'get_user_profile', 'user_exists', 'get_all_users', 'get_database_stats',
+    'export_user_data',
+})
+DB_ADMIN_READS = frozenset({'get_database_stats', 'get_all_data', 'export_data'})
+
+_STOP = object()
+
+
+class AsyncDataLayer:
+    """Runs the methods of a blocking data object on its own thread, one request queue"""
+
+    def __init__(self, factory, reads, name='db'):
+        self._factory = factory
+        self._reads = reads
+        self._requests = queue.Queue()
+        self._target = None
+        self._ready = threading.Event()
+        self._thread = threading.Thread(target=self._serve, name=f"async-{name}", daemon=True)
+        self._thread.start()
+        self._ready.wait()
+
+    # --- DB THREAD ---
+    def _serve(self):
+        # The blocking object (and its connection) is created and used only on this thread
+        self._target = self._factory()
+        self._ready.set()
+        while True:
+            batch = [self._requests.get()]
+            while len(batch) < MAX_BATCH:
+                try:
+                    batch.append(self._requests.get_nowait())
+                except queue.Empty:
+                    break
+            if self._run_batch(batch):
+                return
+
+    def _run_batch(self, batch):
+        """Run one batch in order; returns True once the stop request is reached"""
+        shared = {}
+        for request in batch:
+            if request is _STOP:
+                return True
+            name, args, kwargs, future, loop = request
+            if future.cancelled():
+                continue
+            key = _read_key(name, args, kwargs) if name in self._reads else None
+            if key is not None:
+                if key not in shared:
+                    shared[key] = self._call(name, args, kwargs)
+                outcome = shared[key]
+            else:
+                # A write makes earlier read results stale for the rest of the batch
+                shared.clear()
+                outcome = self._call(name, args, kwargs)
+            loop.call_soon_threadsafe(_resolve, future, outcome)
+        return False
+
+    @timed('async_db.call')
+    def _call(self, name, args, kwargs):
+        try:
+            return True, getattr(self._target, name)(*args, **kwargs)
+        except Exception as e:
+            return False, e
+
+    # --- EVENT LOOP SIDE ---
+    async def call(self, name, *args, **kwargs):
+        """Run target.name(*args, **kwargs) on the DB thread and return its result"""
+        if not self._thread.is_alive():
+            raise RuntimeError("The async database is closed")
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._requests.put((name, args, kwargs, future, loop))
+        return await future
+
+    async def close(self):
+        """Finish the queued requests, then stop the DB thread"""
+        if self._thread.is_alive():
+            self._requests.put(_STOP)
+            await asyncio.get_running_loop().run_in_executor(None, self._thread.join)
+
+
+def _read_key(name, args, kwargs):
+    """Key under which identical reads share one result; None for unhashable arguments"""
+    key = (name, args, tuple(sorted(kwargs.items())))
+    try:
+        hash(key)
+    except TypeError:
+        return None
+    return key
+
+
+def _resolve(future, outcome):
+    if future.cancelled():
+        return
+    success, value = outcome
+    if success:
+        future.set_result(value)
+    else:
+        future.set_exception(value)
+
+
+def _public_methods(cls):
+    return {
+        name for name in dir(cls)
+        if not name.startswith('_') and callable(getattr(cls, name))
+    }
+
+
+class _AsyncFacade:
+    """Exposes the public methods of `_blocking_class` as coroutines"""
+    _blocking_class = None
+
+    def __getattr__(self, name):
+        if name not in _public_methods(self._blocking_class):
+            raise AttributeError(name)
+
+        async def method(*args, **kwargs):
+            return await self._layer.call(name, *args, **kwargs)
+        method.__name__ = name
+        method.__doc__ = getattr(self._blocking_class, name).__doc__
+        return method
+
+    async def close(self):
+        await self._layer.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+
+class AsyncUserDatabase(_AsyncFacade):
+    _blocking_class = UserDatabase
+
+    def __init__(self, db_path=DB_PATH):
+        self.db_path = db_path
+        self._layer = AsyncDataLayer(lambda: UserDatabase(db_path), USER_DB_READS, name='user_db')
+
+
+class AsyncDatabaseAdmin(_AsyncFacade):
+    _blocking_class = DatabaseAdmin
+
+    def __init__(self, db_path=DB_PATH):
+        self.db_path = db_path
+        self._layer = AsyncDataLayer(lambda: DatabaseAdmin(db_path), DB_ADMIN_READS, name='db_admin')
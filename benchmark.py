@@ -0,0 +1,522 @@
+# benchmark.py
+"""
+Reproducible benchmarks for the data layer and the analyze request path.
+
+Seeds a scratch copy of healthcare_app.db with synthetic data at each requested
+size, times the UserDatabase / DatabaseAdmin operations, then drives main_app
+through Streamlit's AppTest with Gemini and Nominatim replaced by local stub
+servers. Results are written as JSON so runs can be diffed.
+
+    python benchmark.py --sizes 10k,1m,10m --output bench.json
+
+--scaling 1,2,4,8 additionally load-tests the headless API (health_connect.api)
+run as that many worker processes, to show how throughput scales per box.
+It stands in for cluster.py: the API workers run the same services, database
+and shared caches as the Streamlit workers, but without Streamlit's websocket
+protocol, which has no load client here. The numbers show how the shared
+state scales, not the cost of Streamlit's reruns.
+
+--ai-provider stub (or rules) replaces the Gemini client itself with an
+in-process provider from model_providers.py, so no HTTP stub is involved;
+--stub-failure-rate then injects transient failures into its calls.
+"""
+import argparse
+import contextlib
+import hashlib
+import json
+import os
+import platform
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Importing database opens its global connection; keep that off the real database
+os.environ.setdefault("HEALTHCARE_DB_PATH", os.path.join(tempfile.gettempdir(), "healthcare_bench_global.db"))
+os.environ.setdefault("SHARED_CACHE_PATH", os.path.join(tempfile.gettempdir(), "healthcare_bench_shared.db"))
+# The stub upstreams have no usage policy to respect
+os.environ["NOMINATIM_RATE"] = "0"
+
+from database import UserDatabase
+from database_admin import DatabaseAdmin
+
+SEED_PASSWORD = "benchmark"
+ROWS_PER_USER = 20
+
+SYMPTOMS = [
+    "headache", "high fever", "dry cough", "sore throat", "runny nose",
+    "stomach pain", "nausea", "fatigue", "dizziness", "back pain",
+    "joint pain", "skin rash", "shortness of breath", "chest pain",
+    "सिरदर्द", "बुखार", "खांसी", "ਸਿਰ ਦਰਦ", "ਬੁਖਾਰ", "ਖੰਘ",
+]
+LOCATIONS = ["Delhi, India", "Mumbai, India", "Amritsar, India", "London, UK", "Austin, US"]
+SEVERITIES = ["LOW", "LOW", "LOW", "MEDIUM", "HIGH"]
+BLOOD_TYPES = ["Unknown", "A+", "A-", "B+", "B-", "AB+", "AB-", "O+", "O-"]
+LANGUAGES = ["en", "hi", "pa"]
+
+DISCLAIMER = (
+    "*Disclaimer:* I am an AI assistant and not a medical professional. "
+    "This information is not a diagnosis. Please consult a qualified healthcare "
+    "provider for medical advice."
+)
+STUB_ANALYSIS = (
+    "* **Common cold:** viral infection of the upper respiratory tract.\n"
+    "* **Influenza:** fever, aches and fatigue.\n"
+    "* **Sinusitis:** inflammation of the sinuses.\n\n" + DISCLAIMER
+)
+
+SIZE_SUFFIXES = {"k": 1000, "m": 1000000}
+
+
+def parse_size(text):
+    text = text.strip().lower()
+    if text[-1] in SIZE_SUFFIXES:
+        return int(float(text[:-1]) * SIZE_SUFFIXES[text[-1]])
+    return int(text)
+
+
+def random_symptoms(rng):
+    return ", ".join(rng.sample(SYMPTOMS, rng.randint(1, 4)))
+
+
+# --- SEEDING ---
+def seed_database(db_path, rows, rng, batch_size=50000):
+    """Fill a fresh database with `rows` symptom_history rows and matching users"""
+    UserDatabase(db_path).conn.close()  # create the schema
+
+    conn = sqlite3.connect(db_path)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=OFF")
+    user_count = max(rows // ROWS_PER_USER, 1)
+    password_hash = hashlib.sha256(SEED_PASSWORD.encode()).hexdigest()
+    start = datetime.now() - timedelta(days=730)
+
+    def users():
+        for i in range(user_count):
+            created = start + timedelta(seconds=rng.randint(0, 730 * 86400))
+            yield (f"user{i}", password_hash, f"user{i}@example.com", created.strftime("%Y-%m-%d %H:%M:%S"))
+
+    def profiles():
+        for i in range(0, user_count, 2):
+            yield (i + 1, rng.randint(1, 90), rng.choice(BLOOD_TYPES), "", "", f"+91-{rng.randint(10**9, 10**10 - 1)}")
+
+    def history():
+        for _ in range(rows):
+            created = start + timedelta(seconds=rng.randint(0, 730 * 86400))
+            yield (
+                rng.randint(1, user_count),
+                random_symptoms(rng),
+                rng.choice(SEVERITIES),
+                STUB_ANALYSIS,
+                rng.choice(LOCATIONS),
+                created.strftime("%Y-%m-%d %H:%M:%S"),
+                rng.choice(LANGUAGES),
+            )
+
+    def insert(sql, generator):
+        batch = []
+        for row in generator:
+            batch.append(row)
+            if len(batch) >= batch_size:
+                conn.executemany(sql, batch)
+                batch = []
+        if batch:
+            conn.executemany(sql, batch)
+
+    with conn:
+        insert("INSERT INTO users (username, password_hash, email, created_at) VALUES (?, ?, ?, ?)", users())
+        insert('''
+            INSERT INTO user_profiles
+            (user_id, age, blood_type, allergies, chronic_conditions, emergency_contact)
+            VALUES (?, ?, ?, ?, ?, ?)
+        ''', profiles())
+        insert('''
+            INSERT INTO symptom_history
+            (user_id, symptoms, severity, suggested_conditions, location_searched, created_at, language)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        ''', history())
+    conn.close()
+    return user_count
+
+
+# --- TIMING ---
+def summarize(samples):
+    samples = sorted(samples)
+    return {
+        "runs": len(samples),
+        "mean_ms": round(statistics.fmean(samples) * 1000, 3),
+        "p50_ms": round(samples[len(samples) // 2] * 1000, 3),
+        "p95_ms": round(samples[min(len(samples) - 1, int(len(samples) * 0.95))] * 1000, 3),
+        "min_ms": round(samples[0] * 1000, 3),
+        "max_ms": round(samples[-1] * 1000, 3),
+    }
+
+
+def measure(func, make_args, repeat):
+    samples = []
+    for _ in range(repeat):
+        args = make_args()
+        started = time.perf_counter()
+        func(*args)
+        samples.append(time.perf_counter() - started)
+    return summarize(samples)
+
+
+def bench_data_layer(db_path, user_count, rng, repeat, max_export_rows, rows):
+    db = UserDatabase(db_path)
+    admin = DatabaseAdmin(db_path)
+    existing_user = lambda: f"user{rng.randrange(user_count)}"
+    new_users = (f"bench_new_{i}" for i in range(repeat))
+    slow_repeat = max(1, repeat // 10)
+
+    results = {
+        "create_user": measure(db.create_user, lambda: (next(new_users), SEED_PASSWORD, ""), repeat),
+        "authenticate_user": measure(db.authenticate_user, lambda: (existing_user(), SEED_PASSWORD), repeat),
+        "save_symptom_history": measure(
+            db.save_symptom_history,
+            lambda: (existing_user(), random_symptoms(rng), "LOW", STUB_ANALYSIS, rng.choice(LOCATIONS), "en"),
+            repeat,
+        ),
+        "get_symptom_history": measure(db.get_symptom_history, lambda: (existing_user(),), repeat),
+        "get_database_stats": measure(db.get_database_stats, lambda: (), slow_repeat),
+        "export_user_data": measure(db.export_user_data, lambda: (existing_user(),), repeat),
+    }
+    for table in ["users", "user_profiles", "symptom_history"]:
+        key = f"DatabaseAdmin.export_data[{table}]"
+        if table == "symptom_history" and rows > max_export_rows:
+            results[key] = {"skipped": f"more than {max_export_rows} rows"}
+            continue
+        results[key] = measure(admin.export_data, lambda: (table, "csv"), slow_repeat)
+    db.conn.close()
+    return results
+
+
+# --- STUB UPSTREAMS ---
+class StubHandler(BaseHTTPRequestHandler):
+    """Answers Gemini generateContent and Nominatim search requests"""
+
+    protocol_version = "HTTP/1.1"
+    latency = 0.0
+
+    def _reply(self, payload):
+        time.sleep(self.latency)
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        self._reply({
+            "candidates": [{
+                "content": {"role": "model", "parts": [{"text": STUB_ANALYSIS}]},
+                "finishReason": "STOP",
+            }]
+        })
+
+    def do_GET(self):
+        self._reply([
+            {"display_name": f"Stub Hospital {i}", "lat": str(28.6 + i / 100), "lon": str(77.2 + i / 100)}
+            for i in range(5)
+        ])
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_stub_server(latency):
+    handler = type("ConfiguredStubHandler", (StubHandler,), {"latency": latency})
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def bench_analyze_path(db_path, user_count, rng, repeat, stub_latency):
+    """Time one full 'Analyze' click in main_app against local stub upstreams"""
+    from streamlit.testing.v1 import AppTest
+
+    import ai_translator
+    import database
+
+    server = start_stub_server(stub_latency)
+    endpoint = f"http://127.0.0.1:{server.server_port}"
+    os.environ["GEMINI_API_ENDPOINT"] = endpoint
+    os.environ["NOMINATIM_URL"] = f"{endpoint}/search"
+    database.user_db = UserDatabase(db_path)
+    ai_translator.reset_default_translator()
+    # The app package binds user_db at import; re-import it against this database
+    for name in [m for m in sys.modules if m.split(".")[0] == "health_connect"]:
+        del sys.modules[name]
+
+    samples = []
+    try:
+        for _ in range(repeat):
+            at = AppTest.from_file(os.path.join(APP_DIR, "app.py"), default_timeout=120)
+            at.secrets["GEMINI_API_KEY"] = "benchmark"
+            at.session_state["logged_in"] = True
+            at.session_state["is_admin"] = False
+            at.session_state["current_user"] = f"user{rng.randrange(user_count)}"
+            at.session_state["current_language"] = "en"
+            at.run()
+
+            at.text_area[0].input(f"{random_symptoms(rng)} {rng.random()}")
+            at.text_input[0].input(rng.choice(LOCATIONS))
+            analyze = next(b for b in at.button if "Analyze" in b.label)
+            analyze.click()
+            started = time.perf_counter()
+            at.run()
+            samples.append(time.perf_counter() - started)
+            if at.exception:
+                raise RuntimeError(at.exception[0].message)
+            if not any("Stub Hospital" in m.value for m in at.markdown):
+                raise RuntimeError("analyze path did not reach the stub upstreams")
+    finally:
+        server.shutdown()
+        database.user_db.conn.close()
+    return {"main_app.analyze": summarize(samples), "stub_latency_ms": stub_latency * 1000}
+
+
+def startup_child():
+    """Runs in a fresh interpreter: time importing Streamlit and the first login render"""
+    started = time.perf_counter()
+    from streamlit.testing.v1 import AppTest
+    imported = time.perf_counter()
+    at = AppTest.from_file(os.path.join(APP_DIR, "app.py"), default_timeout=120)
+    at.run()
+    rendered = time.perf_counter()
+    if at.exception:
+        raise RuntimeError(at.exception[0].message)
+    print(json.dumps({
+        "import_streamlit_ms": round((imported - started) * 1000, 3),
+        "login_render_ms": round((rendered - imported) * 1000, 3),
+        "heavy_modules_loaded": sorted(m for m in ("google.generativeai", "pandas", "numpy", "requests") if m in sys.modules),
+    }))
+
+
+def bench_startup(repeat, workdir):
+    """Cold-start time to the login page, each run in a new process"""
+    import subprocess
+
+    env = dict(os.environ, HEALTHCARE_DB_PATH=os.path.join(workdir, "startup.db"), METRICS_PORT="0")
+    process_samples, render_samples, runs = [], [], []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        output = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--startup-child"],
+            env=env, cwd=APP_DIR, capture_output=True, text=True, check=True,
+        ).stdout
+        process_samples.append(time.perf_counter() - started)
+        run = json.loads(output.strip().splitlines()[-1])
+        render_samples.append(run["login_render_ms"] / 1000)
+        runs.append(run)
+    return {
+        "process_to_login": summarize(process_samples),
+        "login_render": summarize(render_samples),
+        "heavy_modules_loaded": runs[-1]["heavy_modules_loaded"],
+    }
+
+
+def _wait_for_port(port, timeout=30):
+    import socket
+
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        with contextlib.suppress(OSError), socket.create_connection(("127.0.0.1", port), timeout=1):
+            return
+        time.sleep(0.2)
+    raise RuntimeError(f"nothing listening on port {port}")
+
+
+def load_api(port, duration, concurrency, seed, authorization):
+    """Drive the API from `concurrency` keep-alive clients for `duration` seconds"""
+    import http.client
+
+    samples, errors = [], []
+    stop_at = time.monotonic() + duration
+
+    def client(index):
+        rng = random.Random(seed + index)
+        conn = http.client.HTTPConnection("127.0.0.1", port, timeout=60)
+        while time.monotonic() < stop_at:
+            # One request of each kind in turn; unique text keeps the caches from answering everything
+            kind = rng.randrange(3)
+            unique = f"{rng.random():.12f}"
+            if kind == 0:
+                method, path, body = "POST", "/api/severity", {"symptoms": random_symptoms(rng)}
+            elif kind == 1:
+                method, path, body = "POST", "/api/analysis", {"symptoms": f"{random_symptoms(rng)} {unique}"}
+            else:
+                method, path, body = "GET", f"/api/hospitals?location=Town+{unique}", None
+            started = time.perf_counter()
+            conn.request(method, path, body=json.dumps(body) if body else None,
+                         headers={"Content-Type": "application/json", "Authorization": authorization})
+            response = conn.getresponse()
+            response.read()
+            samples.append(time.perf_counter() - started)
+            if response.status != 200:
+                errors.append(response.status)
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return samples, errors
+
+
+def bench_scaling(process_counts, workdir, duration, concurrency, stub_latency, seed):
+    """Requests per second of the headless API at each worker process count (standing in for cluster.py)"""
+    import base64
+    import subprocess
+
+    server = start_stub_server(stub_latency)
+    endpoint = f"http://127.0.0.1:{server.server_port}"
+    db_path = os.path.join(workdir, "scaling.db")
+    # /api/analysis takes a patient's Basic credentials
+    UserDatabase(db_path).create_user("bench_api", SEED_PASSWORD)
+    authorization = "Basic " + base64.b64encode(f"bench_api:{SEED_PASSWORD}".encode()).decode()
+    results = {}
+    try:
+        for processes in process_counts:
+            port = 8700 + processes
+            env = dict(
+                os.environ,
+                HEALTHCARE_DB_PATH=db_path,
+                SHARED_CACHE_PATH=os.path.join(workdir, "scaling_shared.db"),
+                GEMINI_API_ENDPOINT=endpoint, GEMINI_API_KEY="benchmark",
+                NOMINATIM_URL=f"{endpoint}/search", NOMINATIM_RATE="0", METRICS_PORT="0",
+            )
+            api = subprocess.Popen(
+                [sys.executable, "-m", "health_connect.api", "--port", str(port), "--processes", str(processes)],
+                cwd=APP_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+            )
+            try:
+                _wait_for_port(port)
+                load_api(port, 2, concurrency, seed, authorization)  # warm-up: imports, Gemini client, schema
+                samples, errors = load_api(port, duration, concurrency, seed, authorization)
+            finally:
+                api.terminate()
+                api.wait(timeout=30)
+            results[str(processes)] = {
+                "requests_per_second": round(len(samples) / duration, 1),
+                "errors": len(errors),
+                "latency": summarize(samples),
+            }
+            print(f"  {processes} processes: {results[str(processes)]['requests_per_second']} req/s", file=sys.stderr)
+    finally:
+        server.shutdown()
+    return {
+        "cpus": os.cpu_count(),
+        "concurrency": concurrency,
+        "duration_s": duration,
+        "stub_latency_ms": stub_latency * 1000,
+        "processes": results,
+    }
+
+
+def run_benchmarks(args):
+    os.chdir(APP_DIR)  # locales/ is resolved relative to the working directory
+    # Read when the translator is first built, here and in the API processes
+    os.environ["AI_PROVIDER"] = args.ai_provider
+    os.environ["STUB_LATENCY_MS"] = str(args.stub_latency * 1000)
+    os.environ["STUB_FAILURE_RATE"] = str(args.stub_failure_rate)
+    workdir = args.workdir or tempfile.mkdtemp(prefix="healthcare_bench_")
+    report = {
+        "meta": {
+            "started_at": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "platform": platform.platform(),
+            "seed": args.seed,
+            "repeat": args.repeat,
+            "ai_provider": args.ai_provider,
+            "stub_failure_rate": args.stub_failure_rate,
+        },
+        "sizes": {},
+    }
+
+    if args.startup_repeat:
+        print("Timing cold start to the login page...", file=sys.stderr)
+        report["startup"] = bench_startup(args.startup_repeat, workdir)
+
+    if args.scaling:
+        print("Load-testing the API at each process count...", file=sys.stderr)
+        report["scaling"] = bench_scaling(
+            [int(count) for count in args.scaling.split(",")], workdir,
+            args.scaling_duration, args.scaling_concurrency, args.stub_latency, args.seed
+        )
+
+    for size in [parse_size(s) for s in args.sizes.split(",") if s.strip()]:
+        rng = random.Random(args.seed)
+        db_path = os.path.join(workdir, f"healthcare_app_{size}.db")
+        if os.path.exists(db_path):
+            os.remove(db_path)
+
+        print(f"Seeding {size} rows into {db_path}...", file=sys.stderr)
+        started = time.perf_counter()
+        user_count = seed_database(db_path, size, rng)
+        result = {
+            "rows": size,
+            "users": user_count,
+            "seed_seconds": round(time.perf_counter() - started, 3),
+            "db_bytes": os.path.getsize(db_path),
+        }
+
+        print(f"Timing data layer at {size} rows...", file=sys.stderr)
+        result["operations"] = bench_data_layer(db_path, user_count, rng, args.repeat, args.max_export_rows, size)
+        if args.e2e_repeat:
+            print(f"Timing analyze path at {size} rows...", file=sys.stderr)
+            result["request_path"] = bench_analyze_path(db_path, user_count, rng, args.e2e_repeat, args.stub_latency)
+        report["sizes"][str(size)] = result
+    return report
+
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="10k", help="comma separated symptom_history row counts, e.g. 10k,1m,10m (empty to skip)")
+    parser.add_argument("--repeat", type=int, default=200, help="timed calls per data-layer operation")
+    parser.add_argument("--e2e-repeat", type=int, default=20, help="timed analyze clicks per size (0 to skip)")
+    parser.add_argument("--stub-latency", type=float, default=0.0, help="seconds each stub upstream waits before replying")
+    parser.add_argument("--ai-provider", choices=["gemini", "stub", "rules"], default="gemini",
+                        help="model provider for the analyze path (gemini talks to the stub server)")
+    parser.add_argument("--stub-failure-rate", type=float, default=0.0,
+                        help="share of stub provider calls that fail with a transient error")
+    parser.add_argument("--max-export-rows", type=int, default=1000000, help="skip whole-table exports above this size")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--workdir", help="where scratch databases are created (default: a temp dir)")
+    parser.add_argument("--startup-repeat", type=int, default=5, help="cold starts to time (0 to skip)")
+    parser.add_argument("--startup-child", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--scaling", help="comma separated API process counts to load-test, e.g. 1,2,4,8")
+    parser.add_argument("--scaling-duration", type=float, default=10.0, help="seconds of load per process count")
+    parser.add_argument("--scaling-concurrency", type=int, default=32, help="concurrent keep-alive clients")
+    parser.add_argument("--output", help="write JSON results here instead of stdout")
+    args = parser.parse_args(argv)
+
+    if args.startup_child:
+        startup_child()
+        return
+
+    # Keep stdout for the JSON report; the app's own prints go to stderr
+    with contextlib.redirect_stdout(sys.stderr):
+        report = run_benchmarks(args)
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
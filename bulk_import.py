@@ -0,0 +1,433 @@
+# bulk_import.py
+"""
+Bulk loading of users, profiles and symptom history, plus a seeded generator
+of synthetic multilingual data for capacity testing.
+
+Input files are CSV (with a header row) or NDJSON, one record per row/line:
+
+    users:    username, password or password_hash, email, created_at
+    profiles: username, age, blood_type, allergies, chronic_conditions, emergency_contact
+    history:  username, symptoms, severity, suggested_conditions, location_searched,
+              language, created_at
+
+    python bulk_import.py load --users roster.csv --profiles profiles.ndjson
+    python bulk_import.py generate --users 100k --history 5m --out synthetic/
+    python bulk_import.py generate --users 100k --history 5m --load --db loadtest.db
+
+Rows are inserted with executemany in large transactions and any secondary
+indexes on the loaded tables are dropped for the load and rebuilt at the end.
+Loads bypass UserDatabase, so a running app picks the new rows up in sessions
+started afterwards.
+"""
+import argparse
+import csv
+import hashlib
+import json
+import os
+import random
+import sqlite3
+import sys
+import time
+from datetime import datetime, timedelta
+from itertools import islice
+
+from database import DB_PATH, UserDatabase
+
+BATCH_SIZE = 10000
+TRANSACTION_ROWS = 500000
+LOADED_TABLES = ('users', 'user_profiles', 'symptom_history')
+
+USER_FIELDS = ['username', 'password_hash', 'email', 'created_at']
+PROFILE_FIELDS = ['username', 'age', 'blood_type', 'allergies', 'chronic_conditions', 'emergency_contact']
+HISTORY_FIELDS = [
+    'username', 'symptoms', 'severity', 'suggested_conditions',
+    'location_searched', 'language', 'created_at',
+]
+
+
+# --- READING AND WRITING RECORDS ---
+def _is_ndjson(path):
+    return os.path.splitext(path)[1].lower() in ('.ndjson', '.jsonl', '.json')
+
+
+def read_records(path):
+    """Yield dict records from a CSV or NDJSON file"""
+    with open(path, newline='', encoding='utf-8') as f:
+        if _is_ndjson(path):
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+        else:
+            yield from csv.DictReader(f)
+
+
+def write_records(path, records, fields):
+    """Write dict records to a CSV or NDJSON file; returns the number written"""
+    count = 0
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        if _is_ndjson(path):
+            for record in records:
+                f.write(json.dumps(record, ensure_ascii=False) + '\n')
+                count += 1
+        else:
+            writer = csv.DictWriter(f, fieldnames=fields, extrasaction='ignore')
+            writer.writeheader()
+            for record in records:
+                writer.writerow(record)
+                count += 1
+    return count
+
+
+def _blank(value):
+    return None if value in (None, '') else value
+
+
+# --- LOADING ---
+class BulkLoader:
+    """Loads record streams into the app database in large executemany transactions"""
+
+    def __init__(self, db_path=DB_PATH, batch_size=BATCH_SIZE, transaction_rows=TRANSACTION_ROWS):
+        self.db_path = db_path
+        self.batch_size = batch_size
+        self.transaction_rows = transaction_rows
+        self._deferred_indexes = []
+        UserDatabase(db_path).conn.close()  # create or migrate the schema
+        self.conn = sqlite3.connect(db_path, isolation_level=None)
+        self.conn.execute("PRAGMA synchronous=OFF")
+        self.conn.execute("PRAGMA temp_store=MEMORY")
+        self.conn.execute("PRAGMA cache_size=-262144")  # 256 MiB
+
+    def __enter__(self):
+        self.defer_indexes()
+        return self
+
+    def __exit__(self, *exc):
+        try:
+            # A failed load may leave its transaction open; the indexes must not be rebuilt inside it
+            if self.conn.in_transaction:
+                self.conn.execute("ROLLBACK")
+            self.rebuild_indexes()
+        finally:
+            self.conn.close()
+
+    def defer_indexes(self):
+        """Drop secondary indexes on the loaded tables until rebuild_indexes().
+
+        UNIQUE indexes stay: the app may write while a load runs, and a duplicate
+        key let in meanwhile would make the rebuild fail.
+        """
+        rows = self.conn.execute(
+            f'''SELECT name, sql FROM sqlite_master
+                WHERE type = 'index' AND sql IS NOT NULL
+                AND tbl_name IN ({", ".join("?" for _ in LOADED_TABLES)})''',
+            LOADED_TABLES
+        ).fetchall()
+        for name, sql in rows:
+            if sql.lstrip().upper().startswith('CREATE UNIQUE'):
+                continue
+            self.conn.execute(f'DROP INDEX "{name}"')
+            self._deferred_indexes.append(sql)
+
+    def rebuild_indexes(self):
+        started = time.perf_counter()
+        for sql in self._deferred_indexes:
+            self.conn.execute(sql)
+        self._deferred_indexes = []
+        self.conn.execute("ANALYZE")
+        print(f"Indexes rebuilt and statistics updated in {time.perf_counter() - started:.1f}s", file=sys.stderr)
+
+    def _load(self, label, sql, rows):
+        """executemany `rows` in batches, committing every transaction_rows; returns (inserted, skipped)"""
+        started = time.perf_counter()
+        before = self.conn.total_changes
+        submitted = 0
+        rows = iter(rows)
+        while True:
+            self.conn.execute("BEGIN")
+            in_transaction = 0
+            try:
+                while in_transaction < self.transaction_rows:
+                    batch = list(islice(rows, self.batch_size))
+                    if not batch:
+                        break
+                    self.conn.executemany(sql, batch)
+                    in_transaction += len(batch)
+                self.conn.execute("COMMIT")
+            except BaseException:
+                self.conn.execute("ROLLBACK")
+                raise
+            submitted += in_transaction
+            if in_transaction:
+                print(f"{label}: {submitted} rows ({time.perf_counter() - started:.1f}s)", file=sys.stderr)
+            if in_transaction < self.transaction_rows:
+                break
+        inserted = self.conn.total_changes - before
+        return inserted, submitted - inserted
+
+    def load_users(self, records):
+        """Insert users, skipping usernames that already exist; returns (inserted, skipped)"""
+        def rows():
+            for record in records:
+                password_hash = record.get('password_hash') or hashlib.sha256(record['password'].encode()).hexdigest()
+                yield (
+                    record['username'], password_hash, record.get('email') or '',
+                    _blank(record.get('created_at')) or datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+                )
+        return self._load('users', '''
+            INSERT OR IGNORE INTO users (username, password_hash, email, created_at)
+            VALUES (?, ?, ?, ?)
+        ''', rows())
+
+    def load_profiles(self, records):
+        """Insert or replace profiles of existing users; unknown usernames are skipped"""
+        def rows():
+            for record in records:
+                yield (
+                    _blank(record.get('age')), record.get('blood_type') or 'Unknown',
+                    record.get('allergies') or '', record.get('chronic_conditions') or '',
+                    record.get('emergency_contact') or '', record['username'],
+                )
+        return self._load('user_profiles', '''
+            INSERT OR REPLACE INTO user_profiles
+            (user_id, age, blood_type, allergies, chronic_conditions, emergency_contact)
+            SELECT id, ?, ?, ?, ?, ? FROM users WHERE username = ?
+        ''', rows())
+
+    def load_history(self, records):
+        """Append symptom history of existing users; unknown usernames are skipped.
+
+        Analyses are loaded as plain text; the compress_history job compresses them afterwards.
+        """
+        def rows():
+            for record in records:
+                yield (
+                    record['symptoms'], record.get('severity') or 'LOW',
+                    record.get('suggested_conditions') or '', record.get('location_searched') or '',
+                    _blank(record.get('created_at')) or datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+                    _blank(record.get('language')), record['username'],
+                )
+        return self._load('symptom_history', '''
+            INSERT INTO symptom_history
+            (user_id, symptoms, severity, suggested_conditions, location_searched, created_at, language)
+            SELECT id, ?, ?, ?, ?, ?, ? FROM users WHERE username = ?
+        ''', rows())
+
+
+# --- SYNTHETIC DATA ---
+SYNTHETIC_PASSWORD = "synthetic"
+HISTORY_DAYS = 730
+
+FIRST_NAMES = [
+    "aarav", "vivaan", "aditya", "ananya", "diya", "isha", "arjun", "kabir",
+    "gurpreet", "harpreet", "simran", "manpreet", "rohan", "priya", "neha",
+    "james", "olivia", "liam", "emma", "noah", "sofia", "mateo", "amara",
+]
+LAST_NAMES = [
+    "sharma", "verma", "gupta", "singh", "kaur", "gill", "sandhu", "patel",
+    "reddy", "iyer", "khan", "das", "smith", "jones", "brown", "garcia",
+]
+LOCATIONS = [
+    "Delhi, India", "Mumbai, India", "Bengaluru, India", "Chennai, India",
+    "Kolkata, India", "Amritsar, India", "Ludhiana, India", "Chandigarh, India",
+    "Jaipur, India", "Lucknow, India", "London, UK", "Birmingham, UK",
+    "Toronto, Canada", "New York, US", "Austin, US",
+]
+# Weights are roughly the share of sessions per interface language
+LANGUAGE_WEIGHTS = {'en': 5, 'hi': 3, 'pa': 2}
+SYMPTOMS = {
+    'en': [
+        "headache", "high fever", "dry cough", "sore throat", "runny nose",
+        "stomach pain", "nausea", "vomiting", "fatigue", "dizziness",
+        "back pain", "joint pain", "skin rash", "mild fever", "body ache",
+    ],
+    'hi': [
+        "सिरदर्द", "तेज बुखार", "सूखी खांसी", "गले में खराश", "नाक बहना",
+        "पेट दर्द", "जी मिचलाना", "उल्टी", "थकान", "चक्कर आना", "कमर दर्द",
+        "जोड़ों में दर्द", "त्वचा पर चकत्ते",
+    ],
+    'pa': [
+        "ਸਿਰ ਦਰਦ", "ਤੇਜ਼ ਬੁਖਾਰ", "ਸੁੱਕੀ ਖੰਘ", "ਗਲੇ ਵਿੱਚ ਖਰਾਸ਼", "ਨੱਕ ਵਗਣਾ",
+        "ਪੇਟ ਦਰਦ", "ਜੀ ਕੱਚਾ ਹੋਣਾ", "ਉਲਟੀ", "ਥਕਾਵਟ", "ਚੱਕਰ ਆਉਣਾ", "ਕਮਰ ਦਰਦ",
+        "ਜੋੜਾਂ ਵਿੱਚ ਦਰਦ",
+    ],
+}
+# Emergency symptoms appear in a small share of records and make them HIGH
+SEVERE_SYMPTOMS = {
+    'en': ["chest pain", "difficulty breathing", "severe bleeding"],
+    'hi': ["सीने में दर्द", "सांस लेने में कठिनाई"],
+    'pa': ["ਛਾਤੀ ਵਿੱਚ ਦਰਦ", "ਸਾਹ ਲੈਣ ਵਿੱਚ ਮੁਸ਼ਕਲ"],
+}
+SEVERE_SHARE = 0.04
+MODERATE_SYMPTOMS = {"high fever", "vomiting", "तेज बुखार", "उल्टी", "ਤੇਜ਼ ਬੁਖਾਰ", "ਉਲਟੀ"}
+ANALYSES = {
+    'en': [
+        "* **Common cold:** viral infection of the upper respiratory tract.\n"
+        "* **Influenza:** fever, aches and fatigue.\n"
+        "* **Sinusitis:** inflammation of the sinuses.",
+        "* **Gastroenteritis:** inflammation of the stomach and intestines.\n"
+        "* **Food poisoning:** illness from contaminated food.\n"
+        "* **Migraine:** recurring headaches with nausea.",
+    ],
+    'hi': [
+        "* **सामान्य सर्दी:** ऊपरी श्वसन तंत्र का वायरल संक्रमण।\n"
+        "* **इन्फ्लुएंजा:** बुखार, दर्द और थकान।",
+        "* **गैस्ट्रोएंटेराइटिस:** पेट और आंतों की सूजन।\n"
+        "* **माइग्रेन:** मतली के साथ बार-बार सिरदर्द।",
+    ],
+    'pa': [
+        "* **ਆਮ ਜ਼ੁਕਾਮ:** ਉੱਪਰਲੇ ਸਾਹ ਪ੍ਰਣਾਲੀ ਦੀ ਵਾਇਰਲ ਲਾਗ।\n"
+        "* **ਇਨਫਲੂਐਂਜ਼ਾ:** ਬੁਖਾਰ, ਦਰਦ ਅਤੇ ਥਕਾਵਟ।",
+        "* **ਗੈਸਟ੍ਰੋਐਂਟਰਾਈਟਿਸ:** ਪੇਟ ਅਤੇ ਆਂਤੜੀਆਂ ਦੀ ਸੋਜ।\n"
+        "* **ਮਾਈਗ੍ਰੇਨ:** ਜੀ ਕੱਚਾ ਹੋਣ ਨਾਲ ਵਾਰ-ਵਾਰ ਸਿਰ ਦਰਦ।",
+    ],
+}
+DISCLAIMER = (
+    "\n\n*Disclaimer:* I am an AI assistant and not a medical professional. "
+    "This information is not a diagnosis. Please consult a qualified healthcare "
+    "provider for medical advice."
+)
+BLOOD_TYPES = ["A+", "A-", "B+", "B-", "AB+", "AB-", "O+", "O-", "Unknown"]
+BLOOD_TYPE_WEIGHTS = [22, 2, 32, 2, 7, 1, 29, 1, 4]
+ALLERGIES = ["", "", "", "Penicillin", "Peanuts", "Dust", "Pollen", "Lactose"]
+CHRONIC_CONDITIONS = ["", "", "", "", "Diabetes", "Hypertension", "Asthma", "Thyroid"]
+
+
+def synthetic_username(i):
+    return f"{FIRST_NAMES[i % len(FIRST_NAMES)]}.{LAST_NAMES[(i // len(FIRST_NAMES)) % len(LAST_NAMES)]}{i}"
+
+
+def _timestamp(rng, start):
+    return (start + timedelta(seconds=rng.randrange(HISTORY_DAYS * 86400))).strftime('%Y-%m-%d %H:%M:%S')
+
+
+def generate_users(rng, count, start):
+    password_hash = hashlib.sha256(SYNTHETIC_PASSWORD.encode()).hexdigest()
+    for i in range(count):
+        username = synthetic_username(i)
+        yield {
+            'username': username,
+            'password_hash': password_hash,
+            'email': f"{username}@example.com",
+            'created_at': _timestamp(rng, start),
+        }
+
+
+def generate_profiles(rng, user_count, share=0.6):
+    """Profiles for roughly `share` of the users"""
+    for i in range(user_count):
+        if rng.random() >= share:
+            continue
+        yield {
+            'username': synthetic_username(i),
+            'age': rng.randint(1, 95),
+            'blood_type': rng.choices(BLOOD_TYPES, BLOOD_TYPE_WEIGHTS)[0],
+            'allergies': rng.choice(ALLERGIES),
+            'chronic_conditions': rng.choice(CHRONIC_CONDITIONS),
+            'emergency_contact': f"+91-{rng.randint(6 * 10**9, 10**10 - 1)}",
+        }
+
+
+def generate_history(rng, user_count, count, start):
+    languages = list(LANGUAGE_WEIGHTS)
+    weights = list(LANGUAGE_WEIGHTS.values())
+    for _ in range(count):
+        language = rng.choices(languages, weights)[0]
+        symptoms = rng.sample(SYMPTOMS[language], rng.randint(1, 4))
+        if rng.random() < SEVERE_SHARE:
+            symptoms.insert(0, rng.choice(SEVERE_SYMPTOMS[language]))
+            severity = 'HIGH'
+        elif MODERATE_SYMPTOMS.intersection(symptoms) or len(symptoms) > 3:
+            severity = 'MEDIUM'
+        else:
+            severity = 'LOW'
+        yield {
+            # A few heavy users and a long tail, as in real traffic
+            'username': synthetic_username(min(int(rng.paretovariate(1.2)) - 1, user_count - 1) if rng.random() < 0.2
+                                           else rng.randrange(user_count)),
+            'symptoms': ", ".join(symptoms),
+            'severity': severity,
+            'suggested_conditions': rng.choice(ANALYSES[language]) + DISCLAIMER,
+            'location_searched': rng.choice(LOCATIONS),
+            'language': language,
+            'created_at': _timestamp(rng, start),
+        }
+
+
+# --- COMMAND LINE ---
+SIZE_SUFFIXES = {'k': 1000, 'm': 1000000}
+
+
+def parse_size(text):
+    text = text.strip().lower()
+    if text[-1] in SIZE_SUFFIXES:
+        return int(float(text[:-1]) * SIZE_SUFFIXES[text[-1]])
+    return int(text)
+
+
+def load_files(args):
+    started = time.perf_counter()
+    with BulkLoader(args.db, args.batch_size, args.transaction_rows) as loader:
+        for label, path, load in [
+            ('users', args.users, loader.load_users),
+            ('profiles', args.profiles, loader.load_profiles),
+            ('history', args.history, loader.load_history),
+        ]:
+            if path:
+                inserted, skipped = load(read_records(path))
+                print(f"Loaded {inserted} {label} from {path} ({skipped} skipped)")
+    print(f"Done in {time.perf_counter() - started:.1f}s")
+
+
+def generate(args):
+    rng = random.Random(args.seed)
+    start = datetime(2024, 1, 1)
+    streams = [
+        ('users', USER_FIELDS, lambda: generate_users(rng, args.users, start)),
+        ('profiles', PROFILE_FIELDS, lambda: generate_profiles(rng, args.users)),
+        ('history', HISTORY_FIELDS, lambda: generate_history(rng, args.users, args.history, start)),
+    ]
+    started = time.perf_counter()
+    if args.load:
+        with BulkLoader(args.db, args.batch_size, args.transaction_rows) as loader:
+            loads = {'users': loader.load_users, 'profiles': loader.load_profiles, 'history': loader.load_history}
+            for label, _, records in streams:
+                inserted, skipped = loads[label](records())
+                print(f"Loaded {inserted} synthetic {label} ({skipped} skipped)")
+    else:
+        os.makedirs(args.out, exist_ok=True)
+        for label, fields, records in streams:
+            path = os.path.join(args.out, f"{label}.{args.format}")
+            print(f"Wrote {write_records(path, records(), fields)} {label} to {path}")
+    print(f"Done in {time.perf_counter() - started:.1f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db", default=DB_PATH, help="database to load into")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE, help="rows per executemany call")
+    parser.add_argument("--transaction-rows", type=int, default=TRANSACTION_ROWS, help="rows per commit")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    load = commands.add_parser("load", help="load CSV/NDJSON files")
+    load.add_argument("--users", help="users file")
+    load.add_argument("--profiles", help="profiles file")
+    load.add_argument("--history", help="symptom history file")
+    load.set_defaults(func=load_files)
+
+    gen = commands.add_parser("generate", help="generate synthetic data")
+    gen.add_argument("--users", type=parse_size, default=1000, help="number of users, e.g. 100k")
+    gen.add_argument("--history", type=parse_size, default=20000, help="number of symptom records, e.g. 5m")
+    gen.add_argument("--seed", type=int, default=42)
+    gen.add_argument("--out", default="synthetic_data", help="directory for generated files")
+    gen.add_argument("--format", choices=["ndjson", "csv"], default="ndjson")
+    gen.add_argument("--load", action="store_true", help="load straight into --db instead of writing files")
+    gen.set_defaults(func=generate)
+
+    args = parser.parse_args()
+    if args.command == "load" and not (args.users or args.profiles or args.history):
+        parser.error("nothing to load: pass --users, --profiles and/or --history")
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
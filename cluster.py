@@ -0,0 +1,239 @@
+# cluster.py
+"""
+Run the Streamlit app as several worker processes behind one local port.
+
+    python cluster.py --workers 4 --port 8501
+
+Each worker is a separate `streamlit run app.py` on its own port
+(--worker-port, --worker-port + 1, ...), so sessions no longer share one
+GIL. A small Tornado proxy in front of them serves the public port:
+
+- Sticky sessions: a Streamlit session lives in the memory of the worker
+  that created it, so every browser is pinned to one worker with the
+  `hc_worker` cookie. New browsers go to the worker with the fewest open
+  sessions; if their worker dies they are moved to a live one.
+- Plain HTTP requests and the /_stcore/stream websocket are both proxied.
+- Workers that exit are restarted.
+
+Workers share the database, SHARED_CACHE_PATH (hospital search cache and
+Nominatim rate limit, see shared_cache.py), the jobs table and the data
+versions that tell sessions their cached reads are stale; each gets
+HC_WORKER_ID so its background jobs are told apart, and its own metrics
+port (METRICS_PORT + index) when metrics are enabled.
+"""
+import argparse
+import os
+import subprocess
+import sys
+
+import tornado.httpclient
+import tornado.ioloop
+import tornado.web
+import tornado.websocket
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+
+STICKY_COOKIE = 'hc_worker'
+# Headers that belong to one hop and are not forwarded
+HOP_HEADERS = {'connection', 'keep-alive', 'transfer-encoding', 'content-length', 'upgrade', 'te', 'trailer'}
+# Headers the proxy sets by default; the worker's own values replace them
+OWN_HEADERS = {'server', 'date', 'content-type'}
+MAX_BODY_SIZE = 200 * 1024 * 1024  # Streamlit's default upload limit
+RESTART_CHECK_MS = 2000
+
+
+class Worker:
+    def __init__(self, index, port, script, metrics_port):
+        self.index = index
+        self.port = port
+        self.script = script
+        self.metrics_port = metrics_port
+        self.process = None
+        self.sessions = 0
+
+    def start(self):
+        env = dict(os.environ, HC_WORKER_ID=f"worker-{self.index}")
+        env['METRICS_PORT'] = str(self.metrics_port + self.index if self.metrics_port else 0)
+        self.process = subprocess.Popen([
+            sys.executable, "-m", "streamlit", "run", self.script,
+            "--server.port", str(self.port),
+            "--server.address", "127.0.0.1",
+            "--server.headless", "true",
+            "--browser.gatherUsageStats", "false",
+        ], cwd=APP_DIR, env=env)
+
+    @property
+    def alive(self):
+        return self.process is not None and self.process.poll() is None
+
+    def stop(self):
+        if self.alive:
+            self.process.terminate()
+            try:
+                self.process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+
+
+class Cluster:
+    def __init__(self, workers, worker_port, script='app.py', metrics_port=0):
+        self.workers = [Worker(i, worker_port + i, script, metrics_port) for i in range(workers)]
+
+    def start(self):
+        for worker in self.workers:
+            worker.start()
+
+    def stop(self):
+        for worker in self.workers:
+            worker.stop()
+
+    def restart_dead(self):
+        for worker in self.workers:
+            if not worker.alive:
+                print(f"Worker {worker.index} exited, restarting")
+                worker.sessions = 0
+                worker.start()
+
+    def pick(self, handler):
+        """The worker for this request: the sticky one if it is alive, else the least busy"""
+        cookie = handler.get_cookie(STICKY_COOKIE)
+        if cookie is not None and cookie.isdigit() and int(cookie) < len(self.workers):
+            worker = self.workers[int(cookie)]
+            if worker.alive:
+                return worker
+        live = [worker for worker in self.workers if worker.alive] or self.workers
+        worker = min(live, key=lambda worker: worker.sessions)
+        handler.set_cookie(STICKY_COOKIE, str(worker.index), httponly=True, samesite='Lax')
+        return worker
+
+
+def forwarded_headers(request):
+    headers = {name: value for name, value in request.headers.get_all() if name.lower() not in HOP_HEADERS}
+    # location_service reads the client address from here
+    forwarded = request.headers.get('X-Forwarded-For')
+    headers['X-Forwarded-For'] = f"{forwarded}, {request.remote_ip}" if forwarded else request.remote_ip
+    return headers
+
+
+class ProxyHandler(tornado.web.RequestHandler):
+    SUPPORTED_METHODS = ('GET', 'HEAD', 'POST', 'PUT', 'DELETE', 'PATCH', 'OPTIONS')
+
+    def initialize(self, cluster):
+        self.cluster = cluster
+
+    async def _proxy(self):
+        worker = self.cluster.pick(self)
+        request = tornado.httpclient.HTTPRequest(
+            f"http://127.0.0.1:{worker.port}{self.request.uri}",
+            method=self.request.method,
+            headers=forwarded_headers(self.request),
+            body=self.request.body if self.request.method in ('POST', 'PUT', 'PATCH') else None,
+            allow_nonstandard_methods=True,
+            follow_redirects=False,
+            decompress_response=False,
+            request_timeout=300,
+        )
+        response = await tornado.httpclient.AsyncHTTPClient().fetch(request, raise_error=False)
+        if response.code == 599:
+            self.set_status(502)
+            self.finish(f"Worker {worker.index} is not reachable")
+            return
+        self.set_status(response.code, response.reason)
+        for name in OWN_HEADERS:
+            self.clear_header(name)
+        for name, value in response.headers.get_all():
+            if name.lower() not in HOP_HEADERS:
+                self.add_header(name, value)
+        if response.body and self.request.method != 'HEAD':
+            self.write(response.body)
+        self.finish()
+
+    get = head = post = put = delete = patch = options = _proxy
+
+
+class StreamProxyHandler(tornado.websocket.WebSocketHandler):
+    """Relays a session's websocket to its worker"""
+
+    def initialize(self, cluster):
+        self.cluster = cluster
+        self.upstream = None
+        self.worker = None
+        self.subprotocols = []
+
+    def check_origin(self, origin):
+        # The worker checks the origin against the forwarded Host header
+        return True
+
+    def prepare(self):
+        # Picked before the handshake so a new sticky cookie goes out with it
+        self.worker = self.cluster.pick(self)
+
+    def select_subprotocol(self, subprotocols):
+        self.subprotocols = subprotocols
+        return subprotocols[0] if subprotocols else None
+
+    async def open(self):
+        self.worker.sessions += 1
+        headers = {
+            name: value for name, value in forwarded_headers(self.request).items()
+            if not name.lower().startswith('sec-websocket')
+        }
+        request = tornado.httpclient.HTTPRequest(
+            f"ws://127.0.0.1:{self.worker.port}{self.request.uri}", headers=headers
+        )
+        try:
+            self.upstream = await tornado.websocket.websocket_connect(
+                request, on_message_callback=self._from_worker,
+                subprotocols=self.subprotocols or None, max_message_size=MAX_BODY_SIZE
+            )
+        except Exception:
+            self.close(1011, "Worker unavailable")
+
+    def _from_worker(self, message):
+        if message is None:
+            self.close()
+        elif self.ws_connection is not None:
+            self.write_message(message, binary=isinstance(message, bytes))
+
+    def on_message(self, message):
+        if self.upstream is not None:
+            self.upstream.write_message(message, binary=isinstance(message, bytes))
+
+    def on_close(self):
+        if self.worker is not None:
+            self.worker.sessions = max(0, self.worker.sessions - 1)
+            self.worker = None
+        if self.upstream is not None:
+            self.upstream.close()
+            self.upstream = None
+
+
+def make_app(cluster):
+    return tornado.web.Application([
+        (r"/_stcore/stream", StreamProxyHandler, {'cluster': cluster}),
+        (r".*", ProxyHandler, {'cluster': cluster}),
+    ], websocket_max_message_size=MAX_BODY_SIZE)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--port", type=int, default=8501, help="public port of the load balancer")
+    parser.add_argument("--address", default="0.0.0.0")
+    parser.add_argument("--worker-port", type=int, default=8510, help="port of the first worker")
+    parser.add_argument("--script", default="app.py")
+    args = parser.parse_args()
+
+    cluster = Cluster(args.workers, args.worker_port, args.script, int(os.environ.get('METRICS_PORT', '9464')))
+    cluster.start()
+    make_app(cluster).listen(args.port, address=args.address, max_body_size=MAX_BODY_SIZE)
+    tornado.ioloop.PeriodicCallback(cluster.restart_dead, RESTART_CHECK_MS).start()
+    print(f"Load balancer on http://{args.address}:{args.port} -> {args.workers} workers from port {args.worker_port}")
+    try:
+        tornado.ioloop.IOLoop.current().start()
+    finally:
+        cluster.stop()
+
+
+if __name__ == "__main__":
+    main()
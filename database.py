@@ -1,17 +1,104 @@
 # database.py
+import functools
+import os
 import sqlite3
 import hashlib
+import threading
 import streamlit as st
 from datetime import datetime
 
+from analysis_store import analysis_sql, get_store, text_hash
+from metrics import timed
+from query_trace import connect
+
+DB_PATH = os.environ.get('HEALTHCARE_DB_PATH', 'healthcare_app.db')
+
+# History rows saved without an analysis (e.g. imported records): no stored text, or the empty one
+UNANALYZED_SQL = '''
+    symptoms IS NOT NULL AND symptoms != ''
+    AND (analysis_id IS NULL AND COALESCE(suggested_conditions, '') = ''
+         OR analysis_id IN (SELECT id FROM analysis_texts WHERE hash = ?))
+    AND user_id NOT IN (SELECT id FROM users WHERE deleted_at IS NOT NULL)
+'''
+
+# Rows of each table that still belong to an account; tombstoned users and their data are left out
+LIVE_ROWS_SQL = {
+    'users': "deleted_at IS NULL",
+    'symptom_history': "user_id NOT IN (SELECT id FROM users WHERE deleted_at IS NOT NULL)",
+    'user_profiles': "user_id NOT IN (SELECT id FROM users WHERE deleted_at IS NOT NULL)",
+}
+
+# Bumps one (username, section) data version; the global one is ('', '')
+BUMP_VERSION_SQL = '''
+    INSERT INTO data_versions (username, section, version) VALUES (?, ?, 1)
+    ON CONFLICT (username, section) DO UPDATE SET version = version + 1
+'''
+
+
+def version_bumps(usernames, *sections):
+    """BUMP_VERSION_SQL parameters for a write touching these users' sections"""
+    return [(username, section) for username in usernames for section in sections] + [('', '')]
+
+
+def writes(method):
+    """Run a UserDatabase method holding its write lock.
+
+    Every thread shares one connection, and so one transaction: without the
+    lock a rollback in one thread could discard another's insert, or a commit
+    could publish another thread's half-written batch.
+    """
+    @functools.wraps(method)
+    def locked(self, *args, **kwargs):
+        with self._write_lock:
+            return method(self, *args, **kwargs)
+    return locked
+
+
 class UserDatabase:
-    def __init__(self):
-        self.conn = sqlite3.connect('healthcare_app.db', check_same_thread=False)
-        self.create_tables()
+    def __init__(self, db_path=DB_PATH):
+        self.db_path = db_path
+        # The connection is opened and the schema verified on first use, not at import
+        self._conn = None
+        self._ready = False
+        self._conn_lock = threading.Lock()
+        # Held from a write's first statement to its commit or rollback; see writes()
+        self._write_lock = threading.RLock()
+        # AI analyses are stored compressed and deduplicated (see analysis_store.py)
+        self.analysis_store = get_store(db_path)
+    
+    @property
+    def conn(self):
+        if not self._ready:
+            with self._conn_lock:
+                if not self._ready:
+                    self._conn = connect(self.db_path, check_same_thread=False)
+                    self.create_tables()
+                    self._ready = True
+        return self._conn
+    
+    def data_version(self, username=None, section=None):
+        """Current data version of one user's section, or the global version if username is None"""
+        cursor = self.conn.cursor()
+        cursor.execute(
+            "SELECT version FROM data_versions WHERE username = ? AND section = ?",
+            ('', '') if username is None else (username, section)
+        )
+        row = cursor.fetchone()
+        return row[0] if row else 0
+    
+    def _bump_version(self, username, *sections):
+        """Bump the versions of the sections a write touched, and the global version.
+
+        They live in the database, so a write in any process (see cluster.py)
+        makes every process's cached copies stale.
+        """
+        with self._write_lock:
+            self.conn.executemany(BUMP_VERSION_SQL, version_bumps([username], *sections))
+            self.conn.commit()
     
     def create_tables(self):
         """Create necessary tables if they don't exist"""
-        cursor = self.conn.cursor()
+        cursor = self._conn.cursor()
         
         # Users table
         cursor.execute('''
@@ -38,6 +125,59 @@ class UserDatabase:
             )
         ''')
         
+        # Columns added after the first release
+        cursor.execute("PRAGMA table_info(symptom_history)")
+        history_columns = [column[1] for column in cursor.fetchall()]
+        if 'language' not in history_columns:
+            cursor.execute("ALTER TABLE symptom_history ADD COLUMN language TEXT")
+        cursor.execute("PRAGMA table_info(users)")
+        user_columns = [column[1] for column in cursor.fetchall()]
+        if 'deleted_at' not in user_columns:
+            # Tombstone set by deletion.DeletionEngine until the user's rows are purged
+            cursor.execute("ALTER TABLE users ADD COLUMN deleted_at TIMESTAMP")
+        
+        # Per-user lookups and batched purges of symptom history
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_symptom_history_user ON symptom_history (user_id)")
+        
+        # Compressed, deduplicated AI analyses; new rows reference them instead of
+        # storing the text in suggested_conditions
+        if 'analysis_id' not in history_columns:
+            cursor.execute("ALTER TABLE symptom_history ADD COLUMN analysis_id INTEGER")
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS analysis_texts (
+                id INTEGER PRIMARY KEY,
+                hash BLOB UNIQUE NOT NULL,
+                body BLOB NOT NULL
+            )
+        ''')
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS compression_dicts (
+                id INTEGER PRIMARY KEY,
+                dict BLOB NOT NULL,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_symptom_history_analysis ON symptom_history (analysis_id)")
+        
+        # History pages are read per user, newest first
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_symptom_history_user_created ON symptom_history (user_id, created_at)")
+        
+        # A repeated submission (rerun, double click, retried API call) is saved once
+        if 'submission_key' not in history_columns:
+            cursor.execute("ALTER TABLE symptom_history ADD COLUMN submission_key TEXT")
+        cursor.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_symptom_history_submission ON symptom_history (submission_key)")
+        
+        # Bumped by every write so readers can tell whether cached data is stale;
+        # per (user, section), plus the global version for admin-wide views under ('', '')
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS data_versions (
+                username TEXT NOT NULL,
+                section TEXT NOT NULL,
+                version INTEGER NOT NULL,
+                PRIMARY KEY (username, section)
+            ) WITHOUT ROWID
+        ''')
+        
         # User profiles table
         cursor.execute('''
             CREATE TABLE IF NOT EXISTS user_profiles (
@@ -53,30 +193,46 @@ class UserDatabase:
             )
         ''')
         
-        self.conn.commit()
+        self._conn.commit()
         print("Database tables created/verified successfully")
     
+    @timed('db.create_user')
+    @writes
     def create_user(self, username, password, email=""):
-        """Create new user"""
+        """Create new user; a deleted account's name is freed by purging what is left of it"""
         try:
             cursor = self.conn.cursor()
-            cursor.execute(
-                "INSERT INTO users (username, password_hash, email) VALUES (?, ?, ?)",
-                (username, hashlib.sha256(password.encode()).hexdigest(), email)
-            )
+            try:
+                cursor.execute(
+                    "INSERT INTO users (username, password_hash, email) VALUES (?, ?, ?)",
+                    (username, hashlib.sha256(password.encode()).hexdigest(), email)
+                )
+            except sqlite3.IntegrityError:
+                self.conn.rollback()
+                from deletion import DeletionEngine
+                if not DeletionEngine(self.db_path).purge([username]):
+                    raise
+                cursor.execute(
+                    "INSERT INTO users (username, password_hash, email) VALUES (?, ?, ?)",
+                    (username, hashlib.sha256(password.encode()).hexdigest(), email)
+                )
             self.conn.commit()
+            self._bump_version(username)
             return True, "User created successfully"
         except sqlite3.IntegrityError:
+            self.conn.rollback()
             return False, "Username already exists"
         except Exception as e:
+            self.conn.rollback()
             return False, f"Error creating user: {str(e)}"
     
+    @timed('db.authenticate_user')
     def authenticate_user(self, username, password):
         """Authenticate user"""
         try:
             cursor = self.conn.cursor()
             cursor.execute(
-                "SELECT password_hash FROM users WHERE username = ?", 
+                "SELECT password_hash FROM users WHERE username = ? AND deleted_at IS NULL", 
                 (username,)
             )
             result = cursor.fetchone()
@@ -87,37 +243,99 @@ class UserDatabase:
         except Exception as e:
             return False, f"Authentication error: {str(e)}"
     
-    def save_symptom_history(self, username, symptoms, severity, conditions, location):
-        """Save symptom search history"""
+    @timed('db.save_symptom_history')
+    @writes
+    def save_symptom_history(self, username, symptoms, severity, conditions, location, language=None,
+                             submission_key=None, submission_window=None):
+        """Save symptom search history.
+        
+        A row whose submission_key is already saved is not saved again; that
+        still counts as success. With submission_window, keys have the form
+        "<submission>:<suffix>" and a row is also not saved when one of the same
+        submission was saved in the last submission_window seconds, whatever
+        its suffix.
+        """
         try:
             cursor = self.conn.cursor()
-            cursor.execute("SELECT id FROM users WHERE username = ?", (username,))
+            cursor.execute("SELECT id FROM users WHERE username = ? AND deleted_at IS NULL", (username,))
             user_result = cursor.fetchone()
             
             if user_result:
                 user_id = user_result[0]
+                # Takes the write lock, so the check below can't race another process's save
+                analysis_id = self.analysis_store.store(cursor, conditions or "")
+                if submission_key and submission_window:
+                    # ':' + 1 == ';', so this is every key of the submission, through the unique index
+                    submission = submission_key.rsplit(':', 1)[0]
+                    cursor.execute('''
+                        SELECT 1 FROM symptom_history
+                        WHERE submission_key > ? AND submission_key < ?
+                          AND created_at >= datetime('now', ?)
+                        LIMIT 1
+                    ''', (submission + ':', submission + ';', f"-{int(submission_window)} seconds"))
+                    if cursor.fetchone():
+                        self.conn.commit()
+                        return True
                 cursor.execute('''
                     INSERT INTO symptom_history 
-                    (user_id, symptoms, severity, suggested_conditions, location_searched) 
-                    VALUES (?, ?, ?, ?, ?)
-                ''', (user_id, symptoms, severity, conditions, location))
+                    (user_id, symptoms, severity, analysis_id, location_searched, language, submission_key) 
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                    ON CONFLICT (submission_key) DO NOTHING
+                ''', (user_id, symptoms, severity, analysis_id, location, language, submission_key))
+                inserted = cursor.rowcount
                 self.conn.commit()
+                if inserted:
+                    self._bump_version(username, 'symptom_history')
                 return True
             return False
         except Exception as e:
+            self.conn.rollback()
             st.error(f"Error saving symptom history: {e}")
             return False
     
+    @timed('db.save_symptom_histories')
+    @writes
+    def save_symptom_histories(self, username, entries):
+        """Save many searches of one user in one transaction; returns how many were saved.
+        
+        entries are (symptoms, severity, conditions, location, language) tuples.
+        """
+        try:
+            cursor = self.conn.cursor()
+            cursor.execute("SELECT id FROM users WHERE username = ? AND deleted_at IS NULL", (username,))
+            user_result = cursor.fetchone()
+            if not user_result or not entries:
+                return 0
+            user_id = user_result[0]
+            rows = [
+                (user_id, symptoms, severity, self.analysis_store.store(cursor, conditions or ""), location, language)
+                for symptoms, severity, conditions, location, language in entries
+            ]
+            cursor.executemany('''
+                INSERT INTO symptom_history 
+                (user_id, symptoms, severity, analysis_id, location_searched, language) 
+                VALUES (?, ?, ?, ?, ?, ?)
+            ''', rows)
+            self.conn.commit()
+            self._bump_version(username, 'symptom_history')
+            return len(rows)
+        except Exception as e:
+            self.conn.rollback()
+            st.error(f"Error saving symptom history: {e}")
+            return 0
+    
+    @timed('db.get_symptom_history')
     def get_symptom_history(self, username):
         """Get user's symptom history"""
         try:
             cursor = self.conn.cursor()
-            cursor.execute('''
-                SELECT sh.symptoms, sh.severity, sh.suggested_conditions, 
+            # The analysis comes back still compressed; analysis_store.decode() reads it
+            cursor.execute(f'''
+                SELECT sh.symptoms, sh.severity, {analysis_sql('sh')}, 
                        sh.location_searched, sh.created_at
                 FROM symptom_history sh
                 JOIN users u ON sh.user_id = u.id
-                WHERE u.username = ?
+                WHERE u.username = ? AND u.deleted_at IS NULL
                 ORDER BY sh.created_at DESC
                 LIMIT 10
             ''', (username,))
@@ -126,12 +344,148 @@ class UserDatabase:
             st.error(f"Error fetching history: {e}")
             return []
     
+    @timed('db.get_symptom_history_page')
+    def get_symptom_history_page(self, username, page=0, page_size=10):
+        """Get one page of a user's history without the analyses.
+        
+        Returns (rows, total) where rows are (id, symptoms, severity,
+        location_searched, created_at), newest first; fetch an analysis
+        with get_history_analysis when it is shown.
+        """
+        try:
+            cursor = self.conn.cursor()
+            cursor.execute('''
+                SELECT COUNT(*) FROM symptom_history sh
+                JOIN users u ON sh.user_id = u.id
+                WHERE u.username = ? AND u.deleted_at IS NULL
+            ''', (username,))
+            total = cursor.fetchone()[0]
+            cursor.execute('''
+                SELECT sh.id, sh.symptoms, sh.severity, sh.location_searched, sh.created_at
+                FROM symptom_history sh
+                JOIN users u ON sh.user_id = u.id
+                WHERE u.username = ? AND u.deleted_at IS NULL
+                ORDER BY sh.created_at DESC, sh.id DESC
+                LIMIT ? OFFSET ?
+            ''', (username, page_size, page * page_size))
+            return cursor.fetchall(), total
+        except Exception as e:
+            st.error(f"Error fetching history: {e}")
+            return [], 0
+    
+    @timed('db.get_history_analysis')
+    def get_history_analysis(self, username, history_id):
+        """Get the AI analysis of one of a user's history rows, or None"""
+        try:
+            cursor = self.conn.cursor()
+            cursor.execute(f'''
+                SELECT {analysis_sql('sh')}
+                FROM symptom_history sh
+                JOIN users u ON sh.user_id = u.id
+                WHERE sh.id = ? AND u.username = ? AND u.deleted_at IS NULL
+            ''', (history_id, username))
+            result = cursor.fetchone()
+            return self.analysis_store.decode(result[0]) if result else None
+        except Exception as e:
+            st.error(f"Error fetching analysis: {e}")
+            return None
+    
+    @timed('db.get_analyses_since')
+    def get_analyses_since(self, last_id, marker, limit=10000):
+        """Get the newest (id, symptoms, language) rows after last_id whose analysis contains marker"""
+        try:
+            cursor = self.conn.cursor()
+            # Compressed analyses can't be searched in SQL, so the marker is checked after decoding
+            cursor.execute(f'''
+                SELECT id, symptoms, language, {analysis_sql()} FROM symptom_history
+                WHERE id > ? AND language IS NOT NULL
+                  AND (analysis_id IS NOT NULL OR suggested_conditions IS NOT NULL)
+                  AND user_id NOT IN (SELECT id FROM users WHERE deleted_at IS NOT NULL)
+                ORDER BY id DESC
+            ''', (last_id,))
+            rows = []
+            for history_id, symptoms, language, analysis in cursor:
+                if marker in self.analysis_store.decode(analysis):
+                    rows.append((history_id, symptoms, language))
+                    if len(rows) >= limit:
+                        break
+            return rows[::-1]
+        except Exception as e:
+            st.error(f"Error fetching past analyses: {e}")
+            return []
+    
+    @timed('db.get_analysis_text')
+    def get_analysis_text(self, history_id):
+        """Get the stored AI analysis for one symptom history row"""
+        try:
+            cursor = self.conn.cursor()
+            cursor.execute(
+                f"SELECT {analysis_sql()} FROM symptom_history WHERE id = ?",
+                (history_id,)
+            )
+            result = cursor.fetchone()
+            return self.analysis_store.decode(result[0]) if result else None
+        except Exception as e:
+            st.error(f"Error fetching analysis: {e}")
+            return None
+    
+    @timed('db.get_unanalyzed_history')
+    def get_unanalyzed_history(self, after_id=0, limit=500):
+        """Get (id, symptoms, language) of history rows after after_id that have no analysis yet"""
+        try:
+            cursor = self.conn.cursor()
+            cursor.execute(f'''
+                SELECT id, symptoms, language FROM symptom_history
+                WHERE id > ? AND {UNANALYZED_SQL}
+                ORDER BY id LIMIT ?
+            ''', (after_id, text_hash(""), limit))
+            return cursor.fetchall()
+        except Exception as e:
+            st.error(f"Error fetching history: {e}")
+            return []
+    
+    def count_unanalyzed_history(self):
+        cursor = self.conn.cursor()
+        cursor.execute(f"SELECT COUNT(*) FROM symptom_history WHERE {UNANALYZED_SQL}", (text_hash(""),))
+        return cursor.fetchone()[0]
+    
+    @timed('db.set_history_analyses')
+    @writes
+    def set_history_analyses(self, analyses):
+        """Store analyses of existing history rows, given as (history_id, text), in one transaction"""
+        if not analyses:
+            return 0
+        try:
+            cursor = self.conn.cursor()
+            updates = [(self.analysis_store.store(cursor, text), history_id) for history_id, text in analyses]
+            cursor.executemany(
+                "UPDATE symptom_history SET analysis_id = ?, suggested_conditions = NULL WHERE id = ?",
+                updates
+            )
+            placeholders = ", ".join("?" * len(updates))
+            cursor.execute(f'''
+                SELECT DISTINCT u.username FROM users u
+                JOIN symptom_history sh ON sh.user_id = u.id
+                WHERE sh.id IN ({placeholders})
+            ''', [history_id for _, history_id in updates])
+            usernames = [row[0] for row in cursor.fetchall()]
+            self.conn.commit()
+            for username in usernames:
+                self._bump_version(username, 'symptom_history')
+            return len(updates)
+        except Exception as e:
+            self.conn.rollback()
+            st.error(f"Error saving analyses: {e}")
+            return 0
+    
+    @timed('db.update_user_profile')
+    @writes
     def update_user_profile(self, username, age=None, blood_type=None, allergies=None, 
                           chronic_conditions=None, emergency_contact=None):
         """Update or create user profile"""
         try:
             cursor = self.conn.cursor()
-            cursor.execute("SELECT id FROM users WHERE username = ?", (username,))
+            cursor.execute("SELECT id FROM users WHERE username = ? AND deleted_at IS NULL", (username,))
             user_result = cursor.fetchone()
             
             if user_result:
@@ -142,12 +496,15 @@ class UserDatabase:
                     VALUES (?, ?, ?, ?, ?, ?)
                 ''', (user_id, age, blood_type, allergies, chronic_conditions, emergency_contact))
                 self.conn.commit()
+                self._bump_version(username, 'user_profile')
                 return True
             return False
         except Exception as e:
+            self.conn.rollback()
             st.error(f"Error updating profile: {e}")
             return False
     
+    @timed('db.get_user_profile')
     def get_user_profile(self, username):
         """Get user profile"""
         try:
@@ -156,18 +513,19 @@ class UserDatabase:
                 SELECT up.age, up.blood_type, up.allergies, up.chronic_conditions, up.emergency_contact
                 FROM user_profiles up
                 JOIN users u ON up.user_id = u.id
-                WHERE u.username = ?
+                WHERE u.username = ? AND u.deleted_at IS NULL
             ''', (username,))
             return cursor.fetchone()
         except Exception as e:
             st.error(f"Error fetching profile: {e}")
             return None
     
+    @timed('db.user_exists')
     def user_exists(self, username):
         """Check if user exists"""
         try:
             cursor = self.conn.cursor()
-            cursor.execute("SELECT id FROM users WHERE username = ?", (username,))
+            cursor.execute("SELECT id FROM users WHERE username = ? AND deleted_at IS NULL", (username,))
             return cursor.fetchone() is not None
         except Exception as e:
             st.error(f"Error checking user: {e}")
@@ -175,16 +533,18 @@ class UserDatabase:
 
     # --- NEW METHODS ADDED FOR DATABASE VERIFICATION ---
 
+    @timed('db.get_all_users')
     def get_all_users(self):
         """Get all users (for admin purposes)"""
         try:
             cursor = self.conn.cursor()
-            cursor.execute("SELECT username, email, created_at FROM users")
+            cursor.execute("SELECT username, email, created_at FROM users WHERE deleted_at IS NULL")
             return cursor.fetchall()
         except Exception as e:
             st.error(f"Error getting users: {e}")
             return []
 
+    @timed('db.get_database_stats')
     def get_database_stats(self):
         """Get comprehensive database statistics"""
         try:
@@ -192,22 +552,21 @@ class UserDatabase:
             stats = {}
             
             # Table counts
-            tables = ['users', 'symptom_history', 'user_profiles']
-            for table in tables:
-                cursor.execute(f"SELECT COUNT(*) FROM {table}")
+            for table, live in LIVE_ROWS_SQL.items():
+                cursor.execute(f"SELECT COUNT(*) FROM {table} WHERE {live}")
                 stats[f'{table}_count'] = cursor.fetchone()[0]
             
             # Recent activity (last 24 hours)
-            cursor.execute('''
+            cursor.execute(f'''
                 SELECT COUNT(*) FROM symptom_history 
-                WHERE datetime(created_at) >= datetime('now', '-1 day')
+                WHERE datetime(created_at) >= datetime('now', '-1 day') AND {LIVE_ROWS_SQL['symptom_history']}
             ''')
             stats['recent_searches'] = cursor.fetchone()[0]
             
             # User registration trends (last 7 days)
             cursor.execute('''
                 SELECT COUNT(*) FROM users 
-                WHERE datetime(created_at) >= datetime('now', '-7 days')
+                WHERE datetime(created_at) >= datetime('now', '-7 days') AND deleted_at IS NULL
             ''')
             stats['recent_users'] = cursor.fetchone()[0]
             
@@ -245,13 +604,14 @@ class UserDatabase:
             print(f"Debug error: {e}")
             return False
 
+    @timed('db.export_user_data')
     def export_user_data(self, username, format='json'):
         """Export all user data for GDPR compliance"""
         try:
             cursor = self.conn.cursor()
             
             # Get user ID
-            cursor.execute("SELECT id FROM users WHERE username = ?", (username,))
+            cursor.execute("SELECT id FROM users WHERE username = ? AND deleted_at IS NULL", (username,))
             user_result = cursor.fetchone()
             
             if not user_result:
@@ -276,19 +636,15 @@ class UserDatabase:
                     'created_at': user_info[2]
                 }
             
-            # Symptom history
-            cursor.execute('''
-                SELECT symptoms, severity, suggested_conditions, location_searched, created_at
-                FROM symptom_history WHERE user_id = ? ORDER BY created_at DESC
-            ''', (user_id,))
-            symptom_history = cursor.fetchall()
-            for record in symptom_history:
+            # Symptom history, including rows moved to the monthly archives
+            from retention import HistoryArchive
+            for record in HistoryArchive(self.db_path).user_history(username):
                 user_data['symptom_history'].append({
-                    'symptoms': record[0],
-                    'severity': record[1],
-                    'suggested_conditions': record[2],
-                    'location_searched': record[3],
-                    'created_at': record[4]
+                    'symptoms': record['symptoms'],
+                    'severity': record['severity'],
+                    'suggested_conditions': record['suggested_conditions'],
+                    'location_searched': record['location_searched'],
+                    'created_at': record['created_at']
                 })
             
             # User profile
@@ -316,26 +672,23 @@ class UserDatabase:
             st.error(f"Error exporting user data: {e}")
             return None
 
-    def delete_user_data(self, username):
-        """Delete all user data (GDPR compliance)"""
+    @timed('db.delete_user_data')
+    def delete_user_data(self, username, soft=False, progress=None):
+        """Delete all user data (GDPR compliance)
+
+        The user is tombstoned at once and their rows are then removed in small
+        batches (see deletion.py); with soft=True the purge is left for later.
+        """
+        from deletion import DeletionEngine
+        
         try:
-            cursor = self.conn.cursor()
-            
-            # Get user ID
-            cursor.execute("SELECT id FROM users WHERE username = ?", (username,))
-            user_result = cursor.fetchone()
-            
-            if not user_result:
+            engine = DeletionEngine(self.db_path)
+            if not engine.soft_delete([username]):
                 return False, "User not found"
-            
-            user_id = user_result[0]
-            
-            # Delete user data (in correct order due to foreign keys)
-            cursor.execute("DELETE FROM symptom_history WHERE user_id = ?", (user_id,))
-            cursor.execute("DELETE FROM user_profiles WHERE user_id = ?", (user_id,))
-            cursor.execute("DELETE FROM users WHERE id = ?", (user_id,))
-            
-            self.conn.commit()
+            self._bump_version(username, 'symptom_history', 'user_profile')
+            if soft:
+                return True, "User data marked for deletion"
+            engine.purge([username], progress)
             return True, "User data deleted successfully"
             
         except Exception as e:
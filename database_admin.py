@@ -1,15 +1,48 @@
 # database_admin.py
+import csv
+import io
 import sqlite3
 import streamlit as st
 from datetime import datetime
 
+from analysis_store import analysis_sql, get_store
+from database import DB_PATH, LIVE_ROWS_SQL
+from metrics import timed
+from query_trace import connect
+
+EXPORTABLE_TABLES = ['users', 'symptom_history', 'user_profiles']
+
 class DatabaseAdmin:
-    def __init__(self, db_path='healthcare_app.db'):
+    def __init__(self, db_path=DB_PATH):
         self.db_path = db_path
     
     def get_connection(self):
-        return sqlite3.connect(self.db_path, check_same_thread=False)
+        return connect(self.db_path, check_same_thread=False)
+    
+    def _select_all(self, cursor, table_name):
+        """SELECT * for a table's live rows, with symptom_history analyses read from analysis_texts"""
+        where = f" WHERE {LIVE_ROWS_SQL[table_name]}" if table_name in LIVE_ROWS_SQL else ""
+        if table_name != 'symptom_history':
+            return f"SELECT * FROM {table_name}{where}"
+        cursor.execute(f"PRAGMA table_info({table_name})")
+        columns = [
+            f"{analysis_sql()} AS suggested_conditions" if row[1] == 'suggested_conditions' else row[1]
+            for row in cursor.fetchall()
+        ]
+        return f"SELECT {', '.join(columns)} FROM {table_name}{where}"
+    
+    def _decode_rows(self, columns, rows):
+        """Decompress the analyses in symptom_history rows"""
+        if 'suggested_conditions' not in columns:
+            return rows
+        index = columns.index('suggested_conditions')
+        store = get_store(self.db_path)
+        return [
+            (*row[:index], store.decode(row[index]) if row[index] is not None else None, *row[index + 1:])
+            for row in rows
+        ]
     
+    @timed('db_admin.get_database_stats')
     def get_database_stats(self):
         """Get comprehensive database statistics"""
         conn = self.get_connection()
@@ -18,49 +51,51 @@ class DatabaseAdmin:
         stats = {}
         
         # Table counts
-        tables = ['users', 'symptom_history', 'user_profiles']
-        for table in tables:
-            cursor.execute(f"SELECT COUNT(*) FROM {table}")
+        for table, live in LIVE_ROWS_SQL.items():
+            cursor.execute(f"SELECT COUNT(*) FROM {table} WHERE {live}")
             stats[f'{table}_count'] = cursor.fetchone()[0]
         
         # Recent activity
-        cursor.execute('''
+        cursor.execute(f'''
             SELECT COUNT(*) FROM symptom_history 
-            WHERE date(created_at) = date('now')
+            WHERE date(created_at) = date('now') AND {LIVE_ROWS_SQL['symptom_history']}
         ''')
         stats['today_searches'] = cursor.fetchone()[0]
         
         # User registration trends
         cursor.execute('''
             SELECT COUNT(*) FROM users 
-            WHERE date(created_at) >= date('now', '-7 days')
+            WHERE date(created_at) >= date('now', '-7 days') AND deleted_at IS NULL
         ''')
         stats['recent_users'] = cursor.fetchone()[0]
         
         conn.close()
         return stats
     
+    @timed('db_admin.get_all_data')
     def get_all_data(self, table_name):
         """Get all data from a specific table"""
         conn = self.get_connection()
         cursor = conn.cursor()
         
-        cursor.execute(f"SELECT * FROM {table_name}")
+        cursor.execute(self._select_all(cursor, table_name))
         columns = [description[0] for description in cursor.description]
-        data = cursor.fetchall()
+        data = self._decode_rows(columns, cursor.fetchall())
         
         conn.close()
         return columns, data
     
+    @timed('db_admin.export_data')
     def export_data(self, table_name, format='csv'):
         """Export table data to different formats"""
         columns, data = self.get_all_data(table_name)
         
         if format == 'csv':
-            csv_content = ",".join(columns) + "\n"
-            for row in data:
-                csv_content += ",".join(str(cell) for cell in row) + "\n"
-            return csv_content
+            output = io.StringIO()
+            writer = csv.writer(output, lineterminator="\n")
+            writer.writerow(columns)
+            writer.writerows(data)
+            return output.getvalue()
         elif format == 'json':
             import json
             json_data = []
@@ -68,6 +103,67 @@ class DatabaseAdmin:
                 json_data.append(dict(zip(columns, row)))
             return json.dumps(json_data, indent=2, default=str)
     
+    @timed('db_admin.export_to_file')
+    def export_to_file(self, table_name, path, format='csv', progress=None, batch_size=1000):
+        """Stream a table export to `path` in batches, calling progress(done, total)"""
+        if table_name not in EXPORTABLE_TABLES:
+            raise ValueError(f"Unknown table: {table_name}")
+        import json
+        
+        conn = self.get_connection()
+        try:
+            cursor = conn.cursor()
+            cursor.execute(f"SELECT COUNT(*) FROM {table_name} WHERE {LIVE_ROWS_SQL[table_name]}")
+            total = cursor.fetchone()[0]
+            cursor.execute(self._select_all(cursor, table_name))
+            columns = [description[0] for description in cursor.description]
+            done = 0
+            
+            # newline='' lets csv.writer quote newlines inside cells itself
+            with open(path, 'w', encoding='utf-8', newline='') as f:
+                writer = csv.writer(f, lineterminator="\n")
+                if format == 'csv':
+                    writer.writerow(columns)
+                else:
+                    f.write("[")
+                while True:
+                    rows = cursor.fetchmany(batch_size)
+                    if not rows:
+                        break
+                    rows = self._decode_rows(columns, rows)
+                    if format == 'csv':
+                        writer.writerows(rows)
+                        done += len(rows)
+                    else:
+                        for row in rows:
+                            f.write(("," if done else "") + "\n  ")
+                            f.write(json.dumps(dict(zip(columns, row)), default=str))
+                            done += 1
+                    if progress:
+                        progress(done, total)
+                if format != 'csv':
+                    f.write("\n]\n")
+            return done
+        finally:
+            conn.close()
+    
+    @timed('db_admin.backup_to_file')
+    def backup_to_file(self, path, progress=None, pages=256):
+        """Copy the database to `path` with SQLite's online backup, a few pages at a time"""
+        source = self.get_connection()
+        target = sqlite3.connect(path)
+        try:
+            # Copying in steps lets writers in between instead of locking them out for the whole copy
+            source.backup(
+                target, pages=pages,
+                progress=(lambda status, remaining, total: progress(total - remaining, total)) if progress else None
+            )
+        finally:
+            target.close()
+            source.close()
+        return path
+    
+    @timed('db_admin.backup_database')
     def backup_database(self):
         """Create a backup of the database"""
         import shutil
@@ -82,6 +178,7 @@ def show_admin_panel():
     """Show admin panel in the main app"""
     st.markdown("---")
     st.subheader("🔧 Database Administration")
+    from health_connect.pages.jobs import jobs_panel, submit_job
     
     admin = DatabaseAdmin()
     
@@ -129,24 +226,19 @@ def show_admin_panel():
         
         # Export Options
         st.markdown("### 📤 Export Data")
-        export_table = st.selectbox("Select Table to Export", 
-                                  ['users', 'symptom_history', 'user_profiles'])
+        export_table = st.selectbox("Select Table to Export", EXPORTABLE_TABLES)
         export_format = st.radio("Export Format", ['csv', 'json'])
         
         if st.button("Export Data"):
-            exported_data = admin.export_data(export_table, export_format)
-            st.download_button(
-                label=f"Download {export_table}.{export_format}",
-                data=exported_data,
-                file_name=f"{export_table}.{export_format}",
-                mime="text/csv" if export_format == 'csv' else "application/json"
-            )
+            submit_job('export_table', {'table_name': export_table, 'format': export_format})
         
         # Backup Options
         st.markdown("### 💾 Backup Database")
         if st.button("Create Backup", type="primary"):
-            backup_file = admin.backup_database()
-            st.success(f"Backup created: {backup_file}")
+            submit_job('backup_database')
+        
+        # Exports and backups run in the background; results are downloaded from here
+        jobs_panel()
     
     elif admin_password and admin_password != "admin123":
         st.error("❌ Incorrect admin password")
\ No newline at end of file
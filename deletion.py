@@ -0,0 +1,180 @@
+# deletion.py
+"""
+Batched deletion of user data.
+
+Deleting a user is two steps. First the user row is tombstoned
+(users.deleted_at), which hides the account and its data from every read
+path at once in one tiny transaction. Then the purge removes the
+tombstoned users' rows a bounded batch at a time, each batch in its own
+short transaction with a pause in between, so other sessions' writes are
+never blocked for long. compact() returns the freed pages to the OS
+afterwards. A tombstoned username can be registered again: create_user
+purges what is left of the old account first.
+"""
+import time
+
+from database import DB_PATH
+from metrics import timed
+from query_trace import connect
+from retention import HistoryArchive
+
+BATCH_SIZE = 500
+# Pause between batches so waiting writers get the lock; it has to outlast the
+# growing sleeps of SQLite's busy handler, or waiters keep missing the gap
+BATCH_PAUSE = 0.02
+# Pages freed per incremental vacuum step
+VACUUM_PAGES = 1000
+
+
+class DeletionEngine:
+    def __init__(self, db_path=DB_PATH, batch_size=BATCH_SIZE, pause=BATCH_PAUSE):
+        self.db_path = db_path
+        self.batch_size = batch_size
+        self.pause = pause
+
+    def get_connection(self):
+        # Autocommit: every transaction below is opened explicitly and kept short
+        return connect(self.db_path, check_same_thread=False, timeout=30, isolation_level=None)
+
+    @timed('deletion.soft_delete')
+    def soft_delete(self, usernames):
+        """Tombstone the given users; returns the usernames that were tombstoned"""
+        conn = self.get_connection()
+        try:
+            cursor = conn.cursor()
+            cursor.execute("BEGIN IMMEDIATE")
+            deleted = []
+            for username in usernames:
+                cursor.execute(
+                    "UPDATE users SET deleted_at = CURRENT_TIMESTAMP WHERE username = ? AND deleted_at IS NULL",
+                    (username,)
+                )
+                if cursor.rowcount:
+                    deleted.append(username)
+            cursor.execute("COMMIT")
+            return deleted
+        finally:
+            conn.close()
+
+    def pending_purge(self):
+        """Usernames that are tombstoned but not yet purged"""
+        conn = self.get_connection()
+        try:
+            cursor = conn.cursor()
+            cursor.execute("SELECT username FROM users WHERE deleted_at IS NOT NULL ORDER BY deleted_at")
+            return [row[0] for row in cursor.fetchall()]
+        finally:
+            conn.close()
+
+    @timed('deletion.purge')
+    def purge(self, usernames=None, progress=None):
+        """Remove the rows of tombstoned users (all of them, or just `usernames`) in batches.
+
+        progress(done, total) is called after every batch and may raise to stop;
+        a stopped purge simply continues on the next call. Returns the number
+        of users purged.
+        """
+        conn = self.get_connection()
+        try:
+            cursor = conn.cursor()
+            cursor.execute("CREATE TEMP TABLE IF NOT EXISTS purge_users (user_id INTEGER PRIMARY KEY)")
+            cursor.execute("DELETE FROM purge_users")
+            if usernames is None:
+                cursor.execute("INSERT INTO purge_users SELECT id FROM users WHERE deleted_at IS NOT NULL")
+            else:
+                cursor.executemany(
+                    "INSERT OR IGNORE INTO purge_users SELECT id FROM users WHERE username = ? AND deleted_at IS NOT NULL",
+                    [(username,) for username in usernames]
+                )
+            cursor.execute("SELECT COUNT(*) FROM purge_users")
+            user_count = cursor.fetchone()[0]
+            if not user_count:
+                return 0
+            cursor.execute(
+                "SELECT COUNT(*) FROM symptom_history WHERE user_id IN (SELECT user_id FROM purge_users)"
+            )
+            total = cursor.fetchone()[0] + user_count
+            done = 0
+
+            while True:
+                cursor.execute("BEGIN IMMEDIATE")
+                cursor.execute('''
+                    DELETE FROM symptom_history WHERE id IN (
+                        SELECT id FROM symptom_history
+                        WHERE user_id IN (SELECT user_id FROM purge_users)
+                        LIMIT ?
+                    )
+                ''', (self.batch_size,))
+                deleted = cursor.rowcount
+                cursor.execute("COMMIT")
+                done += deleted
+                if progress:
+                    progress(done, total)
+                if deleted < self.batch_size:
+                    break
+                time.sleep(self.pause)
+
+            cursor.execute("SELECT user_id FROM purge_users")
+            user_ids = [row[0] for row in cursor.fetchall()]
+            # Archived history goes before the user rows, while the ids still identify the users
+            HistoryArchive(self.db_path).purge_users(user_ids)
+
+            # What is left per user is a profile and the user row itself
+            for start in range(0, len(user_ids), self.batch_size):
+                batch = [(user_id,) for user_id in user_ids[start:start + self.batch_size]]
+                cursor.execute("BEGIN IMMEDIATE")
+                cursor.executemany("DELETE FROM user_profiles WHERE user_id = ?", batch)
+                cursor.executemany("DELETE FROM users WHERE id = ?", batch)
+                cursor.execute("COMMIT")
+                done += len(batch)
+                if progress:
+                    progress(done, total)
+                time.sleep(self.pause)
+            return user_count
+        except BaseException:
+            if conn.in_transaction:
+                conn.rollback()
+            raise
+        finally:
+            conn.close()
+
+    def delete_users(self, usernames, soft=False, progress=None):
+        """Tombstone `usernames` and, unless soft, purge their data right away"""
+        deleted = self.soft_delete(usernames)
+        if deleted and not soft:
+            self.purge(deleted, progress)
+        return deleted
+
+    @timed('deletion.compact')
+    def compact(self, progress=None):
+        """Give pages freed by purges back to the OS.
+
+        The first run switches the database to incremental auto-vacuum, which
+        needs one full VACUUM; after that free pages are released in small
+        incremental_vacuum steps that don't block other writers for long.
+        """
+        conn = self.get_connection()
+        try:
+            cursor = conn.cursor()
+            cursor.execute("PRAGMA auto_vacuum")
+            if cursor.fetchone()[0] != 2:
+                cursor.execute("PRAGMA auto_vacuum = INCREMENTAL")
+                cursor.execute("VACUUM")
+                if progress:
+                    progress(1, 1)
+                return
+            cursor.execute("PRAGMA freelist_count")
+            total = cursor.fetchone()[0]
+            remaining = total
+            while remaining:
+                cursor.execute(f"PRAGMA incremental_vacuum({VACUUM_PAGES})")
+                cursor.fetchall()
+                cursor.execute("PRAGMA freelist_count")
+                previous, remaining = remaining, cursor.fetchone()[0]
+                if remaining >= previous:
+                    break
+                if progress:
+                    progress(total - remaining, total)
+                time.sleep(self.pause)
+        finally:
+            conn.close()
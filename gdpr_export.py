@@ -0,0 +1,250 @@
+# gdpr_export.py
+"""
+Streaming, resumable GDPR exports of user data.
+
+Each user gets a gzip-compressed NDJSON archive. Every line has a "section"
+field: one "user_info" line, one "user_profile" line, one "symptom_history"
+line per record and a closing "end" line with the record count.
+
+    python gdpr_export.py --users alice,bob --out exports/ --since 2024-01-01
+
+Symptom history is read in a single pass ordered by id, however many users
+are exported, first from the live table and then from each archived month
+(see retention.py). Rows are appended to the archives batch by batch, one gzip
+member per batch, and a checkpoint is written after every batch. A run
+interrupted by a crash or a cancelled job resumes from that checkpoint when
+started again with the same output directory, users and time range; a
+finished export in that directory is replaced.
+"""
+import argparse
+import gzip
+import hashlib
+import json
+import os
+
+from analysis_store import analysis_sql, get_store
+from database import DB_PATH
+from metrics import timed
+from query_trace import connect
+from retention import HistoryArchive
+
+BATCH_SIZE = 5000
+CHECKPOINT_FILE = 'checkpoint.json'
+
+HISTORY_COLUMNS = [
+    'id', 'symptoms', 'severity', 'suggested_conditions',
+    'location_searched', 'language', 'created_at',
+]
+
+
+def archive_name(username):
+    """Archive file of a user; the hash keeps names that sanitize alike ("a b", "a_b") apart"""
+    safe = "".join(c if c.isalnum() or c in '-_.' else '_' for c in username)
+    digest = hashlib.sha256(username.encode('utf-8')).hexdigest()[:12]
+    return f"{safe}-{digest}.ndjson.gz"
+
+
+class GDPRExporter:
+    """Exports one or many users' data into per-user NDJSON archives in `out_dir`"""
+
+    def __init__(self, out_dir, db_path=DB_PATH, since=None, until=None, batch_size=BATCH_SIZE):
+        self.out_dir = out_dir
+        self.db_path = db_path
+        self.since = since
+        self.until = until
+        self.batch_size = batch_size
+        self.checkpoint_path = os.path.join(out_dir, CHECKPOINT_FILE)
+
+    def get_connection(self):
+        return connect(self.db_path, check_same_thread=False)
+
+    # --- CHECKPOINTS ---
+    def _load_checkpoint(self):
+        if not os.path.exists(self.checkpoint_path):
+            return None
+        with open(self.checkpoint_path, encoding='utf-8') as f:
+            checkpoint = json.load(f)
+        if 'requested' not in checkpoint:
+            return None  # written before archive names were made unique; start over
+        if (checkpoint['since'], checkpoint['until']) != (self.since, self.until):
+            raise ValueError("An export with a different time range already exists in this directory")
+        return checkpoint
+
+    def _save_checkpoint(self, checkpoint):
+        tmp_path = self.checkpoint_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(checkpoint, f)
+        os.replace(tmp_path, self.checkpoint_path)
+
+    def _append(self, username, checkpoint, lines):
+        """Append lines to a user's archive as one gzip member and record its new size"""
+        path = os.path.join(self.out_dir, archive_name(username))
+        with open(path, 'ab') as f:
+            with gzip.GzipFile(fileobj=f, mode='wb') as member:
+                member.write("".join(json.dumps(line, ensure_ascii=False, default=str) + "\n" for line in lines).encode())
+        checkpoint['users'][username]['size'] = os.path.getsize(path)
+
+    # --- EXPORT ---
+    @timed('gdpr.export')
+    def export(self, usernames, progress=None):
+        """Export `usernames`; returns {username: archive path}.
+
+        progress(done, total) is called after every batch with history ids as
+        the unit; it may raise to stop the export, which can then be resumed.
+        """
+        os.makedirs(self.out_dir, exist_ok=True)
+        conn = self.get_connection()
+        try:
+            checkpoint = self._load_checkpoint()
+            if checkpoint is not None and not checkpoint['complete'] and checkpoint['requested'] != sorted(usernames):
+                raise ValueError("An unfinished export of other users exists in this directory")
+            # Only an unfinished export is resumed; a finished one is redone from scratch
+            if checkpoint is None or checkpoint['complete']:
+                checkpoint = self._start(conn, usernames)
+            self._resume(conn, checkpoint, progress)
+        finally:
+            conn.close()
+        return {
+            username: os.path.join(self.out_dir, archive_name(username))
+            for username in checkpoint['users']
+        }
+
+    def _start(self, conn, usernames):
+        """Write the user_info and user_profile sections and the first checkpoint"""
+        cursor = conn.cursor()
+        checkpoint = {
+            'since': self.since, 'until': self.until, 'complete': False, 'users': {},
+            'requested': sorted(usernames),
+            # The live table, then every archived month in range; last_id is within the current source
+            'sources': ['live'] + HistoryArchive(self.db_path).archive_months(self.since, self.until),
+            'source': 0, 'last_id': 0,
+        }
+        for username in usernames:
+            cursor.execute("SELECT id, username, email, created_at FROM users WHERE username = ? AND deleted_at IS NULL", (username,))
+            user = cursor.fetchone()
+            if not user:
+                continue
+            cursor.execute('''
+                SELECT age, blood_type, allergies, chronic_conditions, emergency_contact, updated_at
+                FROM user_profiles WHERE user_id = ?
+            ''', (user[0],))
+            profile = cursor.fetchone()
+            path = os.path.join(self.out_dir, archive_name(username))
+            if os.path.exists(path):
+                os.remove(path)
+            checkpoint['users'][username] = {'user_id': user[0], 'size': 0, 'rows': 0}
+            self._append(username, checkpoint, [
+                {'section': 'user_info', 'username': user[1], 'email': user[2], 'created_at': user[3]},
+                {'section': 'user_profile', **(dict(zip(
+                    ['age', 'blood_type', 'allergies', 'chronic_conditions', 'emergency_contact', 'updated_at'],
+                    profile
+                )) if profile else {})},
+            ])
+        self._save_checkpoint(checkpoint)
+        return checkpoint
+
+    def _resume(self, conn, checkpoint, progress):
+        users_by_id = {state['user_id']: username for username, state in checkpoint['users'].items()}
+        # Drop anything written after the last checkpoint
+        for username, state in checkpoint['users'].items():
+            path = os.path.join(self.out_dir, archive_name(username))
+            with open(path, 'ab') as f:
+                f.truncate(state['size'])
+
+        history_archive = HistoryArchive(self.db_path)
+        sources = checkpoint['sources']
+        while checkpoint['source'] < len(sources):
+            name = sources[checkpoint['source']]
+            source = conn if name == 'live' else history_archive._open_archive(name)
+            if source is not None:
+                try:
+                    self._export_source(source, checkpoint, users_by_id, progress, live=name == 'live')
+                finally:
+                    if source is not conn:
+                        source.close()
+            checkpoint['source'] += 1
+            checkpoint['last_id'] = 0
+            self._save_checkpoint(checkpoint)
+
+        for username, state in checkpoint['users'].items():
+            self._append(username, checkpoint, [{'section': 'end', 'symptom_history_rows': state['rows']}])
+        checkpoint['complete'] = True
+        self._save_checkpoint(checkpoint)
+
+    def _export_source(self, conn, checkpoint, users_by_id, progress, live):
+        """Export the selected users' rows from one symptom_history table (live or an archive)"""
+        store = get_store(self.db_path)
+        columns = ", ".join(
+            f"{analysis_sql()} AS suggested_conditions" if live and column == 'suggested_conditions' else column
+            for column in HISTORY_COLUMNS
+        )
+        cursor = conn.cursor()
+        cursor.execute("CREATE TEMP TABLE IF NOT EXISTS export_users (user_id INTEGER PRIMARY KEY)")
+        cursor.execute("DELETE FROM export_users")
+        cursor.executemany("INSERT INTO export_users (user_id) VALUES (?)", [(user_id,) for user_id in users_by_id])
+        # End the implicit transaction so the batch reads below don't hold a read lock throughout
+        conn.commit()
+
+        filters, args = [], []
+        if self.since:
+            filters.append("created_at >= ?")
+            args.append(self.since)
+        if self.until:
+            filters.append("created_at < ?")
+            args.append(self.until)
+        where = "".join(f" AND {condition}" for condition in filters)
+
+        cursor.execute("SELECT COALESCE(MAX(id), 0) FROM symptom_history")
+        max_id = cursor.fetchone()[0]
+        start_id = checkpoint['last_id']
+        sources_done, source_count = checkpoint['source'], len(checkpoint['sources'])
+
+        while True:
+            cursor.execute(f'''
+                SELECT user_id, {columns}
+                FROM symptom_history
+                WHERE id > ? AND user_id IN (SELECT user_id FROM export_users){where}
+                ORDER BY id LIMIT ?
+            ''', (checkpoint['last_id'], *args, self.batch_size))
+            rows = cursor.fetchall()
+            if not rows:
+                break
+            batches = {}
+            for row in rows:
+                record = dict(zip(HISTORY_COLUMNS, row[1:]))
+                record['suggested_conditions'] = store.decode(record['suggested_conditions'])
+                batches.setdefault(users_by_id[row[0]], []).append({'section': 'symptom_history', **record})
+            for username, lines in batches.items():
+                self._append(username, checkpoint, lines)
+                checkpoint['users'][username]['rows'] += len(lines)
+            checkpoint['last_id'] = rows[-1][1]
+            self._save_checkpoint(checkpoint)
+            if progress:
+                fraction = (checkpoint['last_id'] - start_id) / max(max_id - start_id, 1)
+                progress(sources_done + fraction, source_count)
+
+
+def read_archive(path):
+    """Yield the lines of an export archive as dicts"""
+    with gzip.open(path, 'rt', encoding='utf-8') as f:
+        for line in f:
+            yield json.loads(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", required=True, help="comma-separated usernames")
+    parser.add_argument("--out", required=True, help="output directory (reuse it to resume)")
+    parser.add_argument("--db", default=DB_PATH)
+    parser.add_argument("--since", help="only history created at or after this date")
+    parser.add_argument("--until", help="only history created before this date")
+    args = parser.parse_args()
+
+    exporter = GDPRExporter(args.out, args.db, args.since, args.until)
+    archives = exporter.export([name.strip() for name in args.users.split(",") if name.strip()])
+    for username, path in archives.items():
+        print(f"{username}: {path}")
+
+
+if __name__ == "__main__":
+    main()
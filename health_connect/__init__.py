@@ -0,0 +1,8 @@
+# health_connect/__init__.py
+"""Health Connect application package.
+
+Entry points (app.py, text.py) stay thin and call health_connect.main.run();
+page rendering lives in health_connect.pages and the non-UI logic they share
+in health_connect.services and health_connect.session. The data layer is
+database.py / database_admin.py at the repository root.
+"""
@@ -0,0 +1,247 @@
+# health_connect/api.py
+"""
+Headless JSON API over the symptom analysis pipeline.
+
+    python -m health_connect.api --port 8600 --processes 4
+
+Endpoints (all JSON; the language defaults to "en"):
+
+    GET  /api/health
+    POST /api/severity     {"symptoms": ..., "language": ...}
+    POST /api/analysis     {"symptoms": ..., "language": ...}  (reply includes token usage and provider)
+    POST /api/analysis/batch  {"cases": [{"symptoms": ..., "language": ..., "location": ...}, ...], "save": false}
+    GET  /api/hospitals?location=...
+    POST /api/history      {"symptoms": ..., "conditions": ..., "location": ..., "language": ...}
+                           (optional Idempotency-Key header)
+
+Requests are stateless: /api/analysis, /api/analysis/batch,
+/api/hospitals and /api/history, which spend model or geocoding quota or
+write data, authenticate every call with HTTP Basic credentials of a
+patient account; batches with "save": true are written to the history
+in one go. An analysis the model
+could not answer comes back with "failed": true and status 503, as does a
+batch in which every case failed. The Tornado IO loop only parses
+and answers requests over keep-alive connections; Gemini, Nominatim and
+SQLite calls run on a bounded thread pool so slow ones never stall the
+others.
+"""
+import argparse
+import base64
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import tornado.httpserver
+import tornado.ioloop
+import tornado.netutil
+import tornado.process
+import tornado.web
+
+from database import user_db
+from language_manager import language_manager as lm
+from metrics import METRICS_PORT, start_metrics_server
+from health_connect.services import (
+    analyze_symptom_batch,
+    assess_symptom_severity,
+    get_disease_analysis,
+    get_nearby_hospitals,
+    save_symptom_search,
+    save_symptom_searches,
+)
+
+API_PORT = int(os.environ.get('API_PORT', '8600'))
+# Threads for blocking work (AI calls, geocoding, database), per process
+API_WORKERS = int(os.environ.get('API_WORKERS', '32'))
+API_PROCESSES = int(os.environ.get('API_PROCESSES', '1'))
+MAX_SYMPTOMS_LENGTH = 2000
+MAX_BATCH_CASES = 50
+
+_executor = ThreadPoolExecutor(max_workers=API_WORKERS, thread_name_prefix='api')
+
+
+class APIError(tornado.web.HTTPError):
+    """An error reported to the client as {"error": message}"""
+
+    def __init__(self, status, message):
+        super().__init__(status)
+        self.message = message
+
+
+class JSONHandler(tornado.web.RequestHandler):
+    def set_default_headers(self):
+        self.set_header("Content-Type", "application/json; charset=utf-8")
+
+    def write_error(self, status_code, **kwargs):
+        error = kwargs.get('exc_info', (None, None))[1]
+        message = error.message if isinstance(error, APIError) else self._reason
+        self.finish(json.dumps({"error": message}))
+
+    def reply(self, payload):
+        self.finish(json.dumps(payload, ensure_ascii=False))
+
+    def body(self):
+        try:
+            payload = json.loads(self.request.body or b"{}")
+        except ValueError:
+            raise APIError(400, "Request body must be JSON")
+        if not isinstance(payload, dict):
+            raise APIError(400, "Request body must be a JSON object")
+        return payload
+
+    def symptoms(self, payload):
+        symptoms = payload.get('symptoms')
+        if not isinstance(symptoms, str) or not symptoms.strip():
+            raise APIError(400, "'symptoms' is required")
+        if len(symptoms) > MAX_SYMPTOMS_LENGTH:
+            raise APIError(400, f"'symptoms' is longer than {MAX_SYMPTOMS_LENGTH} characters")
+        return symptoms.strip()
+
+    def language(self, payload):
+        language = payload.get('language') or 'en'
+        if language not in lm.supported_languages:
+            raise APIError(400, f"Unsupported language: {language}")
+        return language
+
+    async def run_blocking(self, func, *args):
+        return await tornado.ioloop.IOLoop.current().run_in_executor(_executor, func, *args)
+
+    async def authenticate(self):
+        header = self.request.headers.get('Authorization', '')
+        try:
+            scheme, credentials = header.split(' ', 1)
+            username, password = base64.b64decode(credentials).decode().split(':', 1)
+        except ValueError:
+            scheme = None
+        if scheme != 'Basic':
+            self.set_header('WWW-Authenticate', 'Basic realm="health-connect"')
+            raise APIError(401, "Basic authentication required")
+        success, message = await self.run_blocking(user_db.authenticate_user, username, password)
+        if not success:
+            raise APIError(401, message)
+        return username
+
+
+def analysis_reply(result):
+    """The JSON fields of one analysis (see ai_translator.analysis_result)"""
+    return {
+        "analysis": result['text'], "cached": result['cached'], "prompt_version": result['prompt_version'],
+        "usage": result['usage'], "provider": result['provider'], "degraded": result['degraded'],
+        "failed": result['failed'],
+    }
+
+
+class HealthHandler(JSONHandler):
+    def get(self):
+        self.reply({"status": "ok"})
+
+
+class SeverityHandler(JSONHandler):
+    def post(self):
+        payload = self.body()
+        level, message = assess_symptom_severity(self.symptoms(payload), self.language(payload))
+        self.reply({"severity": level, "message": message})
+
+
+class AnalysisHandler(JSONHandler):
+    async def post(self):
+        await self.authenticate()
+        payload = self.body()
+        symptoms, language = self.symptoms(payload), self.language(payload)
+        level, message = assess_symptom_severity(symptoms, language)
+        analysis = await self.run_blocking(get_disease_analysis, symptoms, language)
+        if analysis['failed']:
+            self.set_status(503)
+        self.reply({"severity": level, "message": message, **analysis_reply(analysis)})
+
+
+class BatchAnalysisHandler(JSONHandler):
+    async def post(self):
+        username = await self.authenticate()
+        payload = self.body()
+        cases = payload.get('cases')
+        if not isinstance(cases, list) or not cases:
+            raise APIError(400, "'cases' must be a non-empty list")
+        if len(cases) > MAX_BATCH_CASES:
+            raise APIError(400, f"At most {MAX_BATCH_CASES} cases per request")
+        if not all(isinstance(case, dict) for case in cases):
+            raise APIError(400, "Every case must be a JSON object")
+        parsed = [(self.symptoms(case), self.language(case)) for case in cases]
+        results = await self.run_blocking(analyze_symptom_batch, parsed)
+        saved = 0
+        if payload.get('save'):
+            saved = await self.run_blocking(save_symptom_searches, username, [
+                (symptoms, result['text'], str(case.get('location') or ''), language)
+                for (symptoms, language), result, case in zip(parsed, results, cases) if not result['failed']
+            ])
+        replies = []
+        for (symptoms, language), result in zip(parsed, results):
+            level, message = assess_symptom_severity(symptoms, language)
+            replies.append({"severity": level, "message": message, **analysis_reply(result)})
+        if all(result['failed'] for result in results):
+            self.set_status(503)
+        self.reply({"results": replies, "saved": saved})
+
+
+class HospitalsHandler(JSONHandler):
+    async def get(self):
+        # Each lookup goes out to Nominatim and Overpass, whose usage policies we answer for
+        await self.authenticate()
+        location = self.get_query_argument('location', '').strip()
+        if not location:
+            raise APIError(400, "'location' is required")
+        result = await self.run_blocking(get_nearby_hospitals, location)
+        if result['status'] == 'ERROR':
+            raise APIError(502, result['error'])
+        self.reply(result)
+
+
+class HistoryHandler(JSONHandler):
+    async def post(self):
+        username = await self.authenticate()
+        payload = self.body()
+        symptoms, language = self.symptoms(payload), self.language(payload)
+        # A retried request with the same Idempotency-Key is saved once
+        idempotency_key = self.request.headers.get('Idempotency-Key')
+        saved = await self.run_blocking(
+            save_symptom_search, username, symptoms,
+            str(payload.get('conditions') or ''), str(payload.get('location') or ''), language,
+            f"api:{username}:{idempotency_key}" if idempotency_key else None
+        )
+        if not saved:
+            raise APIError(500, "Could not save the search")
+        self.set_status(201)
+        self.reply({"saved": True})
+
+
+def make_app():
+    return tornado.web.Application([
+        (r"/api/health", HealthHandler),
+        (r"/api/severity", SeverityHandler),
+        (r"/api/analysis", AnalysisHandler),
+        (r"/api/analysis/batch", BatchAnalysisHandler),
+        (r"/api/hospitals", HospitalsHandler),
+        (r"/api/history", HistoryHandler),
+    ])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=API_PORT)
+    parser.add_argument("--address", default="127.0.0.1")
+    parser.add_argument("--processes", type=int, default=API_PROCESSES,
+                        help="worker processes sharing the port (0: one per CPU)")
+    args = parser.parse_args()
+
+    # Requests are stateless, so forked workers simply share the listening socket
+    sockets = tornado.netutil.bind_sockets(args.port, address=args.address)
+    print(f"Health Connect API listening on http://{args.address}:{args.port}")
+    task_id = tornado.process.fork_processes(args.processes) if args.processes != 1 else 0
+    if METRICS_PORT:
+        start_metrics_server(port=METRICS_PORT + task_id)
+    server = tornado.httpserver.HTTPServer(make_app())
+    server.add_sockets(sockets)
+    tornado.ioloop.IOLoop.current().start()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,23 @@
+# health_connect/main.py
+import streamlit as st
+
+import rerun_profiler
+from metrics import start_metrics_server
+from health_connect.pages import admin_dashboard, login_signup_page, main_app
+from health_connect.session import init_session_state
+
+def run():
+    """Render one rerun of the app; called by every entry point"""
+    # Prometheus scrape endpoint (started once per process)
+    start_metrics_server()
+
+    with rerun_profiler.profile_rerun():
+        init_session_state()
+
+        if st.session_state.logged_in:
+            if st.session_state.is_admin:
+                admin_dashboard()
+            else:
+                main_app()
+        else:
+            login_signup_page()
@@ -0,0 +1,4 @@
+# health_connect/pages/__init__.py
+from health_connect.pages.admin import admin_dashboard
+from health_connect.pages.login import login_signup_page
+from health_connect.pages.patient import main_app
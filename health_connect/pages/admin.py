@@ -0,0 +1,307 @@
+# health_connect/pages/admin.py
+from datetime import timedelta
+
+import streamlit as st
+
+import rerun_profiler
+from database import user_db
+from database_admin import EXPORTABLE_TABLES
+from deletion import DeletionEngine
+from language_manager import language_manager as lm, t
+from metrics import counters, snapshot, render_prometheus
+from query_trace import query_stats, slow_queries, SLOW_QUERY_MS
+from retention import history_archive
+from session_cache import cached_read, clear_session_cache
+from health_connect.pages.history import history_page, show_analysis
+from health_connect.pages.jobs import jobs_panel, submit_job
+from health_connect.services import get_all_users, get_user_profile
+from health_connect.session import logout_user
+
+AI_PROVIDER_COUNTERS = ['ai_provider_fallbacks', 'ai_fallback_answers', 'gemini_batch_retries']
+
+def admin_dashboard():
+    import pandas as pd  # only the admin views need it; keeps it off the login path
+    
+    st.set_page_config(layout="wide", page_title=t('admin_dashboard'))
+    
+    # Language selector in sidebar
+    with st.sidebar:
+        lm.create_language_selector()
+        st.markdown("---")
+    
+    # Header
+    col1, col2, col3 = st.columns([3, 1, 1])
+    with col1:
+        st.title(f"👨‍⚕️ {t('admin_dashboard')}")
+    with col2:
+        st.write(f"{t('welcome')}, *Admin*!")
+    with col3:
+        if st.button(t('logout'), type="primary"):
+            logout_user()
+            st.rerun()
+    
+    st.markdown(f"{t('system_overview')}")
+    
+    tab1, tab2, tab3, tab4, tab5 = st.tabs([
+        f"📊 {t('system_overview')}",
+        f"👥 {t('all_patients')}", 
+        f"📋 {t('patient_details')}",
+        f"⚙️ {t('admin_tools')}",
+        f"⚡ {t('performance')}"
+    ])
+    
+    with tab1:
+        st.subheader(f"📊 {t('system_overview')}")
+        try:
+            # Stats include rolling time windows, so they also expire after a minute
+            stats = cached_read(user_db, 'database_stats', None, user_db.get_database_stats, ttl=60)
+            col1, col2, col3, col4 = st.columns(4)
+            with col1:
+                st.metric(t('total_patients'), stats.get('users_count', 0))
+            with col2:
+                st.metric(t('total_searches'), stats.get('symptom_history_count', 0))
+            with col3:
+                st.metric(t('profiles_created'), stats.get('user_profiles_count', 0))
+            with col4:
+                st.metric(t('recent_searches'), stats.get('recent_searches', 0))
+        except Exception as e:
+            st.error(f"Error loading statistics: {e}")
+
+    with tab2:
+        st.subheader(f"👥 {t('all_patients')}")
+        try:
+            all_users = get_all_users()
+            if all_users:
+                users_df = pd.DataFrame(all_users, columns=['Username', 'Email', 'Registration Date'])
+                
+                # Search functionality
+                col1, col2 = st.columns([2, 1])
+                with col1:
+                    search_term = st.text_input(f"🔍 {t('search_patients')}:")
+                with col2:
+                    sort_by = st.selectbox("Sort by:", ["Registration Date", "Username"])
+                
+                # Filter data
+                if search_term:
+                    filtered_df = users_df[
+                        users_df['Username'].str.contains(search_term, case=False, na=False) |
+                        users_df['Email'].str.contains(search_term, case=False, na=False)
+                    ]
+                else:
+                    filtered_df = users_df
+                
+                # Sort data
+                if sort_by == "Registration Date":
+                    filtered_df = filtered_df.sort_values('Registration Date', ascending=False)
+                else:
+                    filtered_df = filtered_df.sort_values('Username')
+                
+                # Display results
+                st.dataframe(filtered_df, use_container_width=True)
+                
+                # Export option
+                csv = filtered_df.to_csv(index=False)
+                st.download_button(
+                    label=f"📥 {t('export_patients')}",
+                    data=csv,
+                    file_name="patients_list.csv",
+                    mime="text/csv"
+                )
+            else:
+                st.info("No patients registered yet.")
+                
+        except Exception as e:
+            st.error(f"Error loading patients: {e}")
+
+    with tab3:
+        st.subheader(f"📋 {t('patient_details')}")
+        try:
+            all_users = get_all_users()
+            if all_users:
+                usernames = [user[0] for user in all_users]
+                selected_patient = st.selectbox(f"{t('select_patient')}:", usernames)
+                
+                if selected_patient:
+                    col1, col2 = st.columns(2)
+                    
+                    with col1:
+                        st.markdown(f"### 👤 {t('basic_information')}")
+                        profile = get_user_profile(selected_patient)
+                        if profile:
+                            st.write(f"**Username:** {selected_patient}")
+                            if profile[0]:
+                                st.write(f"**{t('age')}:** {profile[0]}")
+                            if profile[1] and profile[1] != t('unknown'):
+                                st.write(f"**{t('blood_type')}:** {profile[1]}")
+                            if profile[2]:
+                                st.write(f"**{t('allergies')}:** {profile[2]}")
+                            if profile[3]:
+                                st.write(f"**{t('chronic_conditions')}:** {profile[3]}")
+                            if profile[4]:
+                                st.write(f"**{t('emergency_contact')}:** {profile[4]}")
+                        else:
+                            st.info("No profile information available.")
+                    
+                    with col2:
+                        st.markdown(f"### 🩺 {t('symptom_history_details')}")
+                        history, offset = history_page(selected_patient, key="admin_history")
+                        if history:
+                            for i, record in enumerate(history, offset + 1):
+                                with st.expander(f"Search {i} - {record[4][:16]}..."):
+                                    st.write(f"**Symptoms:** {record[1]}")
+                                    st.write(f"**Severity:** {record[2]}")
+                                    st.write(f"**Location:** {record[3]}")
+                                    st.write(f"**Date:** {record[4]}")
+                                    show_analysis(selected_patient, record[0], "**AI Analysis**", key="admin_history")
+                        else:
+                            st.info("No symptom history available.")
+                        
+                        # Older searches live in the monthly archives; search covers both
+                        history_query = st.text_input("Search all history (including archive)", key="history_search")
+                        if history_query:
+                            matches = history_archive.search(history_query, username=selected_patient, limit=50)
+                            st.caption(f"{len(matches)} matching searches")
+                            for record in matches:
+                                with st.expander(f"{record['created_at'][:16]} - {record['symptoms'][:60]}"):
+                                    st.write(f"**Severity:** {record['severity']}")
+                                    st.write(f"**Location:** {record['location_searched']}")
+                                    st.markdown("**AI Analysis:**")
+                                    st.write(record['suggested_conditions'])
+            else:
+                st.info("No patients registered yet.")
+                
+        except Exception as e:
+            st.error(f"Error loading patient details: {e}")
+
+    with tab4:
+        st.subheader(f"⚙️ {t('admin_tools')}")
+        col1, col2 = st.columns(2)
+        
+        with col1:
+            st.markdown(f"### 🗄️ {t('database_management')}")
+            if st.button(f"🔄 {t('refresh_cache')}"):
+                clear_session_cache()
+                st.success("Database cache refreshed!")
+            
+            if st.button(f"📊 {t('generate_report')}"):
+                submit_job('system_report')
+            
+            export_table = st.selectbox("Table to export", EXPORTABLE_TABLES)
+            export_format = st.radio("Export format", ['csv', 'json'], horizontal=True)
+            if st.button("📤 Export table"):
+                submit_job('export_table', {'table_name': export_table, 'format': export_format})
+            
+            if st.button("💾 Backup database"):
+                submit_job('backup_database')
+            
+            if st.button(f"🗄️ Archive history older than {history_archive.retention_days} days"):
+                submit_job('archive_history')
+            
+            if st.button("🗜️ Compress stored analyses"):
+                submit_job('compress_history')
+            
+            if st.button("🧠 Analyze imported history"):
+                submit_job('analyze_history')
+        
+        with col2:
+            st.markdown(f"### 🔒 {t('data_management')}")
+            all_users = get_all_users()
+            if all_users:
+                delete_users = st.multiselect(f"{t('select_delete')}:", [user[0] for user in all_users])
+                soft_delete = st.checkbox("Only mark for deletion (purge later)")
+                if st.button(f"🗑️ {t('delete_patient')}", type="secondary"):
+                    if delete_users:
+                        submit_job('delete_user_data', {'usernames': delete_users, 'soft': soft_delete})
+                
+                export_users = st.multiselect("Export patient data (GDPR)", [user[0] for user in all_users])
+                range_col1, range_col2 = st.columns(2)
+                with range_col1:
+                    export_since = st.date_input("History from", value=None)
+                with range_col2:
+                    export_until = st.date_input("History until", value=None)
+                if st.button("📦 Export patient data", disabled=not export_users):
+                    submit_job('gdpr_export', {
+                        'usernames': export_users,
+                        'since': export_since.isoformat() if export_since else None,
+                        # Inclusive of the chosen day
+                        'until': (export_until + timedelta(days=1)).isoformat() if export_until else None,
+                    })
+            
+            # Tombstoning bumps the global data version; purges are picked up by the ttl
+            pending = cached_read(user_db, 'pending_purge', None, DeletionEngine().pending_purge, ttl=60)
+            if pending:
+                st.caption(f"{len(pending)} patients marked for deletion")
+                if st.button("🧹 Purge deleted patients"):
+                    submit_job('purge_deleted')
+            if st.button("🗜️ Compact database"):
+                submit_job('compact_database')
+        
+        jobs_panel()
+
+    with tab5:
+        st.subheader(f"⚡ {t('performance')}")
+        perf_rows = snapshot()
+        if perf_rows:
+            perf_df = pd.DataFrame(perf_rows).sort_values('p99_ms', ascending=False)
+            st.dataframe(perf_df, use_container_width=True, hide_index=True)
+            st.download_button(
+                label=f"📥 {t('prometheus_metrics')}",
+                data=render_prometheus(),
+                file_name="metrics.txt",
+                mime="text/plain"
+            )
+        else:
+            st.info(t('no_operations'))
+        
+        token_counts = {name: value for name, value in counters().items() if name.endswith('_tokens')}
+        if token_counts:
+            token_cols = st.columns(len(token_counts))
+            for col, (name, value) in zip(token_cols, sorted(token_counts.items())):
+                col.metric(t(name, name.replace('_', ' ').capitalize()), f"{value:,}")
+        
+        # How often the AI provider fell back or retried (see ai_translator.py)
+        provider_counts = counters()
+        provider_cols = st.columns(len(AI_PROVIDER_COUNTERS))
+        for col, name in zip(provider_cols, AI_PROVIDER_COUNTERS):
+            col.metric(t(name), f"{provider_counts.get(name, 0):,}")
+
+        st.markdown(f"### 🐢 {t('sql_statements')}")
+        sql_rows = query_stats()
+        if sql_rows:
+            st.dataframe(pd.DataFrame(sql_rows), use_container_width=True, hide_index=True)
+        st.markdown(f"**{t('slow_queries')} (≥ {SLOW_QUERY_MS:g} ms)**")
+        slow_log = slow_queries()
+        if slow_log:
+            for entry in slow_log[:20]:
+                with st.expander(f"{entry['duration_ms']} ms - {entry['at']}"):
+                    st.code(entry['statement'], language="sql")
+                    st.code("\n".join(entry['plan']), language="text")
+        else:
+            st.info(t('no_slow_queries'))
+
+        st.markdown(f"### 🔬 {t('rerun_profiler')}")
+        profile_rate = st.slider(
+            t('profile_fraction'),
+            min_value=0.0, max_value=1.0, step=0.05,
+            value=rerun_profiler.sample_rate()
+        )
+        if profile_rate != rerun_profiler.sample_rate():
+            rerun_profiler.configure(profile_rate)
+        hot_functions = rerun_profiler.hottest_functions()
+        if hot_functions:
+            st.caption(f"{len(rerun_profiler.recent_profiles())} {t('sampled_reruns')}")
+            st.dataframe(pd.DataFrame(hot_functions), use_container_width=True, hide_index=True)
+            col1, col2 = st.columns(2)
+            with col1:
+                st.download_button(
+                    label=f"📥 {t('collapsed_stacks')}",
+                    data=rerun_profiler.collapsed_stacks(),
+                    file_name="reruns.collapsed",
+                    mime="text/plain"
+                )
+            with col2:
+                if st.button(f"🧹 {t('clear_profiles')}"):
+                    rerun_profiler.clear()
+                    st.rerun()
+        else:
+            st.info(t('no_reruns_profiled'))
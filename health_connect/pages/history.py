@@ -0,0 +1,39 @@
+# health_connect/pages/history.py
+import streamlit as st
+
+from health_connect.services import get_history_analysis, get_user_history_page
+
+HISTORY_PAGE_SIZE = 10
+
+
+def history_page(username, key):
+    """Summary rows for the selected page of a user's history, with page controls.
+
+    Returns (rows, offset); rows are (id, symptoms, severity, location, date)
+    and offset is the position of the first row in the whole history.
+    """
+    page_key = f"{key}_page"
+    # A page picked for another patient may not exist for this one
+    if st.session_state.get(f"{key}_user") != username:
+        st.session_state[f"{key}_user"] = username
+        st.session_state[page_key] = 1
+    page = st.session_state.get(page_key, 1)
+    rows, total = get_user_history_page(username, page - 1, HISTORY_PAGE_SIZE)
+    pages = max(1, -(-total // HISTORY_PAGE_SIZE))
+    if page > pages:
+        # The history shrank (deletions, archiving) since the page was picked
+        page = st.session_state[page_key] = pages
+        rows, total = get_user_history_page(username, page - 1, HISTORY_PAGE_SIZE)
+    if pages > 1:
+        st.number_input("Page", min_value=1, max_value=pages, step=1, key=page_key)
+        offset = (page - 1) * HISTORY_PAGE_SIZE
+        st.caption(f"{offset + 1}–{offset + len(rows)} of {total}")
+    return rows, (page - 1) * HISTORY_PAGE_SIZE
+
+
+def show_analysis(username, record_id, label, key):
+    """Load and show one row's AI analysis once the user asks for it"""
+    # Expander bodies always run, so the analysis sits behind a toggle
+    if st.toggle(label, key=f"{key}_analysis_{record_id}"):
+        analysis = get_history_analysis(username, record_id)
+        st.write(analysis if analysis else "—")
@@ -0,0 +1,100 @@
+# health_connect/pages/jobs.py
+import os
+from functools import partial
+
+import streamlit as st
+
+from jobs import job_kinds, job_runner
+
+# How often the job list refreshes itself while something is queued or running
+POLL_SECONDS = 2
+
+STATUS_ICONS = {
+    'queued': '⏳',
+    'running': '⚙️',
+    'succeeded': '✅',
+    'failed': '❌',
+    'cancelled': '🚫',
+}
+
+ARTIFACT_MIME_TYPES = {
+    '.csv': 'text/csv',
+    '.json': 'application/json',
+    '.gz': 'application/gzip',
+    '.zip': 'application/zip',
+}
+
+
+def submit_job(kind, params=None):
+    """Queue a background job from the UI and report the outcome"""
+    success, result = job_runner.submit(kind, params, submitted_by=st.session_state.get('current_user'))
+    if success:
+        st.success(f"{job_kinds()[kind]} queued as job #{result}")
+    else:
+        st.error(result)
+    return success
+
+
+def jobs_panel(limit=20):
+    """Job list with progress and cancel buttons, plus downloads for finished artifacts"""
+    st.markdown("### 🧵 Background jobs")
+
+    # Only poll while there is something to watch; finished jobs need no refresh
+    @st.fragment(run_every=POLL_SECONDS if job_runner.has_active_jobs() else None)
+    def job_list():
+        jobs = job_runner.list_jobs(limit)
+        if not jobs:
+            st.info("No background jobs yet.")
+            return
+        labels = job_kinds()
+        for job in jobs:
+            col1, col2 = st.columns([4, 1])
+            with col1:
+                params = ", ".join(
+                    ", ".join(value) if isinstance(value, list) else f"{value}"
+                    for value in job['params'].values() if value is not None
+                )
+                title = f"{STATUS_ICONS.get(job['status'], '')} #{job['id']} {labels.get(job['kind'], job['kind'])}"
+                st.markdown(f"**{title}**" + (f" ({params})" if params else "") + f" · {job['created_at']}")
+                if job['status'] in ('queued', 'running'):
+                    st.progress(job['progress'] or 0.0, text=job['message'] or job['status'])
+                elif job['status'] == 'failed':
+                    st.caption(f"Failed: {job['error']}")
+                elif job['message']:
+                    st.caption(job['message'])
+            with col2:
+                if job['status'] in ('queued', 'running'):
+                    if st.button("Cancel", key=f"cancel_job_{job['id']}"):
+                        job_runner.cancel(job['id'])
+                        st.rerun(scope="fragment")
+        if not job_runner.has_active_jobs() and st.session_state.get('_jobs_polling'):
+            # The last job just finished: refresh the whole page so dependent views reload
+            st.session_state._jobs_polling = False
+            st.rerun()
+        st.session_state._jobs_polling = job_runner.has_active_jobs()
+
+    job_list()
+
+    finished = [
+        job for job in job_runner.list_jobs(limit)
+        if job['status'] == 'succeeded' and job['artifact_path'] and os.path.exists(job['artifact_path'])
+    ]
+    if finished:
+        job = st.selectbox(
+            "Job results",
+            finished,
+            format_func=lambda job: f"#{job['id']} {os.path.basename(job['artifact_path'])}"
+        )
+        file_name = os.path.basename(job['artifact_path'])
+        # Backups and exports can be large: the file is read only when the button is clicked
+        st.download_button(
+            label=f"📥 Download {file_name}",
+            data=partial(read_artifact, job['artifact_path']),
+            file_name=file_name,
+            mime=ARTIFACT_MIME_TYPES.get(os.path.splitext(file_name)[1], 'application/octet-stream')
+        )
+
+
+def read_artifact(path):
+    with open(path, 'rb') as f:
+        return f.read()
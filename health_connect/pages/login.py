@@ -0,0 +1,78 @@
+# health_connect/pages/login.py
+import streamlit as st
+
+from language_manager import language_manager as lm, t
+from health_connect.session import authenticate_user, create_user
+
+def login_signup_page():
+    st.set_page_config(layout="centered", page_title=f"Login - {t('app_title')}")
+    
+    # Language selector at top
+    col1, col2 = st.columns([3, 1])
+    with col1:
+        st.title(f"🏥 {t('app_title')}")
+    with col2:
+        lm.create_language_selector("main")
+    
+    st.markdown(f"### {t('login_title')}")
+    
+    tab1, tab2, tab3 = st.tabs([
+        f"🔑 {t('patient_login')}",
+        f"📝 {t('create_account')}", 
+        f"👨‍⚕️ {t('admin_login')}"
+    ])
+    
+    with tab1:
+        st.subheader(f"🔑 {t('patient_login')}")
+        login_username = st.text_input(t('username'), key="login_username")
+        login_password = st.text_input(t('password'), type="password", key="login_password")
+        
+        if st.button(t('login_button'), key="login_btn", type="primary"):
+            if login_username and login_password:
+                success, message = authenticate_user(login_username, login_password)
+                if success:
+                    st.success("Login successful!")
+                    st.rerun()
+                else:
+                    st.error(message)
+            else:
+                st.warning(f"Please enter both {t('username')} and {t('password')}")
+    
+    with tab2:
+        st.subheader(f"📝 {t('create_account')}")
+        signup_username = st.text_input(t('username'), key="signup_username")
+        signup_email = st.text_input(t('email'), key="signup_email")
+        signup_password = st.text_input(t('password'), type="password", key="signup_password")
+        signup_confirm = st.text_input(t('confirm_password'), type="password", key="signup_confirm")
+        
+        if st.button(t('create_account_button'), key="signup_btn", type="primary"):
+            if not signup_username or not signup_password:
+                st.warning(f"Please enter both {t('username')} and {t('password')}")
+            elif signup_password != signup_confirm:
+                st.error("Passwords do not match")
+            elif len(signup_password) < 4:
+                st.warning("Password should be at least 4 characters long")
+            else:
+                success, message = create_user(signup_username, signup_password, signup_email)
+                if success:
+                    st.success("Account created successfully!")
+                    st.rerun()
+                else:
+                    st.error(message)
+    
+    with tab3:
+        st.subheader(f"👨‍⚕️ {t('admin_login')}")
+        st.info("Use admin credentials to access the admin dashboard")
+        admin_username = st.text_input(t('username'), key="admin_username")
+        admin_password = st.text_input(t('password'), type="password", key="admin_password")
+        
+        if st.button(t('login_button'), key="admin_login_btn", type="primary"):
+            if admin_username and admin_password:
+                success, message = authenticate_user(admin_username, admin_password)
+                if success:
+                    st.success("Admin login successful!")
+                    st.rerun()
+                else:
+                    st.error(message)
+            else:
+                st.warning(f"Please enter both {t('username')} and {t('password')}")
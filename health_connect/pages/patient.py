@@ -0,0 +1,191 @@
+# health_connect/pages/patient.py
+import streamlit as st
+
+from database import user_db
+from emergency_services import emergency_services_page
+from language_manager import language_manager as lm, t
+from health_connect.services import (
+    assess_symptom_severity,
+    get_emergency_contacts,
+    get_nearby_hospitals,
+    get_user_profile,
+    submit_analysis,
+)
+from health_connect.pages.history import history_page, show_analysis
+from health_connect.session import logout_user
+
+def main_app():
+    st.set_page_config(layout="wide", page_title=t('app_title'))
+    
+    # Language selector in sidebar
+    with st.sidebar:
+        lm.create_language_selector()
+        st.markdown("---")
+    
+    # Header
+    col_header1, col_header2, col_header3 = st.columns([3, 1, 1])
+    with col_header1:
+        st.title(f"🏥 {t('app_title')}")
+    with col_header2:
+        st.write(f"{t('welcome')}, *{st.session_state.current_user}*!")
+    with col_header3:
+        if st.button(t('logout'), type="primary"):
+            logout_user()
+            st.rerun()
+    
+    st.markdown(f"{t('describe_symptoms')}")
+
+    # UPDATED TABS - Added Emergency Services tab
+    tab1, tab2, tab3, tab4 = st.tabs([
+        f"🔍 {t('symptom_analysis')}",
+        f"📊 {t('your_history')}", 
+        f"👤 {t('your_profile')}",
+        f"🚑 Emergency Services"  # New Emergency Services tab
+    ])
+
+    with tab1:
+        col1, col2 = st.columns(2)
+
+        with col1:
+            st.subheader(f"📍 {t('describe_symptoms')}")
+            symptoms_input = st.text_area(
+                f"{t('describe_symptoms')}:",
+                placeholder=t('symptom_placeholder'),
+                height=150
+            )
+
+            st.subheader(f"📍 {t('enter_location')}")
+            location_input = st.text_input(
+                f"{t('enter_location')}:",
+                placeholder=t('location_placeholder')
+            )
+
+            analyze_button = st.button(f"🔍 {t('analyze_button')}", type="primary")
+
+        with col2:
+            st.subheader(f"📊 {t('results')}")
+
+            if analyze_button:
+                if not symptoms_input:
+                    st.warning(t('enter_symptoms_warning'))
+                elif not location_input:
+                    st.warning(t('enter_location_warning'))
+                else:
+                    # --- SYMPTOM SEVERITY CHECK ---
+                    severity_level, severity_message = assess_symptom_severity(symptoms_input)
+                    
+                    if severity_level == "HIGH":
+                        st.error(severity_message)
+                        st.markdown(f"### 🚨 {t('emergency_contacts')}")
+                        emergency_contacts = get_emergency_contacts(location_input)
+                        for contact in emergency_contacts:
+                            st.write(f"**{contact['service']}**: `{contact['number']}`")
+                        st.divider()
+                    
+                    elif severity_level == "MEDIUM":
+                        st.warning(severity_message)
+                        st.divider()
+
+                    # --- GEMINI ANALYSIS, SAVED TO DATABASE ---
+                    # Reruns and double clicks of the same submission reuse its result and history row
+                    with st.spinner("🔍 Analyzing symptoms with AI..."):
+                        st.markdown(f"### 🩺 {t('possible_conditions')}")
+                        analysis, save_success = submit_analysis(
+                            st.session_state.current_user,
+                            symptoms_input,
+                            location_input
+                        )
+                        if analysis['degraded']:
+                            st.warning(f"⚠️ {t('analysis_degraded')}")
+                        st.markdown(analysis['text'])
+                    
+                    if save_success:
+                        st.success(f"✅ {t('analysis_saved')}")
+                    else:
+                        st.warning("⚠️ Could not save to history")
+
+                    st.divider()
+
+                    # --- HOSPITAL SEARCH ---
+                    with st.spinner(f"🏨 {t('hospitals_near')} {location_input}..."):
+                        st.markdown(f"### 📍 {t('hospitals_near')} {location_input}")
+
+                        hospital_data = get_nearby_hospitals(location_input)
+
+                        if hospital_data["status"] == "OK":
+                            hospital_list = hospital_data["results"]
+                            st.markdown(f"**Found {len(hospital_list)} hospitals:**")
+                            for i, h in enumerate(hospital_list, start=1):
+                                st.markdown(f"{i}. **{h['name']}**")
+
+                            st.markdown(f"### 🗺️ {t('hospital_locations')}")
+                            map_points = [{"lat": h["lat"], "lon": h["lon"]} for h in hospital_list]
+                            st.map(map_points)
+
+                        elif hospital_data["status"] == "ZERO_RESULTS":
+                            st.warning(t('no_hospitals'))
+                        else:
+                            st.error(f"Error: {hospital_data.get('error', 'Unknown error')}")
+
+    with tab2:
+        st.subheader(f"📊 {t('symptom_history')}")
+        history, offset = history_page(st.session_state.current_user, key="patient_history")
+        if history:
+            st.info(f"{t('symptom_history')}:")
+            for i, record in enumerate(history, offset + 1):
+                with st.expander(f"Analysis {i} - {record[4][:16]}..."):
+                    col1, col2 = st.columns(2)
+                    with col1:
+                        st.write(f"**Symptoms:** {record[1]}")
+                        st.write(f"**Severity:** {record[2]}")
+                    with col2:
+                        st.write(f"**Location:** {record[3]}")
+                        st.write(f"**Date:** {record[4]}")
+                    show_analysis(st.session_state.current_user, record[0], "**AI Suggestions**", key="patient_history")
+        else:
+            st.info(f"📝 {t('no_history')}")
+
+    with tab3:
+        st.subheader(f"👤 {t('health_profile')}")
+        current_profile = get_user_profile(st.session_state.current_user)
+        
+        st.markdown(f"### 📋 {t('basic_info')}")
+        col1, col2 = st.columns(2)
+        with col1:
+            current_age = current_profile[0] if current_profile and current_profile[0] else 25
+            current_blood_type = current_profile[1] if current_profile and current_profile[1] else t('unknown')
+            
+            age = st.number_input(t('age'), min_value=1, max_value=120, value=current_age)
+            blood_type = st.selectbox(t('blood_type'), lm.get_blood_types())
+        
+        with col2:
+            current_allergies = current_profile[2] if current_profile and current_profile[2] else ""
+            current_emergency_contact = current_profile[4] if current_profile and current_profile[4] else ""
+            
+            allergies = st.text_input(t('allergies'), value=current_allergies)
+            emergency_contact = st.text_input(t('emergency_contact'), value=current_emergency_contact)
+        
+        current_conditions = current_profile[3] if current_profile and current_profile[3] else ""
+        chronic_conditions = st.text_area(t('chronic_conditions'), value=current_conditions, height=80)
+        
+        if st.button(f"💾 {t('save_profile')}", type="primary", use_container_width=True):
+            if age and emergency_contact:
+                success = user_db.update_user_profile(
+                    st.session_state.current_user,
+                    age=age,
+                    blood_type=blood_type,
+                    allergies=allergies,
+                    chronic_conditions=chronic_conditions,
+                    emergency_contact=emergency_contact
+                )
+                if success:
+                    st.success(f"✅ {t('profile_saved')}")
+                    st.rerun()
+                else:
+                    st.error("❌ Error saving profile")
+            else:
+                st.warning("⚠️ Please fill required fields")
+
+    # NEW TAB: Emergency Services
+    with tab4:
+        emergency_services_page()
@@ -0,0 +1,237 @@
+# health_connect/services.py
+import hashlib
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import streamlit as st
+
+import http_client
+from ai_translator import analysis_result, get_default_translator, normalize_symptoms
+from database import user_db
+from language_manager import language_manager as lm, t
+from metrics import increment, timed
+from resilience import resilient_call, is_transient_http_error
+from session_cache import cached_read
+from severity import SEVERITY_MESSAGES, severity_level
+from shared_cache import get_rate_limiter, shared_cache
+
+DEFAULT_NOMINATIM_URL = "https://nominatim.openstreetmap.org/search"
+
+# --- USER DATA ---
+def save_symptom_search(username, symptoms, conditions, location, language=None, submission_key=None,
+                        submission_window=None):
+    return user_db.save_symptom_history(
+        username, symptoms, severity_level(symptoms), conditions, location,
+        language=language or st.session_state.current_language, submission_key=submission_key,
+        submission_window=submission_window
+    )
+
+def save_symptom_searches(username, searches):
+    """Save many (symptoms, conditions, location, language) searches of one user in one write"""
+    return user_db.save_symptom_histories(username, [
+        (symptoms, severity_level(symptoms), conditions, location, language)
+        for symptoms, conditions, location, language in searches
+    ])
+
+def get_user_history_page(username, page, page_size):
+    return cached_read(
+        user_db, 'symptom_history', username, user_db.get_symptom_history_page, username, page, page_size
+    )
+
+def get_history_analysis(username, history_id):
+    return cached_read(user_db, 'symptom_history', username, user_db.get_history_analysis, username, history_id)
+
+def get_user_profile(username):
+    return cached_read(user_db, 'user_profile', username, user_db.get_user_profile, username)
+
+def get_all_users():
+    return cached_read(user_db, 'all_users', None, user_db.get_all_users)
+
+# --- SYMPTOM ANALYSIS FUNCTIONS ---
+def assess_symptom_severity(symptoms, language=None):
+    """(level, message) for the symptoms; the message is in `language`, or the session's language"""
+    level = severity_level(symptoms)
+    if language is None:
+        return level, t(SEVERITY_MESSAGES[level])
+    return level, lm.translate(SEVERITY_MESSAGES[level], language)
+
+def get_emergency_contacts(location):
+    emergency_numbers = {
+        'india': [
+            {'service': 'Police', 'number': '100'},
+            {'service': 'Ambulance', 'number': '102'}, 
+            {'service': 'Emergency', 'number': '112'}
+        ],
+        'us': [
+            {'service': 'Emergency', 'number': '911'},
+            {'service': 'Poison Control', 'number': '1-800-222-1222'}
+        ],
+        'uk': [
+            {'service': 'Emergency', 'number': '999'},
+            {'service': 'NHS Non-emergency', 'number': '111'}
+        ],
+        'default': [
+            {'service': 'International Emergency', 'number': '112'},
+            {'service': 'Local Police', 'number': 'Check locally'}
+        ]
+    }
+    
+    location_lower = location.lower()
+    for country in ['india', 'us', 'uk']:
+        if country in location_lower:
+            return emergency_numbers[country]
+    
+    return emergency_numbers['default']
+
+# --- EXTERNAL SERVICES ---
+# The AI provider is built lazily by ai_translator.get_default_translator.
+# Per-attempt (connect, read) timeout for Nominatim and total budget across retries
+NOMINATIM_TIMEOUT = (3.05, 10)
+NOMINATIM_DEADLINE = 20
+# Nominatim's usage policy allows one request per second, counted across all workers
+NOMINATIM_RATE = float(os.environ.get("NOMINATIM_RATE", "1"))
+# Hospital search results are shared by all workers for this long
+HOSPITAL_CACHE_TTL = 24 * 3600
+
+def _fetch_nominatim(url, params):
+    get_rate_limiter('nominatim', NOMINATIM_RATE).acquire(timeout=NOMINATIM_TIMEOUT[1])
+    resp = http_client.get(url, params=params, timeout=NOMINATIM_TIMEOUT)
+    resp.raise_for_status()
+    return resp.json()
+
+@timed('hospitals.get_nearby_hospitals')
+def get_nearby_hospitals(location_query):
+    cache_key = " ".join(location_query.lower().split())
+    cached = shared_cache.get('hospitals', cache_key)
+    if cached is not None:
+        return cached
+    try:
+        url = os.environ.get("NOMINATIM_URL", DEFAULT_NOMINATIM_URL)
+        params = {
+            "q": f"hospital near {location_query}",
+            "format": "json",
+            "limit": 15
+        }
+        results = resilient_call(
+            'nominatim', _fetch_nominatim, url, params,
+            deadline=NOMINATIM_DEADLINE,
+            transient=is_transient_http_error
+        )
+
+        if not results:
+            result = {"status": "ZERO_RESULTS", "results": []}
+            shared_cache.set('hospitals', cache_key, result, HOSPITAL_CACHE_TTL)
+            return result
+
+        hospitals = []
+        for h in results:
+            hospitals.append({
+                "name": h.get("display_name", "Unnamed Hospital"),
+                "lat": float(h["lat"]),
+                "lon": float(h["lon"])
+            })
+        result = {"status": "OK", "results": hospitals}
+        shared_cache.set('hospitals', cache_key, result, HOSPITAL_CACHE_TTL)
+        return result
+
+    except Exception as e:
+        return {"status": "ERROR", "error": str(e), "results": []}
+
+def get_disease_suggestion(symptoms, language=None):
+    """Get disease suggestions in `language`, or the session's current language"""
+    return get_disease_analysis(symptoms, language)['text']
+
+@timed('analysis.get_disease_suggestion')
+def get_disease_analysis(symptoms, language=None):
+    """Like get_disease_suggestion, with the prompt version and token usage (see AITranslator.analyze)"""
+    language = language or st.session_state.current_language
+    analysis, error = _disease_analysis(symptoms, language)
+    if error:
+        st.error(error)
+    return analysis
+
+def _disease_analysis(symptoms, language):
+    """get_disease_analysis without any UI, for worker threads; returns (analysis_result, error or None)"""
+    try:
+        ai_translator = get_default_translator(user_db)
+    except Exception as e:
+        return analysis_result(
+            lm.translate('api_not_configured', language, "Gemini API is not configured."), failed=True
+        ), f"Failed to configure Gemini API: {e}"
+    
+    return ai_translator.analyze(symptoms, language), None
+
+# --- SUBMISSIONS ---
+# Repeats of one analysis request (reruns, double clicks) within this many seconds share its result
+SUBMISSION_WINDOW = int(os.environ.get("SUBMISSION_WINDOW", "60"))
+_submissions = {}
+_submissions_lock = threading.Lock()
+_submission_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix='submission')
+
+def submission_key(username, symptoms, location, language):
+    """Key of a submission: the same user sending the same normalized input gets the same key"""
+    parts = [username, normalize_symptoms(symptoms).lower(), " ".join(location.lower().split()), language]
+    return hashlib.sha256("\x1f".join(parts).encode()).hexdigest()[:32]
+
+@timed('analysis.submit_analysis')
+def submit_analysis(username, symptoms, location, language=None):
+    """Analyze and save one submission; returns (analysis_result, saved).
+    
+    A repeat of the submission within SUBMISSION_WINDOW waits for the first
+    one's result instead of calling the model and saving again. The work runs
+    off the script thread, so a rerun that interrupts the page doesn't
+    abandon it; its errors are shown here, on the script thread. Other
+    processes are kept to one history row per SUBMISSION_WINDOW by
+    save_symptom_history, which checks for a recent row of the submission.
+    """
+    language = language or st.session_state.current_language
+    key = submission_key(username, symptoms, location, language)
+    now = time.time()
+    with _submissions_lock:
+        for stale in [k for k, (started, future) in _submissions.items() if future.done() and now - started > SUBMISSION_WINDOW]:
+            del _submissions[stale]
+        entry = _submissions.get(key)
+        duplicate = entry is not None
+        if not duplicate:
+            # Unique per save; the part before ':' identifies the submission
+            row_key = f"{key}:{int(now * 1000)}"
+            entry = _submissions[key] = (now, _submission_executor.submit(
+                _analyze_and_save, username, symptoms, location, language, row_key
+            ))
+    if duplicate:
+        increment('duplicate_submissions')
+    analysis, saved, error = entry[1].result()
+    if error:
+        st.error(error)
+    if analysis['failed']:
+        # Trying again after an error should really try again
+        with _submissions_lock:
+            if _submissions.get(key) is entry:
+                del _submissions[key]
+    return analysis, saved
+
+def _analyze_and_save(username, symptoms, location, language, row_key):
+    """Runs on a submission thread, where st.error shows nothing; returns (analysis, saved, error)"""
+    analysis, error = _disease_analysis(symptoms, language)
+    # Errors are kept in the history as before, but without the key so a retry is saved too
+    saved = save_symptom_search(
+        username, symptoms, analysis['text'], location, language,
+        submission_key=None if analysis['failed'] else row_key, submission_window=SUBMISSION_WINDOW
+    )
+    return analysis, saved, error
+
+@timed('analysis.analyze_batch')
+def analyze_symptom_batch(cases, progress=None):
+    """get_disease_analysis for a list of (symptoms, language) cases (see AITranslator.analyze_batch)"""
+    try:
+        ai_translator = get_default_translator(user_db)
+    except Exception as e:
+        st.error(f"Failed to configure Gemini API: {e}")
+        return [
+            analysis_result(lm.translate('api_not_configured', language, "Gemini API is not configured."), failed=True)
+            for _, language in cases
+        ]
+    
+    return ai_translator.analyze_batch(cases, progress=progress)
@@ -0,0 +1,67 @@
+# health_connect/session.py
+import streamlit as st
+
+from database import user_db
+
+# --- SESSION STATE PERSISTENCE ---
+def init_session_state():
+    """Initialize and persist session state"""
+    if 'logged_in' not in st.session_state:
+        st.session_state.logged_in = False
+    if 'current_user' not in st.session_state:
+        st.session_state.current_user = None
+    if 'is_admin' not in st.session_state:
+        st.session_state.is_admin = False
+    
+    # Initialize language if not set
+    if 'current_language' not in st.session_state:
+        st.session_state.current_language = 'en'
+    
+    # Try to restore from query parameters (for page refresh)
+    if not st.session_state.logged_in and 'username' in st.query_params:
+        username = st.query_params['username']
+        # Verify user still exists in database
+        if username == "admin":
+            st.session_state.current_user = username
+            st.session_state.logged_in = True
+            st.session_state.is_admin = True
+        elif user_db.user_exists(username):
+            st.session_state.current_user = username
+            st.session_state.logged_in = True
+            st.session_state.is_admin = False
+
+def set_session_persistence(username, is_admin=False):
+    """Set session persistence for page refresh"""
+    st.session_state.logged_in = True
+    st.session_state.current_user = username
+    st.session_state.is_admin = is_admin
+    st.query_params['username'] = username
+
+def clear_session_persistence():
+    """Clear session persistence on logout"""
+    st.session_state.logged_in = False
+    st.session_state.current_user = None
+    st.session_state.is_admin = False
+    if 'username' in st.query_params:
+        del st.query_params['username']
+
+# --- AUTHENTICATION FUNCTIONS ---
+def create_user(username, password, email=""):
+    success, message = user_db.create_user(username, password, email)
+    if success:
+        set_session_persistence(username)
+    return success, message
+
+def authenticate_user(username, password):
+    if username == "admin" and password == "admin123":
+        set_session_persistence(username, is_admin=True)
+        return True, "Admin login successful"
+    
+    success, message = user_db.authenticate_user(username, password)
+    if success:
+        set_session_persistence(username)
+    return success, message
+
+def logout_user():
+    clear_session_persistence()
+    st.rerun()
@@ -0,0 +1,56 @@
+# http_client.py
+import threading
+from http.cookiejar import DefaultCookiePolicy
+
+USER_AGENT = "HealthFinderApp/1.0"
+
+# (connect, read) timeout applied when a caller doesn't pass its own
+DEFAULT_TIMEOUT = (3.05, 10)
+
+POOL_CONNECTIONS = 10
+POOL_MAXSIZE = 20
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def _build_session():
+    # requests is imported on first use to keep it off the app's start-up path
+    import requests
+    from requests.adapters import HTTPAdapter
+
+    session = requests.Session()
+    session.headers.update({
+        "User-Agent": USER_AGENT,
+        "Accept-Encoding": "gzip, deflate",
+        "Connection": "keep-alive",
+    })
+    # Never keep cookies: the session is shared by every user of this process
+    session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+    adapter = HTTPAdapter(pool_connections=POOL_CONNECTIONS, pool_maxsize=POOL_MAXSIZE)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def get_session():
+    """Get the process-wide pooled HTTP session"""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = _build_session()
+    return _session
+
+
+def request(method, url, timeout=DEFAULT_TIMEOUT, **kwargs):
+    """Send a request over the shared session with a default timeout"""
+    return get_session().request(method, url, timeout=timeout, **kwargs)
+
+
+def get(url, params=None, **kwargs):
+    return request("GET", url, params=params, **kwargs)
+
+
+def post(url, data=None, json=None, **kwargs):
+    return request("POST", url, data=data, json=json, **kwargs)
@@ -0,0 +1,421 @@
+# jobs.py
+import hashlib
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from database import DB_PATH
+from metrics import timed
+from query_trace import connect
+
+JOB_WORKERS = int(os.environ.get('JOB_WORKERS', '2'))
+JOB_ARTIFACT_DIR = os.environ.get('JOB_ARTIFACT_DIR', 'job_artifacts')
+# Which app process runs a job; cluster.py gives every worker its own
+WORKER_ID = os.environ.get('HC_WORKER_ID', 'main')
+# Submissions beyond this many queued/running jobs are refused instead of piling up
+MAX_PENDING_JOBS = 20
+# Progress is written to the job table at most this often per job
+PROGRESS_INTERVAL = 0.5
+# History rows analyzed and written back per round of 'analyze_history'
+ANALYZE_HISTORY_CHUNK = 200
+
+ACTIVE_STATES = ('queued', 'running')
+
+_handlers = {}
+
+
+class JobCancelled(Exception):
+    """Raised inside a job handler once cancellation has been requested"""
+
+
+def job_handler(kind, label):
+    """Register a function as the handler for jobs of `kind`"""
+    def register(func):
+        _handlers[kind] = (label, func)
+        return func
+    return register
+
+
+def job_kinds():
+    return {kind: label for kind, (label, _) in _handlers.items()}
+
+
+class JobContext:
+    """Handed to a running job: progress reporting, cancellation checks and artifact paths"""
+
+    def __init__(self, runner, job_id, cancel_event):
+        self.runner = runner
+        self.job_id = job_id
+        self._cancel_event = cancel_event
+        self._last_progress = 0.0
+
+    @property
+    def cancelled(self):
+        return self._cancel_event.is_set()
+
+    def check_cancelled(self):
+        if self._cancel_event.is_set():
+            raise JobCancelled()
+
+    def progress(self, done, total=None, message=None):
+        """Record progress as done/total (or a 0-1 fraction); raises JobCancelled when cancelled"""
+        self.check_cancelled()
+        now = time.monotonic()
+        if now - self._last_progress < PROGRESS_INTERVAL and (total is None or done < total):
+            return
+        self._last_progress = now
+        fraction = done / total if total else done
+        self.runner._update(self.job_id, progress=min(max(fraction, 0.0), 1.0), message=message)
+        # Cancellation requested from another worker process
+        if self.runner._cancel_requested(self.job_id):
+            self._cancel_event.set()
+            self.check_cancelled()
+
+    def artifact_path(self, filename):
+        directory = os.path.join(self.runner.artifact_dir, str(self.job_id))
+        os.makedirs(directory, exist_ok=True)
+        return os.path.join(directory, filename)
+
+
+class JobRunner:
+    """In-process scheduler that runs admin jobs on a bounded worker pool.
+
+    Jobs are recorded in a `jobs` table next to the app data so their state,
+    progress and artifacts survive reruns and sessions. Jobs that were queued
+    or running when the process stopped are marked failed on start-up.
+    Every job is owned by the worker that runs it (`owner`); other workers
+    list it and cancel it through `cancel_requested`.
+    """
+
+    def __init__(self, db_path=DB_PATH, max_workers=JOB_WORKERS, artifact_dir=JOB_ARTIFACT_DIR, worker_id=WORKER_ID):
+        self.db_path = db_path
+        self.worker_id = worker_id
+        self.max_workers = max_workers
+        self.artifact_dir = artifact_dir
+        self._executor = None
+        self._ready = False
+        self._lock = threading.Lock()
+        self._cancel_events = {}
+        self._futures = {}
+
+    def get_connection(self):
+        return connect(self.db_path, check_same_thread=False, timeout=30)
+
+    def _ensure_ready(self):
+        if self._ready:
+            return
+        with self._lock:
+            if self._ready:
+                return
+            conn = self.get_connection()
+            try:
+                conn.execute('''
+                    CREATE TABLE IF NOT EXISTS jobs (
+                        id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        kind TEXT NOT NULL,
+                        params TEXT,
+                        status TEXT NOT NULL DEFAULT 'queued',
+                        progress REAL DEFAULT 0,
+                        message TEXT,
+                        artifact_path TEXT,
+                        error TEXT,
+                        submitted_by TEXT,
+                        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                        started_at TIMESTAMP,
+                        finished_at TIMESTAMP
+                    )
+                ''')
+                conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status)")
+                columns = [row[1] for row in conn.execute("PRAGMA table_info(jobs)").fetchall()]
+                if 'owner' not in columns:
+                    conn.execute("ALTER TABLE jobs ADD COLUMN owner TEXT")
+                if 'cancel_requested' not in columns:
+                    conn.execute("ALTER TABLE jobs ADD COLUMN cancel_requested INTEGER DEFAULT 0")
+                # Nothing survives a restart of this process; other workers' jobs are theirs to clean up
+                conn.execute('''
+                    UPDATE jobs SET status = 'failed', error = 'Interrupted by a restart',
+                                    finished_at = CURRENT_TIMESTAMP
+                    WHERE status IN ('queued', 'running') AND (owner = ? OR owner IS NULL)
+                ''', (self.worker_id,))
+                conn.commit()
+            finally:
+                conn.close()
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='job')
+            self._ready = True
+
+    def _update(self, job_id, **fields):
+        columns = ", ".join(f"{name} = ?" for name in fields)
+        conn = self.get_connection()
+        try:
+            conn.execute(f"UPDATE jobs SET {columns} WHERE id = ?", (*fields.values(), job_id))
+            conn.commit()
+        finally:
+            conn.close()
+
+    def submit(self, kind, params=None, submitted_by=None):
+        """Queue a job; returns (True, job_id) or (False, reason)"""
+        if kind not in _handlers:
+            return False, f"Unknown job type: {kind}"
+        self._ensure_ready()
+        with self._lock:
+            if len(self._futures) >= MAX_PENDING_JOBS:
+                return False, "Too many jobs are already queued, try again later"
+            conn = self.get_connection()
+            try:
+                cursor = conn.cursor()
+                cursor.execute(
+                    "INSERT INTO jobs (kind, params, submitted_by, owner) VALUES (?, ?, ?, ?)",
+                    (kind, json.dumps(params or {}), submitted_by, self.worker_id)
+                )
+                conn.commit()
+                job_id = cursor.lastrowid
+            finally:
+                conn.close()
+            cancel_event = threading.Event()
+            self._cancel_events[job_id] = cancel_event
+            self._futures[job_id] = self._executor.submit(self._run, job_id, kind, params or {}, cancel_event)
+        return True, job_id
+
+    def _run(self, job_id, kind, params, cancel_event):
+        label, handler = _handlers[kind]
+        context = JobContext(self, job_id, cancel_event)
+        try:
+            if self._cancel_requested(job_id):
+                cancel_event.set()
+            context.check_cancelled()
+            self._update(job_id, status='running', started_at=time.strftime('%Y-%m-%d %H:%M:%S'))
+            with timed(f'job.{kind}'):
+                result = handler(context, **params)
+            artifact, message = result if isinstance(result, tuple) else (result, None)
+            self._update(
+                job_id, status='succeeded', progress=1.0, message=message, artifact_path=artifact,
+                finished_at=time.strftime('%Y-%m-%d %H:%M:%S')
+            )
+        except JobCancelled:
+            self._update(job_id, status='cancelled', finished_at=time.strftime('%Y-%m-%d %H:%M:%S'))
+        except Exception as e:
+            self._update(job_id, status='failed', error=str(e), finished_at=time.strftime('%Y-%m-%d %H:%M:%S'))
+        finally:
+            with self._lock:
+                self._cancel_events.pop(job_id, None)
+                self._futures.pop(job_id, None)
+
+    def cancel(self, job_id):
+        """Request cancellation; queued jobs stop at once, running ones at their next progress check"""
+        with self._lock:
+            cancel_event = self._cancel_events.get(job_id)
+            future = self._futures.get(job_id)
+        if cancel_event is None:
+            return self._request_cancel(job_id)
+        cancel_event.set()
+        if future is not None and future.cancel():
+            with self._lock:
+                self._cancel_events.pop(job_id, None)
+                self._futures.pop(job_id, None)
+            self._update(job_id, status='cancelled', finished_at=time.strftime('%Y-%m-%d %H:%M:%S'))
+        return True
+
+    def _request_cancel(self, job_id):
+        """Flag a job run by another worker; it stops at its next progress report"""
+        self._ensure_ready()
+        conn = self.get_connection()
+        try:
+            cursor = conn.cursor()
+            cursor.execute(
+                "UPDATE jobs SET cancel_requested = 1 WHERE id = ? AND status IN ('queued', 'running')",
+                (job_id,)
+            )
+            conn.commit()
+            return cursor.rowcount > 0
+        finally:
+            conn.close()
+
+    def _cancel_requested(self, job_id):
+        conn = self.get_connection()
+        try:
+            row = conn.execute("SELECT cancel_requested FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            return bool(row and row[0])
+        finally:
+            conn.close()
+
+    def get_job(self, job_id):
+        jobs = self._select("WHERE id = ?", (job_id,))
+        return jobs[0] if jobs else None
+
+    def list_jobs(self, limit=50):
+        """Most recent jobs first"""
+        return self._select("ORDER BY id DESC LIMIT ?", (limit,))
+
+    def has_active_jobs(self):
+        """Whether any worker has a queued or running job"""
+        with self._lock:
+            if self._futures:
+                return True
+        return bool(self._select("WHERE status IN ('queued', 'running') LIMIT 1", ()))
+
+    def _select(self, clause, args):
+        self._ensure_ready()
+        conn = self.get_connection()
+        try:
+            cursor = conn.cursor()
+            cursor.execute(f'''
+                SELECT id, kind, params, status, progress, message, artifact_path, error,
+                       submitted_by, created_at, started_at, finished_at
+                FROM jobs {clause}
+            ''', args)
+            columns = [description[0] for description in cursor.description]
+            jobs = [dict(zip(columns, row)) for row in cursor.fetchall()]
+        finally:
+            conn.close()
+        for job in jobs:
+            job['params'] = json.loads(job['params'] or '{}')
+        return jobs
+
+
+# --- JOB TYPES ---
+@job_handler('export_table', "Export table")
+def export_table_job(job, table_name, format='csv'):
+    from database_admin import DatabaseAdmin
+
+    path = job.artifact_path(f"{table_name}.{format}")
+    rows = DatabaseAdmin(job.runner.db_path).export_to_file(
+        table_name, path, format, progress=lambda done, total: job.progress(done, total)
+    )
+    return path, f"{rows} rows exported"
+
+
+@job_handler('backup_database', "Backup database")
+def backup_database_job(job):
+    from database_admin import DatabaseAdmin
+
+    path = job.artifact_path(f"healthcare_app_backup_{time.strftime('%Y%m%d_%H%M%S')}.db")
+    DatabaseAdmin(job.runner.db_path).backup_to_file(
+        path, progress=lambda done, total: job.progress(done, total)
+    )
+    return path, "Backup created"
+
+
+@job_handler('system_report', "System report")
+def system_report_job(job):
+    from database_admin import DatabaseAdmin
+
+    stats = DatabaseAdmin(job.runner.db_path).get_database_stats()
+    job.progress(1.0)
+    path = job.artifact_path("system_report.json")
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({'generated_at': time.strftime('%Y-%m-%d %H:%M:%S'), **stats}, f, indent=2)
+    return path, "System report generated"
+
+
+@job_handler('gdpr_export', "GDPR export")
+def gdpr_export_job(job, usernames, since=None, until=None):
+    import shutil
+    import zipfile
+    from gdpr_export import GDPRExporter
+
+    # Same users and range map to the same directory, so resubmitting resumes an interrupted export
+    key = hashlib.sha1(json.dumps([sorted(usernames), since, until]).encode()).hexdigest()[:16]
+    out_dir = os.path.join(job.runner.artifact_dir, 'gdpr', key)
+    archives = GDPRExporter(out_dir, job.runner.db_path, since, until).export(
+        usernames, progress=lambda done, total: job.progress(done, total)
+    )
+    if not archives:
+        raise RuntimeError("None of the selected users exist")
+    if len(archives) == 1:
+        # Copied so a later export of the same user doesn't replace this job's result
+        archive = next(iter(archives.values()))
+        path = job.artifact_path(os.path.basename(archive))
+        shutil.copyfile(archive, path)
+        return path, "Export ready"
+    # The archives are already compressed
+    path = job.artifact_path("gdpr_export.zip")
+    with zipfile.ZipFile(path, 'w', compression=zipfile.ZIP_STORED) as bundle:
+        for archive in archives.values():
+            bundle.write(archive, os.path.basename(archive))
+    return path, f"{len(archives)} users exported"
+
+
+@job_handler('delete_user_data', "Delete patient data")
+def delete_user_data_job(job, usernames, soft=False):
+    # Tombstoned through the app's UserDatabase so cached views of these users are invalidated
+    from database import user_db
+    from deletion import DeletionEngine
+
+    job.check_cancelled()
+    deleted = [username for username in usernames if user_db.delete_user_data(username, soft=True)[0]]
+    if not deleted:
+        raise RuntimeError("None of the selected patients exist")
+    if soft:
+        return None, f"{len(deleted)} patients marked for deletion"
+    # One batched purge for all of them; a cancelled purge is finished by 'purge_deleted'
+    DeletionEngine(job.runner.db_path).purge(deleted, progress=lambda done, total: job.progress(done, total))
+    return None, f"{len(deleted)} patients deleted"
+
+
+@job_handler('purge_deleted', "Purge deleted patients")
+def purge_deleted_job(job):
+    from deletion import DeletionEngine
+
+    purged = DeletionEngine(job.runner.db_path).purge(progress=lambda done, total: job.progress(done, total))
+    return None, f"{purged} patients purged"
+
+
+@job_handler('compact_database', "Compact database")
+def compact_database_job(job):
+    from analysis_store import get_store
+    from deletion import DeletionEngine
+
+    # Analyses of purged or archived rows are only dropped here, before the space is reclaimed
+    removed = get_store(job.runner.db_path).collect_garbage()
+    job.check_cancelled()
+    DeletionEngine(job.runner.db_path).compact(progress=lambda done, total: job.progress(done, total))
+    return None, f"Database compacted, {removed} unused analyses removed"
+
+
+@job_handler('archive_history', "Archive old symptom history")
+def archive_history_job(job):
+    from retention import HistoryArchive
+
+    archive = HistoryArchive(job.runner.db_path)
+    moved = archive.archive(progress=lambda done, total: job.progress(done, total))
+    return None, f"{moved} rows older than {archive.cutoff()[:10]} archived"
+
+
+@job_handler('compress_history', "Compress stored analyses")
+def compress_history_job(job):
+    from analysis_store import get_store
+
+    converted = get_store(job.runner.db_path).compress_history(progress=lambda done, total: job.progress(done, total))
+    return None, f"{converted} analyses compressed"
+
+
+@job_handler('analyze_history', "Analyze imported symptom history")
+def analyze_history_job(job):
+    # Through the app's UserDatabase so cached history views pick up the new analyses
+    from database import user_db
+    from health_connect.services import analyze_symptom_batch
+
+    total = user_db.count_unanalyzed_history()
+    done = analyzed = last_id = 0
+    while True:
+        rows = user_db.get_unanalyzed_history(last_id, ANALYZE_HISTORY_CHUNK)
+        if not rows:
+            break
+        last_id = rows[-1][0]
+        results = analyze_symptom_batch(
+            [(symptoms, language or 'en') for _, symptoms, language in rows],
+            progress=lambda finished, _: job.progress(done + finished, total)
+        )
+        # Failed and fallback-provider cases stay unanalyzed for the next run
+        analyzed += user_db.set_history_analyses([
+            (history_id, result['text']) for (history_id, _, _), result in zip(rows, results)
+            if not result['failed'] and not result['degraded']
+        ])
+        done += len(rows)
+    return None, f"{analyzed} of {done} records analyzed"
+
+
+# Create global job runner
+job_runner = JobRunner()
@@ -3,6 +3,8 @@ import json
 import streamlit as st
 from typing import Dict, Any
 
+from metrics import timed
+
 class LanguageManager:
     def __init__(self):
         self.supported_languages = {
@@ -11,16 +13,22 @@ class LanguageManager:
             'pa': 'ਪੰਜਾਬੀ (Punjabi)'
         }
         self.translations = {}
-        self.load_translations()
     
     def load_translations(self):
         """Load all language files"""
-        try:
-            for lang_code in self.supported_languages.keys():
+        for lang_code in self.supported_languages.keys():
+            self.get_translations(lang_code)
+    
+    def get_translations(self, lang_code):
+        """Get one language's strings, parsing its file on first use"""
+        if lang_code not in self.translations:
+            try:
                 with open(f'locales/{lang_code}.json', 'r', encoding='utf-8') as f:
                     self.translations[lang_code] = json.load(f)
-        except Exception as e:
-            st.error(f"Error loading translations: {e}")
+            except Exception as e:
+                st.error(f"Error loading translations: {e}")
+                self.translations[lang_code] = {}
+        return self.translations[lang_code]
     
     def get_current_language(self):
         """Get current language from session state"""
@@ -33,17 +41,21 @@ class LanguageManager:
         if lang_code in self.supported_languages:
             st.session_state.current_language = lang_code
     
+    @timed('i18n.t')
     def t(self, key: str, default: str = None) -> str:
         """Get translation for key in current language"""
-        lang = self.get_current_language()
-        
+        return self.translate(key, self.get_current_language(), default)
+    
+    def translate(self, key: str, lang: str, default: str = None) -> str:
+        """Get translation for key in an explicit language (no session needed)"""
         # Fallback chain: current language -> English -> default
-        if lang in self.translations and key in self.translations[lang]:
-            return self.translations[lang][key]
-        elif 'en' in self.translations and key in self.translations['en']:
-            return self.translations['en'][key]
-        else:
-            return default or key
+        translations = self.get_translations(lang) if lang in self.supported_languages else {}
+        if key in translations:
+            return translations[key]
+        english = self.get_translations('en')
+        if key in english:
+            return english[key]
+        return default or key
     
     def get_blood_types(self):
         """Get blood types in current language"""
@@ -1,7 +1,13 @@
 # location_service.py
+import csv
+import ipaddress
+import os
+import threading
+from array import array
+from bisect import bisect_right
+from functools import lru_cache
+
 import streamlit as st
-import requests
-import json
 
 def get_current_location():
     """
@@ -46,25 +52,174 @@ def get_current_location():
     
     return st.session_state.user_location
 
-def get_location_by_ip():
+# Offline GeoIP range table, e.g. the DB-IP "IP to City Lite" CSV:
+# ip_start,ip_end,continent,country,stateprov,city,latitude,longitude
+GEOIP_DB_PATH = os.environ.get('GEOIP_DB_PATH', os.path.join('data', 'geoip.csv'))
+GEOIP_CACHE_SIZE = 4096
+# Proxies whose X-Forwarded-For / X-Real-Ip are believed: comma separated addresses or
+# networks. The default covers cluster.py's balancer, which reaches workers over loopback.
+TRUSTED_PROXIES = os.environ.get('TRUSTED_PROXIES', '127.0.0.1/32,::1/128')
+
+
+class GeoIPTable:
+    """Sorted, non-overlapping IP ranges searched with bisect.
+
+    Range bounds are kept in typed arrays (32-bit for IPv4) and point into a
+    deduplicated list of (lat, lon, city, country) tuples, so a table with
+    millions of ranges stays compact in memory.
     """
-    Fallback method: Get approximate location by IP address
+
+    def __init__(self):
+        self.starts = {4: array('I'), 6: []}
+        self.ends = {4: array('I'), 6: []}
+        self.location_ids = {4: array('I'), 6: array('I')}
+        self.locations = []
+
+    @classmethod
+    def from_csv(cls, path):
+        table = cls()
+        location_index = {}
+        rows = {4: [], 6: []}
+        with open(path, newline='', encoding='utf-8') as f:
+            for row in csv.reader(f):
+                if len(row) < 8:
+                    continue
+                try:
+                    start = ipaddress.ip_address(row[0])
+                    end = ipaddress.ip_address(row[1])
+                    location = (float(row[6]), float(row[7]), row[5], row[3])
+                except ValueError:
+                    continue  # header line or malformed row
+                if location not in location_index:
+                    location_index[location] = len(table.locations)
+                    table.locations.append(location)
+                rows[start.version].append((int(start), int(end), location_index[location]))
+
+        for version, version_rows in rows.items():
+            version_rows.sort()
+            for start, end, location_id in version_rows:
+                table.starts[version].append(start)
+                table.ends[version].append(end)
+                table.location_ids[version].append(location_id)
+        return table
+
+    def lookup(self, ip):
+        """Return (lat, lon, city, country) for an ipaddress object, or None"""
+        starts = self.starts[ip.version]
+        value = int(ip)
+        i = bisect_right(starts, value) - 1
+        if i < 0 or value > self.ends[ip.version][i]:
+            return None
+        return self.locations[self.location_ids[ip.version][i]]
+
+
+_geoip_table = None
+_geoip_lock = threading.Lock()
+
+
+def get_geoip_table():
+    """Load the GeoIP table once per process; None if no table is installed"""
+    global _geoip_table
+    if _geoip_table is None:
+        with _geoip_lock:
+            if _geoip_table is None:
+                if not os.path.exists(GEOIP_DB_PATH):
+                    return None
+                _geoip_table = GeoIPTable.from_csv(GEOIP_DB_PATH)
+    return _geoip_table
+
+
+def parse_networks(spec):
+    networks = []
+    for item in spec.split(','):
+        try:
+            networks.append(ipaddress.ip_network(item.strip(), strict=False))
+        except ValueError:
+            continue
+    return networks
+
+
+_trusted_networks = parse_networks(TRUSTED_PROXIES)
+
+
+def is_trusted_proxy(ip_string, networks=None):
+    try:
+        ip = ipaddress.ip_address(ip_string.strip())
+    except ValueError:
+        return False
+    return any(ip in network for network in (_trusted_networks if networks is None else networks))
+
+
+def resolve_client_ip(peer, forwarded_for=None, real_ip=None, networks=None):
+    """The client address, believing forwarding headers only as far as trusted proxies go.
+
+    X-Forwarded-For is read right to left: each hop was added by the proxy
+    before it, so the first address not in the trusted set is the client.
+    Anything a client writes into the header itself sits further left and
+    is never reached.
     """
+    if not peer or not is_trusted_proxy(peer, networks):
+        return peer
+    if forwarded_for:
+        hops = [hop.strip() for hop in forwarded_for.split(',') if hop.strip()]
+        for hop in reversed(hops):
+            if not is_trusted_proxy(hop, networks):
+                return hop
+        return hops[0] if hops else peer
+    if real_ip:
+        return real_ip.strip()
+    return peer
+
+
+def get_client_ip():
+    """Best-effort client IP for the current Streamlit session"""
+    return resolve_client_ip(
+        st.context.ip_address,
+        st.context.headers.get('X-Forwarded-For'),
+        st.context.headers.get('X-Real-Ip'),
+    )
+
+
+def lookup_ip_location(ip_string):
+    """Resolve an IP address to a location dict using the offline table"""
+    # Nothing is cached until the table is installed, so later lookups aren't stuck on None
+    if get_geoip_table() is None:
+        return None
+    return _lookup_ip_location(ip_string)
+
+
+@lru_cache(maxsize=GEOIP_CACHE_SIZE)
+def _lookup_ip_location(ip_string):
     try:
-        response = requests.get('http://ipinfo.io/json', timeout=5)
-        data = response.json()
-        loc = data.get('loc', '').split(',')
-        if len(loc) == 2:
-            return {
-                'lat': float(loc[0]),
-                'lon': float(loc[1]),
-                'city': data.get('city', ''),
-                'country': data.get('country', ''),
-                'method': 'ip'
-            }
-    except:
-        pass
-    return None
+        ip = ipaddress.ip_address(ip_string)
+    except ValueError:
+        return None
+    if not ip.is_global:
+        return None
+
+    match = get_geoip_table().lookup(ip)
+    if match is None:
+        return None
+    lat, lon, city, country = match
+    return {
+        'lat': lat,
+        'lon': lon,
+        'city': city,
+        'country': country,
+        'method': 'ip'
+    }
+
+def get_location_by_ip(ip_string=None):
+    """
+    Fallback method: Get approximate location of the client's IP address
+    """
+    if ip_string is None:
+        ip_string = get_client_ip()
+    if not ip_string:
+        return None
+    location = lookup_ip_location(ip_string)
+    # Hand out a copy so callers can't mutate the cached entry
+    return dict(location) if location else None
 
 def create_location_selector():
     """
@@ -0,0 +1,237 @@
+# metrics.py
+import functools
+import os
+import threading
+import time
+import weakref
+from bisect import bisect_left
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Upper bounds (seconds) of the latency histogram buckets; the last one is +Inf
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, float('inf'))
+
+METRICS_HOST = os.environ.get('METRICS_HOST', '127.0.0.1')
+METRICS_PORT = int(os.environ.get('METRICS_PORT', '9464'))  # 0 disables the endpoint
+
+PREFIX = 'healthconnect_operation'
+
+# Every thread records into its own shard, so the hot path never takes a lock.
+# Readers merge the shards; shards of finished threads (Streamlit starts a new
+# script thread per rerun) are folded into _retired.
+_local = threading.local()
+_shards = []
+_retired = {}
+_registry_lock = threading.Lock()
+_registrations = 0
+
+
+def _new_series():
+    # [bucket counts, sum of seconds, call count, error count]
+    return [[0] * len(BUCKETS), 0.0, 0, 0]
+
+
+def _merge_into(target, shard):
+    for name, (buckets, total, count, errors) in list(shard.items()):
+        series = target.setdefault(name, _new_series())
+        for i, value in enumerate(buckets):
+            series[0][i] += value
+        series[1] += total
+        series[2] += count
+        series[3] += errors
+
+
+def _retire_finished_shards():
+    """Fold shards of dead threads into _retired; caller holds _registry_lock"""
+    alive = []
+    for thread_ref, shard in _shards:
+        if thread_ref() is None or not thread_ref().is_alive():
+            _merge_into(_retired, shard)
+        else:
+            alive.append((thread_ref, shard))
+    _shards[:] = alive
+
+
+def _current_shard():
+    global _registrations
+    shard = getattr(_local, 'shard', None)
+    if shard is None:
+        shard = _local.shard = {}
+        with _registry_lock:
+            _shards.append((weakref.ref(threading.current_thread()), shard))
+            _registrations += 1
+            if _registrations % 64 == 0:
+                _retire_finished_shards()
+    return shard
+
+
+def observe(name, seconds, error=False):
+    """Record one call of `name` that took `seconds`"""
+    shard = _current_shard()
+    series = shard.get(name)
+    if series is None:
+        series = shard[name] = _new_series()
+    series[0][bisect_left(BUCKETS, seconds)] += 1
+    series[1] += seconds
+    series[2] += 1
+    if error:
+        series[3] += 1
+
+
+_counters = {}
+_counters_lock = threading.Lock()
+
+
+def increment(name, amount=1):
+    """Add to a plain counter, e.g. tokens used; exported as healthconnect_<name>_total"""
+    with _counters_lock:
+        _counters[name] = _counters.get(name, 0) + amount
+
+
+def counters():
+    with _counters_lock:
+        return dict(_counters)
+
+
+class timed:
+    """Time an operation, as a decorator or a context manager.
+
+        @timed('db.get_symptom_history')
+        def get_symptom_history(...): ...
+
+        with timed('gemini.generate'):
+            ...
+    """
+
+    def __init__(self, name):
+        self.name = name
+
+    def __call__(self, func):
+        name = self.name
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                result = func(*args, **kwargs)
+            except BaseException:
+                observe(name, time.perf_counter() - started, error=True)
+                raise
+            observe(name, time.perf_counter() - started)
+            return result
+        return wrapper
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        observe(self.name, time.perf_counter() - self.started, error=exc_type is not None)
+        return False
+
+
+def collect():
+    """Merge all shards into {name: [bucket counts, sum, count, errors]}"""
+    with _registry_lock:
+        _retire_finished_shards()
+        merged = {}
+        _merge_into(merged, _retired)
+        for _, shard in _shards:
+            _merge_into(merged, shard)
+    return merged
+
+
+def _quantile(buckets, count, q):
+    """Estimate a quantile from histogram buckets by linear interpolation"""
+    if not count:
+        return 0.0
+    rank = q * count
+    seen = 0
+    for i, value in enumerate(buckets):
+        if seen + value >= rank:
+            lower = BUCKETS[i - 1] if i else 0.0
+            upper = BUCKETS[i] if BUCKETS[i] != float('inf') else lower
+            return lower + (upper - lower) * ((rank - seen) / value if value else 0.0)
+        seen += value
+    return BUCKETS[-2]
+
+
+def snapshot():
+    """Per-operation summary rows for display"""
+    rows = []
+    for name, (buckets, total, count, errors) in sorted(collect().items()):
+        rows.append({
+            'operation': name,
+            'calls': count,
+            'errors': errors,
+            'mean_ms': round(total / count * 1000, 3) if count else 0.0,
+            'p50_ms': round(_quantile(buckets, count, 0.50) * 1000, 3),
+            'p95_ms': round(_quantile(buckets, count, 0.95) * 1000, 3),
+            'p99_ms': round(_quantile(buckets, count, 0.99) * 1000, 3),
+        })
+    return rows
+
+
+def _format_bound(bound):
+    return '+Inf' if bound == float('inf') else repr(bound)
+
+
+def render_prometheus():
+    """Render all metrics in the Prometheus text exposition format"""
+    lines = [
+        f'# HELP {PREFIX}_duration_seconds Latency of instrumented operations.',
+        f'# TYPE {PREFIX}_duration_seconds histogram',
+    ]
+    series = sorted(collect().items())
+    for name, (buckets, total, count, _) in series:
+        cumulative = 0
+        for bound, value in zip(BUCKETS, buckets):
+            cumulative += value
+            lines.append(f'{PREFIX}_duration_seconds_bucket{{operation="{name}",le="{_format_bound(bound)}"}} {cumulative}')
+        lines.append(f'{PREFIX}_duration_seconds_sum{{operation="{name}"}} {total}')
+        lines.append(f'{PREFIX}_duration_seconds_count{{operation="{name}"}} {count}')
+    lines.append(f'# HELP {PREFIX}_errors_total Instrumented operations that raised.')
+    lines.append(f'# TYPE {PREFIX}_errors_total counter')
+    for name, (_, _, _, errors) in series:
+        lines.append(f'{PREFIX}_errors_total{{operation="{name}"}} {errors}')
+    for name, value in sorted(counters().items()):
+        lines.append(f'# TYPE healthconnect_{name}_total counter')
+        lines.append(f'healthconnect_{name}_total {value}')
+    return '\n'.join(lines) + '\n'
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split('?')[0] != '/metrics':
+            self.send_error(404)
+            return
+        body = render_prometheus().encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+_server = None
+_server_started = False
+_server_lock = threading.Lock()
+
+
+def start_metrics_server(host=METRICS_HOST, port=METRICS_PORT):
+    """Serve /metrics from a daemon thread; safe to call on every rerun"""
+    global _server, _server_started
+    if not port:
+        return None
+    with _server_lock:
+        if not _server_started:
+            _server_started = True
+            try:
+                _server = ThreadingHTTPServer((host, port), _MetricsHandler)
+            except OSError as e:
+                print(f"Metrics endpoint not started on {host}:{port}: {e}")
+                return None
+            threading.Thread(target=_server.serve_forever, name='metrics-server', daemon=True).start()
+    return _server
@@ -0,0 +1,201 @@
+# model_providers.py
+"""
+Text generation backends behind AITranslator.
+
+A provider has a `name` and Gemini's call shape:
+generate_content(prompt, request_options=None, generation_config=None)
+returns a response with `.text` and `.usage_metadata`. AI_PROVIDER picks
+one:
+
+- gemini: Google Gemini (GEMINI_API_KEY, optional GEMINI_API_ENDPOINT)
+- stub: deterministic local stand-in for load tests and offline runs;
+  STUB_LATENCY_MS delays every call and STUB_FAILURE_RATE makes that share
+  of prompts fail with a transient error (which ones depends on STUB_SEED)
+- rules: no model at all, a short note built from the severity keywords
+
+AI_FALLBACK_PROVIDER (rules by default, empty to disable) replaces the main
+provider when it can't be set up, e.g. without an API key, and answers the
+calls it fails, so analysis keeps working, degraded, without the network.
+Local providers read the symptoms back out of the prompts AITranslator
+renders, so they exercise the same single and batch paths as Gemini.
+"""
+import hashlib
+import json
+import os
+import time
+
+import streamlit as st
+
+from ai_translator import BATCH_PROMPT, GEMINI_MODEL_NAME, LANGUAGE_NAMES, PROMPTS, generation_profile
+from language_manager import language_manager as lm
+from severity import SEVERITY_MESSAGES, matched_keywords, severity_level
+
+AI_PROVIDER = os.environ.get("AI_PROVIDER", "gemini")
+AI_FALLBACK_PROVIDER = os.environ.get("AI_FALLBACK_PROVIDER", "rules")
+STUB_LATENCY_MS = float(os.environ.get("STUB_LATENCY_MS", "0"))
+STUB_FAILURE_RATE = float(os.environ.get("STUB_FAILURE_RATE", "0"))
+STUB_SEED = int(os.environ.get("STUB_SEED", "0"))
+
+STUB_CONDITIONS = [
+    "Common Cold", "Influenza (Flu)", "Migraine", "Gastroenteritis", "Tension Headache",
+    "Sinusitis", "Allergies", "Dehydration", "Viral Infection", "Food Poisoning",
+]
+# Deliberately without the AI disclaimer, so semantic_cache never serves these
+RULES_NOTE = (
+    "*Note:* The AI analysis is unavailable right now. This is automatic guidance "
+    "based on keywords only, not a diagnosis. Please consult a qualified healthcare provider."
+)
+STUB_NOTE = (
+    "*Note:* This is placeholder text from a test stub, not an AI analysis and not a diagnosis. "
+    "Please consult a qualified healthcare provider."
+)
+
+
+class ProviderUnavailable(Exception):
+    """A provider failed in a way worth retrying"""
+
+
+class Usage:
+    def __init__(self, prompt_token_count, candidates_token_count):
+        self.prompt_token_count = prompt_token_count
+        self.candidates_token_count = candidates_token_count
+        self.total_token_count = prompt_token_count + candidates_token_count
+
+
+class ModelResponse:
+    def __init__(self, text, usage_metadata=None):
+        self.text = text
+        self.usage_metadata = usage_metadata
+
+
+def _between(prompt, template):
+    """What was rendered into {symptoms} of `template`, or None if the prompt isn't from it"""
+    head, tail = template.text.split("{symptoms}")
+    if prompt.startswith(head) and prompt.endswith(tail):
+        return prompt[len(head):len(prompt) - len(tail)]
+    return None
+
+
+def prompt_cases(prompt):
+    """(id, symptoms, language) of every case in a prompt rendered by ai_translator"""
+    batch = _between(prompt, BATCH_PROMPT)
+    if batch is not None:
+        languages = {name: code for code, name in LANGUAGE_NAMES.items()}
+        return [(case['id'], case['symptoms'], languages.get(case['language'], 'en')) for case in json.loads(batch)]
+    for language, template in PROMPTS.items():
+        symptoms = _between(prompt, template)
+        if symptoms is not None:
+            return [(None, symptoms, language)]
+    return [(None, prompt, 'en')]
+
+
+class LocalProvider:
+    """Answers single and batch prompts by writing one analysis per case"""
+    name = None
+
+    def generate_content(self, prompt, request_options=None, generation_config=None):
+        cases = prompt_cases(prompt)
+        if (generation_config or {}).get('response_mime_type') == 'application/json':
+            text = json.dumps([
+                {'id': case_id, 'analysis': self.analysis(symptoms, language)}
+                for case_id, symptoms, language in cases
+            ], ensure_ascii=False)
+        else:
+            _, symptoms, language = cases[0]
+            text = self.analysis(symptoms, language)
+        return ModelResponse(text, self.usage(prompt, text))
+
+    def analysis(self, symptoms, language):
+        raise NotImplementedError
+
+    def usage(self, prompt, text):
+        return None
+
+
+class GeminiProvider:
+    name = 'gemini'
+
+    def __init__(self, api_key=None, endpoint=None):
+        import google.generativeai as genai
+
+        # Headless workers (API, cluster) may get the key from the environment
+        api_key = api_key or os.environ.get("GEMINI_API_KEY") or st.secrets["GEMINI_API_KEY"]
+        # Optional endpoint override, e.g. a local stub server when benchmarking
+        endpoint = endpoint or os.environ.get("GEMINI_API_ENDPOINT")
+        if endpoint:
+            genai.configure(api_key=api_key, transport="rest", client_options={"api_endpoint": endpoint})
+        else:
+            genai.configure(api_key=api_key)
+        self.model = genai.GenerativeModel(GEMINI_MODEL_NAME, generation_config=generation_profile())
+
+    def generate_content(self, prompt, **kwargs):
+        return self.model.generate_content(prompt, **kwargs)
+
+
+class StubProvider(LocalProvider):
+    """Gemini-shaped replies picked from a fixed list by a hash of the case.
+
+    The same case always gets the same text, and whether a prompt fails
+    depends only on the prompt and the seed, never on the order of calls
+    across threads, so load test runs can be compared. A failing prompt
+    fails on every retry and ends on the fallback provider.
+    """
+    name = 'stub'
+
+    def __init__(self, latency_ms=STUB_LATENCY_MS, failure_rate=STUB_FAILURE_RATE, seed=STUB_SEED):
+        self.latency = latency_ms / 1000
+        self.failure_rate = failure_rate
+        self.seed = seed
+
+    def fails(self, prompt):
+        """Whether `prompt` is one of the failure_rate share that fail"""
+        digest = hashlib.sha256(f"{self.seed}:{prompt}".encode()).digest()
+        return int.from_bytes(digest[:8], 'big') / 2 ** 64 < self.failure_rate
+
+    def generate_content(self, prompt, request_options=None, generation_config=None):
+        if self.latency:
+            time.sleep(self.latency)
+        if self.fails(prompt):
+            raise ProviderUnavailable("Injected stub failure")
+        return super().generate_content(prompt, request_options, generation_config)
+
+    def analysis(self, symptoms, language):
+        digest = hashlib.sha256(f"{language}:{symptoms}".encode()).digest()
+        conditions = list(dict.fromkeys(STUB_CONDITIONS[byte % len(STUB_CONDITIONS)] for byte in digest[:3]))
+        lines = [f"* **{condition}:** A possible cause of {symptoms[:80]}." for condition in conditions]
+        return (
+            "Here are some possible medical conditions based on the symptoms you described:\n\n"
+            + "\n".join(lines) + "\n\n" + STUB_NOTE
+        )
+
+    def usage(self, prompt, text):
+        # Roughly four characters per token
+        return Usage(len(prompt) // 4, len(text) // 4)
+
+
+class RuleBasedProvider(LocalProvider):
+    """The severity message and matched keywords; no network, no tokens"""
+    name = 'rules'
+
+    def analysis(self, symptoms, language):
+        critical, warning = matched_keywords(symptoms)
+        lines = [lm.translate(SEVERITY_MESSAGES[severity_level(symptoms)], language)]
+        if critical:
+            lines.append(f"* **Needs urgent attention:** {', '.join(critical)}")
+        if warning:
+            lines.append(f"* **Needs a doctor's attention:** {', '.join(warning)}")
+        lines.append(RULES_NOTE)
+        return "\n\n".join(lines)
+
+
+PROVIDERS = {
+    'gemini': GeminiProvider,
+    'stub': StubProvider,
+    'rules': RuleBasedProvider,
+}
+
+
+def create_provider(name):
+    if name not in PROVIDERS:
+        raise ValueError(f"Unknown AI provider: {name}")
+    return PROVIDERS[name]()
@@ -0,0 +1,160 @@
+# query_trace.py
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict, deque
+
+logger = logging.getLogger('healthcare.sql')
+
+# Statements slower than this are logged together with their query plan
+SLOW_QUERY_MS = float(os.environ.get('SLOW_QUERY_MS', '100'))
+SLOW_LOG_SIZE = 200
+# Query plans kept for slow statements; the least recently logged beyond this are dropped
+PLAN_CACHE_SIZE = 256
+
+_stats = {}
+_slow_log = deque(maxlen=SLOW_LOG_SIZE)
+_plans = OrderedDict()
+_lock = threading.Lock()
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_sql(sql):
+    """Collapse whitespace and replace literals so equivalent statements aggregate"""
+    sql = _STRING_LITERAL.sub('?', sql)
+    sql = _NUMBER_LITERAL.sub('?', sql)
+    return _WHITESPACE.sub(' ', sql).strip()
+
+
+def _record(statement, seconds, rows, executed=True):
+    with _lock:
+        stats = _stats.get(statement)
+        if stats is None:
+            stats = _stats[statement] = {'calls': 0, 'total_ms': 0.0, 'max_ms': 0.0, 'rows': 0}
+        if executed:
+            stats['calls'] += 1
+        stats['total_ms'] += seconds * 1000
+        stats['max_ms'] = max(stats['max_ms'], seconds * 1000)
+        stats['rows'] += max(rows, 0)
+
+
+def _explain(connection, sql, parameters):
+    # A plain cursor, so explaining a statement isn't itself traced
+    cursor = sqlite3.Cursor(connection)
+    try:
+        cursor.execute(f"EXPLAIN QUERY PLAN {sql}", parameters)
+        return [row[-1] for row in cursor.fetchall()]
+    except sqlite3.Error as e:
+        return [f"plan unavailable: {e}"]
+    finally:
+        cursor.close()
+
+
+def _plan(connection, statement, sql, parameters):
+    """Query plan of a statement, explained once and then cached"""
+    with _lock:
+        plan = _plans.get(statement)
+        if plan is not None:
+            _plans.move_to_end(statement)
+            return plan
+    if not sql.lstrip().upper().startswith(('SELECT', 'UPDATE', 'DELETE', 'INSERT', 'WITH')):
+        return None
+    plan = _explain(connection, sql, parameters)
+    with _lock:
+        _plans[statement] = plan
+        _plans.move_to_end(statement)
+        while len(_plans) > PLAN_CACHE_SIZE:
+            _plans.popitem(last=False)
+    return plan
+
+
+def _log_slow(connection, statement, sql, parameters, seconds):
+    # executemany() has no single parameter set to explain with
+    plan = None if parameters is None else _plan(connection, statement, sql, parameters)
+    entry = {
+        'at': time.strftime('%Y-%m-%d %H:%M:%S'),
+        'duration_ms': round(seconds * 1000, 3),
+        'statement': statement,
+        'plan': plan or [],
+    }
+    with _lock:
+        _slow_log.append(entry)
+    logger.warning("slow query (%.1f ms): %s | plan: %s", entry['duration_ms'], statement, '; '.join(entry['plan']))
+
+
+class TracingCursor(sqlite3.Cursor):
+    """Cursor that times every statement and the rows fetched from it"""
+
+    _statement = None
+
+    def execute(self, sql, parameters=()):
+        started = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            seconds = time.perf_counter() - started
+            self._statement = normalize_sql(sql)
+            _record(self._statement, seconds, self.rowcount)
+            if seconds * 1000 >= SLOW_QUERY_MS:
+                _log_slow(self.connection, self._statement, sql, parameters, seconds)
+
+    def executemany(self, sql, seq_of_parameters):
+        started = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            seconds = time.perf_counter() - started
+            self._statement = normalize_sql(sql)
+            _record(self._statement, seconds, self.rowcount)
+            if seconds * 1000 >= SLOW_QUERY_MS:
+                _log_slow(self.connection, self._statement, sql, None, seconds)
+
+    def _timed_fetch(self, fetch, *args):
+        started = time.perf_counter()
+        result = fetch(*args)
+        if self._statement is not None:
+            rows = len(result) if isinstance(result, list) else int(result is not None)
+            _record(self._statement, time.perf_counter() - started, rows, executed=False)
+        return result
+
+    def fetchone(self):
+        return self._timed_fetch(super().fetchone)
+
+    def fetchmany(self, size=None):
+        return self._timed_fetch(super().fetchmany, self.arraysize if size is None else size)
+
+    def fetchall(self):
+        return self._timed_fetch(super().fetchall)
+
+
+class TracingConnection(sqlite3.Connection):
+    def cursor(self, factory=TracingCursor):
+        return super().cursor(factory)
+
+
+def connect(database, **kwargs):
+    """sqlite3.connect with every statement traced"""
+    return sqlite3.connect(database, factory=TracingConnection, **kwargs)
+
+
+def query_stats():
+    """Per-statement aggregates, slowest total time first"""
+    with _lock:
+        rows = [dict(statement=statement, **stats) for statement, stats in _stats.items()]
+    for row in rows:
+        row['mean_ms'] = round(row['total_ms'] / row['calls'], 3) if row['calls'] else 0.0
+        row['total_ms'] = round(row['total_ms'], 3)
+        row['max_ms'] = round(row['max_ms'], 3)
+    return sorted(rows, key=lambda row: row['total_ms'], reverse=True)
+
+
+def slow_queries():
+    """Most recent slow statements with their query plans, newest first"""
+    with _lock:
+        return list(reversed(_slow_log))
@@ -0,0 +1,135 @@
+# rerun_profiler.py
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter, deque
+from contextlib import contextmanager
+
+# Fraction of reruns to profile; 0 keeps the profiler off until an admin enables it
+SAMPLE_RATE = float(os.environ.get('PROFILE_RERUNS_SAMPLE_RATE', '0'))
+SAMPLE_INTERVAL = float(os.environ.get('PROFILE_INTERVAL_MS', '5')) / 1000
+BUFFER_SIZE = 50
+TOP_N = 25
+
+_settings = {'sample_rate': SAMPLE_RATE}
+_profiles = deque(maxlen=BUFFER_SIZE)
+_lock = threading.Lock()
+
+
+def configure(sample_rate):
+    """Change the sampled fraction of reruns for the whole process at runtime"""
+    _settings['sample_rate'] = min(max(float(sample_rate), 0.0), 1.0)
+
+
+def sample_rate():
+    return _settings['sample_rate']
+
+
+def _frame_name(frame):
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+def _collapse(frame):
+    names = []
+    while frame is not None:
+        names.append(_frame_name(frame))
+        frame = frame.f_back
+    return ';'.join(reversed(names))
+
+
+class _StackSampler(threading.Thread):
+    """Periodically captures the stack of one thread as collapsed stack strings"""
+
+    def __init__(self, thread_id, interval):
+        super().__init__(name='rerun-profiler', daemon=True)
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is not None:
+                self.stacks[_collapse(frame)] += 1
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+
+
+@contextmanager
+def profile_rerun(label='rerun'):
+    """Sample the current thread's stacks for a fraction of reruns"""
+    rate = _settings['sample_rate']
+    if rate <= 0 or random.random() >= rate:
+        yield
+        return
+
+    sampler = _StackSampler(threading.get_ident(), SAMPLE_INTERVAL)
+    started = time.perf_counter()
+    sampler.start()
+    try:
+        yield
+    finally:
+        sampler.stop()
+        with _lock:
+            _profiles.append({
+                'label': label,
+                'at': time.strftime('%Y-%m-%d %H:%M:%S'),
+                'duration_ms': round((time.perf_counter() - started) * 1000, 3),
+                'stacks': sampler.stacks,
+            })
+
+
+def _merged_stacks():
+    merged = Counter()
+    with _lock:
+        for profile in _profiles:
+            merged.update(profile['stacks'])
+    return merged
+
+
+def hottest_functions(top_n=TOP_N):
+    """Functions with the most self samples across buffered reruns"""
+    self_samples = Counter()
+    total_samples = Counter()
+    stacks = _merged_stacks()
+    for stack, count in stacks.items():
+        frames = stack.split(';')
+        self_samples[frames[-1]] += count
+        for name in set(frames):
+            total_samples[name] += count
+    all_samples = sum(stacks.values()) or 1
+    hottest = sorted(total_samples, key=lambda name: (self_samples[name], total_samples[name]), reverse=True)
+    return [
+        {
+            'function': name,
+            'self_samples': self_samples[name],
+            'total_samples': total_samples[name],
+            'self_pct': round(100 * self_samples[name] / all_samples, 1),
+            'total_pct': round(100 * total_samples[name] / all_samples, 1),
+        }
+        for name in hottest[:top_n]
+    ]
+
+
+def collapsed_stacks():
+    """Buffered samples in the collapsed format read by flamegraph.pl and speedscope"""
+    return '\n'.join(f"{stack} {count}" for stack, count in _merged_stacks().most_common()) + '\n'
+
+
+def recent_profiles():
+    with _lock:
+        return [
+            {'label': p['label'], 'at': p['at'], 'duration_ms': p['duration_ms'], 'samples': sum(p['stacks'].values())}
+            for p in reversed(_profiles)
+        ]
+
+
+def clear():
+    with _lock:
+        _profiles.clear()
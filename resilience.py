@@ -0,0 +1,121 @@
+# resilience.py
+import threading
+import time
+
+from tenacity import (
+    Retrying,
+    retry_if_exception,
+    stop_after_attempt,
+    stop_after_delay,
+    wait_random_exponential,
+)
+
+
+class CircuitOpenError(Exception):
+    """Raised when a call is rejected because its upstream circuit is open"""
+
+
+class CircuitBreaker:
+    """Process-wide circuit breaker for a single upstream service.
+
+    After `failure_threshold` consecutive transient failures the circuit opens
+    and calls fail fast for `reset_timeout` seconds. One trial call is then let
+    through (half-open); its outcome closes or re-opens the circuit.
+    """
+
+    def __init__(self, name, failure_threshold=5, reset_timeout=30.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = 'closed'
+        self.failures = 0
+        self.opened_at = 0.0
+        self._lock = threading.Lock()
+
+    def allow_request(self):
+        """Return True if a call may be attempted right now"""
+        with self._lock:
+            if self.state == 'closed':
+                return True
+            if self.state == 'open' and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.state = 'half_open'
+                return True
+            return False
+
+    def retry_after(self):
+        """Seconds until an open circuit lets a trial call through"""
+        with self._lock:
+            if self.state != 'open':
+                return 0.0
+            return max(0.0, self.reset_timeout - (time.monotonic() - self.opened_at))
+
+    def record_success(self):
+        with self._lock:
+            self.state = 'closed'
+            self.failures = 0
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == 'half_open' or self.failures >= self.failure_threshold:
+                self.state = 'open'
+                self.opened_at = time.monotonic()
+
+
+# Breakers live at module level so every Streamlit session in this process
+# shares the same view of upstream health.
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+
+def get_breaker(name, failure_threshold=5, reset_timeout=30.0):
+    """Get (or create) the shared circuit breaker for an upstream"""
+    with _breakers_lock:
+        breaker = _breakers.get(name)
+        if breaker is None:
+            breaker = CircuitBreaker(name, failure_threshold, reset_timeout)
+            _breakers[name] = breaker
+        return breaker
+
+
+def is_transient_http_error(exc):
+    """Timeouts, connection errors, 429 and 5xx responses are worth retrying"""
+    import requests
+
+    if isinstance(exc, (requests.Timeout, requests.ConnectionError)):
+        return True
+    if isinstance(exc, requests.HTTPError) and exc.response is not None:
+        return exc.response.status_code == 429 or exc.response.status_code >= 500
+    return False
+
+
+def resilient_call(name, func, *args, attempts=3, deadline=30.0,
+                   transient=lambda exc: True, **kwargs):
+    """Call `func` behind the `name` circuit breaker with jittered retries.
+
+    `func` must enforce its own per-attempt timeout; `deadline` bounds the
+    total time spent retrying. Only exceptions for which `transient(exc)` is
+    true are retried and counted against the breaker.
+    """
+    breaker = get_breaker(name)
+    if not breaker.allow_request():
+        raise CircuitOpenError(
+            f"{name} is temporarily unavailable, retry in {breaker.retry_after():.0f}s"
+        )
+
+    retrying = Retrying(
+        stop=stop_after_attempt(attempts) | stop_after_delay(deadline),
+        wait=wait_random_exponential(multiplier=0.5, max=4),
+        retry=retry_if_exception(transient),
+        reraise=True,
+    )
+    try:
+        result = retrying(func, *args, **kwargs)
+    except Exception as e:
+        if transient(e):
+            breaker.record_failure()
+        else:
+            breaker.record_success()
+        raise
+    breaker.record_success()
+    return result
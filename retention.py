@@ -0,0 +1,264 @@
+# retention.py
+"""
+Retention for symptom_history.
+
+Rows older than HISTORY_RETENTION_DAYS are moved out of the live table
+into one SQLite database per month under HISTORY_ARCHIVE_DIR
+(symptom_history_2024_01.db, ...), so the live table and its indexes stay
+small. Reads that need the full history (GDPR exports, admin search) go
+through HistoryArchive.user_history / search, which union the live table
+with the archives, newest first.
+
+    python retention.py --days 180
+"""
+import argparse
+import glob
+import os
+import re
+import time
+from datetime import datetime, timedelta
+
+from analysis_store import analysis_sql, get_store
+from database import BUMP_VERSION_SQL, DB_PATH, version_bumps
+from metrics import timed
+from query_trace import connect
+
+RETENTION_DAYS = int(os.environ.get('HISTORY_RETENTION_DAYS', '180'))
+ARCHIVE_DIR = os.environ.get('HISTORY_ARCHIVE_DIR', 'history_archive')
+BATCH_SIZE = 1000
+# Same reasoning as deletion.BATCH_PAUSE: let waiting writers in between batches
+BATCH_PAUSE = 0.02
+
+ARCHIVE_COLUMNS = [
+    'id', 'user_id', 'symptoms', 'severity', 'suggested_conditions',
+    'location_searched', 'created_at', 'language',
+]
+_ARCHIVE_NAME = re.compile(r'symptom_history_(\d{4})_(\d{2})\.db$')
+
+
+def select_columns(live):
+    """ARCHIVE_COLUMNS for a SELECT; the live table keeps analyses in analysis_texts"""
+    return ", ".join(
+        f"{analysis_sql()} AS suggested_conditions" if live and column == 'suggested_conditions' else column
+        for column in ARCHIVE_COLUMNS
+    )
+
+
+class HistoryArchive:
+    def __init__(self, db_path=DB_PATH, archive_dir=ARCHIVE_DIR, retention_days=RETENTION_DAYS):
+        self.db_path = db_path
+        self.archive_dir = archive_dir
+        self.retention_days = retention_days
+
+    def get_connection(self):
+        return connect(self.db_path, check_same_thread=False, timeout=30, isolation_level=None)
+
+    # --- ARCHIVE FILES ---
+    def archive_path(self, month):
+        """Archive database for a 'YYYY-MM' month"""
+        return os.path.join(self.archive_dir, f"symptom_history_{month.replace('-', '_')}.db")
+
+    def archive_months(self, since=None, until=None):
+        """Archived months as 'YYYY-MM', newest first, optionally only those overlapping [since, until)"""
+        months = []
+        for path in glob.glob(os.path.join(self.archive_dir, 'symptom_history_*.db')):
+            match = _ARCHIVE_NAME.search(path)
+            if not match:
+                continue
+            month = f"{match.group(1)}-{match.group(2)}"
+            if (since and month < since[:7]) or (until and month > until[:7]):
+                continue
+            months.append(month)
+        return sorted(months, reverse=True)
+
+    def _open_archive(self, month, create=False):
+        path = self.archive_path(month)
+        if not create and not os.path.exists(path):
+            return None
+        os.makedirs(self.archive_dir, exist_ok=True)
+        conn = connect(path, check_same_thread=False, timeout=30)
+        if create:
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS symptom_history (
+                    id INTEGER PRIMARY KEY,
+                    user_id INTEGER,
+                    symptoms TEXT,
+                    severity TEXT,
+                    suggested_conditions BLOB,
+                    location_searched TEXT,
+                    created_at TIMESTAMP,
+                    language TEXT
+                )
+            ''')
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_symptom_history_user ON symptom_history (user_id)")
+        return conn
+
+    # --- ARCHIVING ---
+    def cutoff(self):
+        return (datetime.now() - timedelta(days=self.retention_days)).strftime('%Y-%m-%d %H:%M:%S')
+
+    @timed('retention.archive')
+    def archive(self, progress=None, batch_size=BATCH_SIZE):
+        """Move rows older than the retention period into their monthly archives.
+
+        Each batch is committed to its archives before it is deleted from the
+        live table, and archive inserts ignore ids already present, so an
+        interrupted run loses nothing and can simply be run again. The delete
+        bumps the owners' symptom_history data versions in the same
+        transaction, so cached histories (see session_cache.py) drop the rows.
+        Returns the number of rows moved.
+        """
+        cutoff = self.cutoff()
+        conn = self.get_connection()
+        archives = {}
+        try:
+            cursor = conn.cursor()
+            cursor.execute("SELECT COUNT(*) FROM symptom_history WHERE created_at < ?", (cutoff,))
+            total = cursor.fetchone()[0]
+            moved = 0
+            last_id = 0
+            while moved < total:
+                # Analyses are copied still compressed; their dictionaries stay in the live database
+                cursor.execute(f'''
+                    SELECT {select_columns(live=True)} FROM symptom_history
+                    WHERE id > ? AND created_at < ?
+                    ORDER BY id LIMIT ?
+                ''', (last_id, cutoff, batch_size))
+                rows = cursor.fetchall()
+                if not rows:
+                    break
+                by_month = {}
+                for row in rows:
+                    by_month.setdefault(str(row[6])[:7], []).append(row)
+                for month, month_rows in by_month.items():
+                    archive = archives.get(month)
+                    if archive is None:
+                        archive = archives[month] = self._open_archive(month, create=True)
+                    with archive:
+                        archive.executemany(
+                            f"INSERT OR IGNORE INTO symptom_history VALUES ({', '.join('?' for _ in ARCHIVE_COLUMNS)})",
+                            month_rows
+                        )
+                user_ids = sorted({row[1] for row in rows})
+                cursor.execute("BEGIN IMMEDIATE")
+                cursor.executemany("DELETE FROM symptom_history WHERE id = ?", [(row[0],) for row in rows])
+                cursor.execute(
+                    f"SELECT username FROM users WHERE id IN ({', '.join('?' for _ in user_ids)})", user_ids
+                )
+                usernames = [username for (username,) in cursor.fetchall()]
+                cursor.executemany(BUMP_VERSION_SQL, version_bumps(usernames, 'symptom_history'))
+                cursor.execute("COMMIT")
+                moved += len(rows)
+                last_id = rows[-1][0]
+                if progress:
+                    progress(moved, total)
+                time.sleep(BATCH_PAUSE)
+            return moved
+        finally:
+            for archive in archives.values():
+                archive.close()
+            conn.close()
+
+    # --- UNION READS ---
+    def _sources(self, since=None, until=None):
+        """(name, connection factory) for the live table and every archive overlapping [since, until)"""
+        yield 'live', lambda: connect(self.db_path, check_same_thread=False)
+        for month in self.archive_months(since, until):
+            yield month, lambda month=month: self._open_archive(month)
+
+    def _user_ids(self, usernames):
+        conn = connect(self.db_path, check_same_thread=False)
+        try:
+            cursor = conn.cursor()
+            ids = {}
+            for username in usernames:
+                cursor.execute("SELECT id FROM users WHERE username = ? AND deleted_at IS NULL", (username,))
+                row = cursor.fetchone()
+                if row:
+                    ids[row[0]] = username
+            return ids
+        finally:
+            conn.close()
+
+    def _query(self, where, args, since=None, until=None, limit=None):
+        """Rows of symptom_history matching `where` across live and archived data, newest first"""
+        if since:
+            where += " AND created_at >= ?"
+            args = (*args, since)
+        if until:
+            where += " AND created_at < ?"
+            args = (*args, until)
+        remaining = limit
+        store = get_store(self.db_path)
+        for name, open_source in self._sources(since, until):
+            conn = open_source()
+            if conn is None:
+                continue
+            try:
+                cursor = conn.cursor()
+                cursor.execute(f'''
+                    SELECT {select_columns(live=name == 'live')} FROM symptom_history
+                    WHERE {where} ORDER BY created_at DESC, id DESC
+                    {"LIMIT ?" if remaining is not None else ""}
+                ''', (*args, remaining) if remaining is not None else args)
+                for row in cursor:
+                    record = dict(zip(ARCHIVE_COLUMNS, row))
+                    record['suggested_conditions'] = store.decode(record['suggested_conditions'])
+                    yield record
+                    if remaining is not None:
+                        remaining -= 1
+            finally:
+                conn.close()
+            if remaining is not None and remaining <= 0:
+                return
+
+    @timed('retention.user_history')
+    def user_history(self, username, since=None, until=None, limit=None):
+        """All of one user's symptom history, live and archived, newest first"""
+        user_ids = self._user_ids([username])
+        if not user_ids:
+            return
+        yield from self._query("user_id = ?", (next(iter(user_ids)),), since, until, limit)
+
+    @timed('retention.search')
+    def search(self, text, username=None, since=None, until=None, limit=100):
+        """Symptom history whose symptoms or location contain `text`, newest first"""
+        where, args = "(instr(lower(symptoms), ?) > 0 OR instr(lower(location_searched), ?) > 0)", (text.lower(), text.lower())
+        if username is not None:
+            user_ids = self._user_ids([username])
+            if not user_ids:
+                return []
+            where += " AND user_id = ?"
+            args = (*args, next(iter(user_ids)))
+        return list(self._query(where, args, since, until, limit))
+
+    def purge_users(self, user_ids):
+        """Delete the archived rows of the given users (used when their data is purged)"""
+        for month in self.archive_months():
+            conn = self._open_archive(month)
+            if conn is None:
+                continue
+            try:
+                with conn:
+                    conn.executemany("DELETE FROM symptom_history WHERE user_id = ?", [(user_id,) for user_id in user_ids])
+            finally:
+                conn.close()
+
+
+# Create global archive
+history_archive = HistoryArchive()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db", default=DB_PATH)
+    parser.add_argument("--archive-dir", default=ARCHIVE_DIR)
+    parser.add_argument("--days", type=int, default=RETENTION_DAYS, help="keep this many days in the live table")
+    args = parser.parse_args()
+
+    archive = HistoryArchive(args.db, args.archive_dir, args.days)
+    print(f"Moved {archive.archive()} rows older than {archive.cutoff()} to {args.archive_dir}")
+
+
+if __name__ == "__main__":
+    main()
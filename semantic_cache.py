@@ -0,0 +1,190 @@
+# semantic_cache.py
+import re
+import threading
+import zlib
+
+import numpy as np
+
+from severity import matched_keywords
+
+# Hashed character n-gram embedding: cheap, deterministic and language-agnostic,
+# so it works the same for English, Hindi and Punjabi symptom text.
+EMBEDDING_DIM = 1024
+NGRAM_SIZES = (3, 4)
+
+# Cosine similarity above which two symptom descriptions may be the same case;
+# same_words() then decides. Reworded and reordered queries score 0.88-1.0.
+SIMILARITY_THRESHOLD = 0.85
+# Past queries indexed; the least recently used beyond this are forgotten
+MAX_ENTRIES = 10000
+
+# Only responses that came back from the model intact carry the prompted disclaimer;
+# error messages and "API not configured" notices never do and are not reused.
+RESPONSE_MARKER = "I am an AI assistant and not a medical professional"
+
+# Words that turn a symptom around ("no fever", "बुखार नहीं"); n-grams barely see them
+NEGATIONS = {
+    'no', 'not', 'without', 'never', 'none', 'nor', 'denies', 'deny', 'negative',
+    "don't", 'dont', "doesn't", 'doesnt', "isn't", 'isnt', "can't", 'cant', 'cannot',
+    "haven't", 'havent', "hasn't", 'hasnt', "didn't", 'didnt',
+    'नहीं', 'न', 'ना', 'बिना', 'मत',
+    'ਨਹੀਂ', 'ਨਾ', 'ਬਿਨਾਂ', 'ਬਿਨਾ', 'ਮਤ',
+}
+NUMBER_PATTERN = re.compile(r'\d+(?:[.,/:]\d+)*')
+# Filler that doesn't change the case; every other word has to be in both queries
+STOP_WORDS = {
+    'a', 'an', 'the', 'i', "i'm", 'im', "i've", 'ive', 'me', 'my', 'am', 'is', 'are', 'was', 'been',
+    'have', 'has', 'had', 'having', 'and', 'also', 'with', 'of', 'some', 'very', 'really', 'got',
+    'feel', 'feeling', 'it', 'its', 'since', 'for', 'from', 'to', 'in', 'on', 'at', 'bit',
+    'और', 'है', 'हैं', 'था', 'मुझे', 'मेरे', 'मेरा', 'मेरी', 'से', 'का', 'की', 'के', 'में', 'भी', 'हो', 'रहा', 'रही',
+    'ਅਤੇ', 'ਹੈ', 'ਹਨ', 'ਸੀ', 'ਮੈਨੂੰ', 'ਮੇਰੇ', 'ਮੇਰਾ', 'ਮੇਰੀ', 'ਤੋਂ', 'ਦਾ', 'ਦੀ', 'ਦੇ', 'ਵਿੱਚ', 'ਵੀ', 'ਰਿਹਾ', 'ਰਹੀ',
+}
+
+
+def normalize_text(text):
+    """Case, spacing and surrounding punctuation removed; words, negations and numbers kept"""
+    return re.sub(r'\s+', ' ', text.lower()).strip(" .,;:!?")
+
+
+def words(text):
+    """The words of a query: lowercase, split on spaces and punctuation"""
+    return re.findall(r"[^\s.,;:!?()]+", normalize_text(text))
+
+
+def content_words(text):
+    """The words of a query that describe the case, in order"""
+    return tuple(word for word in words(text) if word not in STOP_WORDS)
+
+
+def _close(a, b):
+    """Same word, or one typo apart in a word of five letters or more"""
+    if a == b:
+        return True
+    if min(len(a), len(b)) < 5 or abs(len(a) - len(b)) > 1:
+        return False
+    if len(a) > len(b):
+        a, b = b, a
+    i = 0
+    while i < len(a) and a[i] == b[i]:
+        i += 1
+    # One substitution, or one letter inserted in the longer word
+    return a[i + 1:] == b[i + 1:] if len(a) == len(b) else a[i:] == b[i + 1:]
+
+
+def same_words(first, second):
+    """Whether every content word of each query has a match in the other"""
+    return (
+        all(any(_close(word, other) for other in second) for word in first)
+        and all(any(_close(word, other) for other in first) for word in second)
+    )
+
+
+def guard(symptoms, language):
+    """What two queries must share to be served from each other.
+
+    Cosine similarity of n-grams can't tell "chest pain" from "no chest pain",
+    "BP 180/110" from "BP 120/80" or "fever" from "high fever", so the
+    language, the negation words, the numbers and the severity keywords have
+    to match exactly.
+    """
+    text = normalize_text(symptoms)
+    critical, warning = matched_keywords(text)
+    return (
+        language,
+        tuple(sorted({word for word in words(text) if word in NEGATIONS})),
+        tuple(sorted(set(NUMBER_PATTERN.findall(text)))),
+        tuple(critical), tuple(warning),
+    )
+
+
+def guard_id(symptoms, language):
+    return zlib.crc32(repr(guard(symptoms, language)).encode('utf-8'))
+
+
+def embed(text):
+    """Embed text as an L2-normalised vector of hashed character n-grams"""
+    vector = np.zeros(EMBEDDING_DIM, dtype=np.float32)
+    padded = f" {' '.join(content_words(text))} "
+    for n in NGRAM_SIZES:
+        for i in range(len(padded) - n + 1):
+            vector[zlib.crc32(padded[i:i + n].encode('utf-8')) % EMBEDDING_DIM] += 1.0
+    norm = np.linalg.norm(vector)
+    if norm:
+        vector /= norm
+    return vector
+
+
+class SemanticCache:
+    """Near-duplicate lookup of past analyses stored in symptom_history.
+
+    Keeps one embedding row per past query in a NumPy matrix and compares a new
+    query against all of them with a single matrix-vector product. Only rows
+    with the same guard() as the query are candidates, and a candidate above
+    the threshold is served only if it has the same content words give or
+    take a typo: filler, word order and spelling slips are forgiven, a changed
+    negation, number, warning sign or body part ("left knee", "right knee")
+    is not. Row ids and content words are held in memory; the analysis text
+    itself is read back from the database.
+    """
+
+    def __init__(self, db, threshold=SIMILARITY_THRESHOLD, max_entries=MAX_ENTRIES):
+        self.db = db
+        self.threshold = threshold
+        self.max_entries = max_entries
+        capacity = min(64, max_entries)
+        self.vectors = np.zeros((capacity, EMBEDDING_DIM), dtype=np.float32)
+        self.history_ids = np.zeros(capacity, dtype=np.int64)
+        self.guards = np.zeros(capacity, dtype=np.int64)
+        # Lookup clock tick at which each row was added or last served
+        self.used = np.zeros(capacity, dtype=np.int64)
+        self.words = [()] * capacity
+        self.size = 0
+        self.clock = 0
+        self.last_id = 0
+        self._lock = threading.Lock()
+
+    def _append(self, history_id, symptoms, language):
+        capacity = len(self.history_ids)
+        if self.size == capacity and capacity < self.max_entries:
+            capacity = min(capacity * 2, self.max_entries)
+            self.vectors = np.resize(self.vectors, (capacity, EMBEDDING_DIM))
+            self.history_ids = np.resize(self.history_ids, capacity)
+            self.guards = np.resize(self.guards, capacity)
+            self.used = np.resize(self.used, capacity)
+            self.words += [()] * (capacity - len(self.words))
+        # Once full, the least recently used row is overwritten
+        slot = self.size if self.size < capacity else int(np.argmin(self.used))
+        self.clock += 1
+        self.vectors[slot] = embed(symptoms)
+        self.history_ids[slot] = history_id
+        self.guards[slot] = guard_id(symptoms, language)
+        self.words[slot] = content_words(symptoms)
+        self.used[slot] = self.clock
+        self.size = min(self.size + 1, capacity)
+
+    def refresh(self):
+        """Index analyses saved since the last refresh"""
+        rows = self.db.get_analyses_since(self.last_id, RESPONSE_MARKER, limit=self.max_entries)
+        for history_id, symptoms, language in rows:
+            self._append(history_id, symptoms, language)
+            self.last_id = history_id
+
+    def lookup(self, symptoms, language):
+        """Return a stored analysis for a near-identical query, or None"""
+        with self._lock:
+            self.refresh()
+            if not self.size:
+                return None
+            similarities = self.vectors[:self.size] @ embed(symptoms)
+            similarities[self.guards[:self.size] != guard_id(symptoms, language)] = -1.0
+            query_words = content_words(symptoms)
+            candidates = np.flatnonzero(similarities >= self.threshold)
+            for best in candidates[np.argsort(-similarities[candidates])]:
+                if same_words(query_words, self.words[best]):
+                    break
+            else:
+                return None
+            self.clock += 1
+            self.used[best] = self.clock
+            history_id = int(self.history_ids[best])
+        return self.db.get_analysis_text(history_id)
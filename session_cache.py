@@ -0,0 +1,33 @@
+# session_cache.py
+import time
+
+import streamlit as st
+
+CACHE_KEY = '_data_cache'
+
+
+def cached_read(db, name, username, loader, *args, ttl=None):
+    """Return loader(*args), reusing this session's copy while the data is unchanged.
+
+    Entries are keyed by `name`, `username` and `args` and tagged with the
+    database's data version for that user's `name` section (the global version
+    when username is None). Writes through UserDatabase, in any process, bump
+    exactly the sections they touch, so the next rerun reloads only those;
+    otherwise a rerun costs one primary-key lookup of the version. `ttl`
+    additionally expires entries whose result depends on the clock.
+    """
+    version = db.data_version(username, name)
+    cache = st.session_state.setdefault(CACHE_KEY, {})
+    key = (name, username, args)
+    entry = cache.get(key)
+    now = time.monotonic()
+    if entry is not None and entry[0] == version and (ttl is None or now - entry[1] < ttl):
+        return entry[2]
+
+    value = loader(*args)
+    cache[key] = (version, now, value)
+    return value
+
+
+def clear_session_cache():
+    st.session_state.pop(CACHE_KEY, None)
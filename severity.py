@@ -0,0 +1,35 @@
+# severity.py
+"""Keyword rules for how urgent a symptom description sounds"""
+
+CRITICAL_KEYWORDS = [
+    'chest pain', 'heart attack', 'stroke', 'difficulty breathing',
+    'severe bleeding', 'unconscious', 'choking', 'severe burn',
+    'poisoning', 'severe allergic reaction', 'cannot breathe',
+    'heavy bleeding', 'sudden paralysis', 'seizure'
+]
+WARNING_KEYWORDS = ['high fever', 'persistent vomiting', 'severe pain', 'head injury']
+
+# Translation key of the message shown for each level
+SEVERITY_MESSAGES = {'HIGH': 'urgent_warning', 'MEDIUM': 'medium_warning', 'LOW': 'non_emergency'}
+
+
+def matched_keywords(symptoms):
+    """(critical, warning) keywords found in the symptoms"""
+    symptoms_lower = symptoms.lower()
+    return (
+        [keyword for keyword in CRITICAL_KEYWORDS if keyword in symptoms_lower],
+        [keyword for keyword in WARNING_KEYWORDS if keyword in symptoms_lower],
+    )
+
+
+def severity_level(symptoms):
+    symptoms_lower = symptoms.lower()
+    for critical in CRITICAL_KEYWORDS:
+        if critical in symptoms_lower:
+            return "HIGH"
+
+    for warning in WARNING_KEYWORDS:
+        if warning in symptoms_lower:
+            return "MEDIUM"
+
+    return "LOW"
@@ -0,0 +1,167 @@
+# shared_cache.py
+"""
+State shared by every app and API process on one machine.
+
+Module-level caches (lru_cache, the process-wide breakers) are per process;
+when the app runs as several workers (see cluster.py) anything that must be
+seen by all of them lives here instead, in one small SQLite file in WAL
+mode (SHARED_CACHE_PATH):
+
+- SharedCache: a key/value cache with expiry, e.g. geocoding results
+- SharedRateLimiter: a token bucket, e.g. Nominatim's one request per second
+
+The AI response cache needs nothing extra: SemanticCache indexes analyses
+stored in symptom_history, which every worker already shares.
+"""
+import json
+import os
+import threading
+import time
+
+from metrics import timed
+from query_trace import connect
+
+SHARED_CACHE_PATH = os.environ.get('SHARED_CACHE_PATH', 'shared_cache.db')
+# Expired entries are deleted on roughly one write in this many
+PURGE_EVERY = 200
+
+
+class RateLimitExceeded(Exception):
+    """Raised when no rate limit token became available in time"""
+
+
+class _SharedStore:
+    """One connection per thread to the shared SQLite file"""
+
+    def __init__(self, path=SHARED_CACHE_PATH):
+        self.path = path
+        self._local = threading.local()
+        self._ready = False
+        self._ready_lock = threading.Lock()
+
+    def connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            # Autocommit; the few multi-statement updates open their own transaction
+            conn = self._local.conn = connect(self.path, timeout=30, isolation_level=None)
+            if not self._ready:
+                with self._ready_lock:
+                    if not self._ready:
+                        self._create_tables(conn)
+                        self._ready = True
+        return conn
+
+    def _create_tables(self, conn):
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS cache_entries (
+                namespace TEXT NOT NULL,
+                key TEXT NOT NULL,
+                value TEXT NOT NULL,
+                expires_at REAL NOT NULL,
+                PRIMARY KEY (namespace, key)
+            ) WITHOUT ROWID
+        ''')
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS rate_limits (
+                name TEXT PRIMARY KEY,
+                tokens REAL NOT NULL,
+                updated_at REAL NOT NULL
+            )
+        ''')
+
+
+class SharedCache(_SharedStore):
+    """JSON values with a time-to-live, visible to every process using the same file"""
+
+    def __init__(self, path=SHARED_CACHE_PATH):
+        super().__init__(path)
+        self._writes = 0
+
+    @timed('shared_cache.get')
+    def get(self, namespace, key):
+        """The cached value, or None if missing or expired"""
+        row = self.connection().execute(
+            "SELECT value FROM cache_entries WHERE namespace = ? AND key = ? AND expires_at > ?",
+            (namespace, key, time.time())
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    @timed('shared_cache.set')
+    def set(self, namespace, key, value, ttl):
+        conn = self.connection()
+        now = time.time()
+        conn.execute(
+            "INSERT OR REPLACE INTO cache_entries (namespace, key, value, expires_at) VALUES (?, ?, ?, ?)",
+            (namespace, key, json.dumps(value, ensure_ascii=False), now + ttl)
+        )
+        self._writes += 1
+        if self._writes % PURGE_EVERY == 0:
+            conn.execute("DELETE FROM cache_entries WHERE expires_at <= ?", (now,))
+
+    def clear(self, namespace):
+        self.connection().execute("DELETE FROM cache_entries WHERE namespace = ?", (namespace,))
+
+
+class SharedRateLimiter(_SharedStore):
+    """Token bucket shared by all processes: `rate` tokens per second, at most `burst` saved up.
+
+    A rate of 0 disables the limit.
+    """
+
+    def __init__(self, name, rate, burst=1, path=SHARED_CACHE_PATH):
+        super().__init__(path)
+        self.name = name
+        self.rate = rate
+        self.burst = burst
+
+    def _try_acquire(self):
+        """Take a token if one is available; returns seconds to wait otherwise (0 on success)"""
+        conn = self.connection()
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT tokens, updated_at FROM rate_limits WHERE name = ?", (self.name,)).fetchone()
+            tokens = self.burst if row is None else min(self.burst, row[0] + (now - row[1]) * self.rate)
+            wait = 0.0 if tokens >= 1 else (1 - tokens) / self.rate
+            if not wait:
+                tokens -= 1
+            conn.execute(
+                "INSERT OR REPLACE INTO rate_limits (name, tokens, updated_at) VALUES (?, ?, ?)",
+                (self.name, tokens, now)
+            )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return wait
+
+    @timed('shared_cache.rate_limit')
+    def acquire(self, timeout=10.0):
+        """Block until a token is taken; raises RateLimitExceeded after `timeout` seconds"""
+        if not self.rate:
+            return
+        deadline = time.monotonic() + timeout
+        while True:
+            wait = self._try_acquire()
+            if not wait:
+                return
+            if time.monotonic() + wait > deadline:
+                raise RateLimitExceeded(f"{self.name} rate limit: no slot within {timeout:.0f}s")
+            time.sleep(wait)
+
+
+# Create global shared cache
+shared_cache = SharedCache()
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(name, rate, burst=1):
+    """Get (or create) this process's handle on the shared `name` rate limiter"""
+    with _limiters_lock:
+        limiter = _limiters.get(name)
+        if limiter is None:
+            limiter = _limiters[name] = SharedRateLimiter(name, rate, burst)
+        return limiter
@@ -0,0 +1,36 @@
+# tests/conftest.py
+import os
+import sys
+import tempfile
+
+import pytest
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+_scratch = tempfile.mkdtemp(prefix="healthcare_tests_")
+
+# The modules open their global databases from these at import; keep them off the real files
+os.environ.setdefault("HEALTHCARE_DB_PATH", os.path.join(_scratch, "healthcare_app.db"))
+os.environ.setdefault("SHARED_CACHE_PATH", os.path.join(_scratch, "shared_cache.db"))
+os.environ.setdefault("JOB_ARTIFACT_DIR", os.path.join(_scratch, "job_artifacts"))
+os.environ.setdefault("METRICS_PORT", "0")
+os.environ.setdefault("NOMINATIM_RATE", "0")
+os.environ.setdefault("AI_PROVIDER", "stub")
+
+sys.path.insert(0, REPO_DIR)
+# locales/ is resolved relative to the working directory
+os.chdir(REPO_DIR)
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / "healthcare_app.db")
+
+
+@pytest.fixture
+def user_database(db_path):
+    from database import UserDatabase
+
+    db = UserDatabase(db_path)
+    db.conn  # create the schema now
+    yield db
+    db.conn.close()
@@ -0,0 +1,128 @@
+# tests/test_ai_translator.py
+import json
+
+import pytest
+
+from ai_translator import (
+    DISCLAIMER, PROMPTS, AITranslator, PromptTemplate, get_prompt, normalize_symptoms, parse_batch_reply, render_batch,
+)
+from metrics import counters
+from model_providers import prompt_cases
+
+
+def test_normalize_symptoms_collapses_whitespace_and_control_characters():
+    assert normalize_symptoms("  dry\tcough\n\nand\x00 fever \x7f ") == "dry cough and fever"
+
+
+def test_normalize_symptoms_drops_double_quotes():
+    assert normalize_symptoms('pain "here" and\'there\'') == "pain here and'there'"
+
+
+def test_normalize_symptoms_cuts_at_a_word_boundary():
+    assert normalize_symptoms("headache with high fever", max_chars=16) == "headache with…"
+    assert normalize_symptoms("a" * 20, max_chars=8) == "a" * 8 + "…"
+    assert normalize_symptoms("short", max_chars=8) == "short"
+
+
+def test_prompt_template_renders_symptoms_and_disclaimer():
+    template = PromptTemplate('en', 7, """
+        Analyze: "{symptoms}"
+        {disclaimer}
+    """)
+    assert template.version == 7
+    assert template.render("dry cough") == f'Analyze: "dry cough"\n{DISCLAIMER}'
+
+
+def test_prompt_template_needs_a_placeholder():
+    with pytest.raises(ValueError):
+        PromptTemplate('en', 1, "No placeholder here")
+
+
+@pytest.mark.parametrize("language", sorted(PROMPTS))
+def test_every_language_prompt_renders(language):
+    prompt = get_prompt(language).render("dry cough")
+    assert '"dry cough"' in prompt
+    assert prompt.endswith(DISCLAIMER)
+    assert "{" not in prompt
+
+
+def test_unknown_language_gets_the_english_prompt():
+    assert get_prompt('fr') is PROMPTS['en']
+
+
+# --- BATCHES ---
+
+def test_parse_batch_reply():
+    assert parse_batch_reply('[{"id": 0, "analysis": " Cold "}, {"id": 1, "analysis": "Flu"}]') == {0: "Cold", 1: "Flu"}
+
+
+def test_parse_batch_reply_inside_a_code_fence():
+    reply = 'Here you go:\n```json\n[{"id": 0, "analysis": "Cold"}]\n```'
+    assert parse_batch_reply(reply) == {0: "Cold"}
+
+
+def test_parse_batch_reply_keeps_the_well_formed_cases():
+    reply = json.dumps([
+        {"id": 0, "analysis": "Cold"},
+        {"id": "1", "analysis": "Flu"},
+        {"id": 2, "analysis": "  "},
+        {"id": 3},
+        "Migraine",
+        {"id": 4, "analysis": "Sinusitis"},
+    ])
+    assert parse_batch_reply(reply) == {0: "Cold", 4: "Sinusitis"}
+
+
+@pytest.mark.parametrize("reply", [
+    "", "not json", '[{"id": 0, "analysis": "Cold"', '{"id": 0, "analysis": "Cold"}', "[1, 2", "null",
+])
+def test_parse_batch_reply_of_malformed_json(reply):
+    assert parse_batch_reply(reply) == {}
+
+
+class ScriptedProvider:
+    """Answers batch prompts for all cases but the `skipped` ones; single prompts always"""
+    name = 'scripted'
+
+    def __init__(self, skipped=()):
+        self.skipped = set(skipped)
+        self.prompts = []
+
+    def generate_content(self, prompt, request_options=None, generation_config=None):
+        self.prompts.append(prompt)
+        cases = prompt_cases(prompt)
+        if (generation_config or {}).get('response_mime_type') == 'application/json':
+            text = json.dumps([
+                {'id': case_id, 'analysis': f"batch: {symptoms}"}
+                for case_id, symptoms, _ in cases if symptoms not in self.skipped
+            ])
+        else:
+            text = f"single: {cases[0][1]}"
+        return type('Response', (), {'text': text, 'usage_metadata': None})()
+
+
+class HitEverythingCache:
+    def lookup(self, symptoms, language):
+        return f"cached: {symptoms}"
+
+
+def test_cases_missing_from_a_batch_reply_are_retried_alone():
+    provider = ScriptedProvider(skipped={"fever"})
+    retries = counters().get('gemini_batch_retries', 0)
+    results = AITranslator(provider).analyze_batch(
+        [("cough", "en"), ("fever", "en"), ("rash", "hi"), ("cough", "en")], batch_size=8
+    )
+    assert [result['text'] for result in results] == ["batch: cough", "single: fever", "batch: rash", "batch: cough"]
+    assert not any(result['failed'] for result in results)
+    # One batch prompt for the three distinct cases, one single prompt for the retry
+    assert provider.prompts[0] == render_batch([("cough", "en"), ("fever", "en"), ("rash", "hi")])
+    assert len(provider.prompts) == 2
+    assert counters()['gemini_batch_retries'] == retries + 1
+
+
+def test_batches_skip_the_semantic_cache():
+    translator = AITranslator(ScriptedProvider(), HitEverythingCache())
+    assert translator.analyze("cough", "en")['cached']
+    results = translator.analyze_batch([("cough", "en"), ("fever", "en")])
+    assert [result['text'] for result in results] == ["batch: cough", "batch: fever"]
+    assert not any(result['cached'] for result in results)
@@ -0,0 +1,46 @@
+# tests/test_analysis_store.py
+import threading
+
+from analysis_store import get_store
+from query_trace import connect
+
+
+def test_store_keeps_one_body_per_text(user_database, db_path):
+    store = get_store(db_path)
+    conn = connect(db_path)
+    cursor = conn.cursor()
+    first = store.store(cursor, "Rest and drink fluids.")
+    assert store.store(cursor, "Rest and drink fluids.") == first
+    assert store.store(cursor, "See a doctor.") != first
+    conn.commit()
+    cursor.execute("SELECT COUNT(*) FROM analysis_texts")
+    assert cursor.fetchone()[0] == 2
+    conn.close()
+
+
+def test_garbage_collection_waits_for_a_stored_body_to_be_referenced(user_database, db_path):
+    user_database.create_user("alice", "secret123")
+    store = get_store(db_path)
+    conn = connect(db_path, timeout=30)
+    cursor = conn.cursor()
+    # A body left over from a deleted row, which the collector is about to remove
+    store.store(cursor, "Rest and drink fluids.")
+    conn.commit()
+    analysis_id = store.store(cursor, "Rest and drink fluids.")
+
+    collector = threading.Thread(target=store.collect_garbage)
+    collector.start()
+    collector.join(0.3)
+    assert collector.is_alive()  # blocked by the open transaction
+
+    cursor.execute(
+        "INSERT INTO symptom_history (user_id, symptoms, severity, analysis_id) "
+        "SELECT id, 'cough', 'LOW', ? FROM users WHERE username = 'alice'",
+        (analysis_id,)
+    )
+    conn.commit()
+    collector.join(10)
+    assert not collector.is_alive()
+    cursor.execute("SELECT COUNT(*) FROM analysis_texts WHERE id = ?", (analysis_id,))
+    assert cursor.fetchone()[0] == 1
+    conn.close()
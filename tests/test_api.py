@@ -0,0 +1,84 @@
+# tests/test_api.py
+import base64
+import json
+import uuid
+
+import pytest
+from tornado.testing import AsyncHTTPTestCase
+
+from ai_translator import analysis_result
+from health_connect import api
+
+
+class APITest(AsyncHTTPTestCase):
+    def get_app(self):
+        return api.make_app()
+
+    def setUp(self):
+        super().setUp()
+        from database import user_db
+
+        self.username = f"api_{uuid.uuid4().hex[:8]}"
+        assert user_db.create_user(self.username, "secret123")[0]
+
+    def headers(self, password):
+        headers = {"Content-Type": "application/json"}
+        if password:
+            credentials = base64.b64encode(f"{self.username}:{password}".encode()).decode()
+            headers["Authorization"] = f"Basic {credentials}"
+        return headers
+
+    def post(self, path, payload, password="secret123"):
+        response = self.fetch(path, method="POST", body=json.dumps(payload),
+                              headers=self.headers(password), raise_error=False)
+        return response.code, json.loads(response.body)
+
+    def get(self, path, password="secret123"):
+        response = self.fetch(path, headers=self.headers(password), raise_error=False)
+        return response.code, json.loads(response.body)
+
+    def test_analysis_requires_credentials(self):
+        for path, payload in [
+            ("/api/analysis", {"symptoms": "dry cough"}),
+            ("/api/analysis/batch", {"cases": [{"symptoms": "dry cough"}]}),
+        ]:
+            assert self.post(path, payload, password=None)[0] == 401
+            assert self.post(path, payload, password="wrong")[0] == 401
+
+    def test_analysis(self):
+        status, reply = self.post("/api/analysis", {"symptoms": "dry cough"})
+        assert status == 200
+        assert reply["failed"] is False and reply["analysis"]
+
+    def test_failed_analysis_is_503(self):
+        failed = analysis_result("The AI analysis is unavailable.", failed=True)
+        with pytest.MonkeyPatch.context() as patch:
+            patch.setattr(api, 'get_disease_analysis', lambda symptoms, language: failed)
+            patch.setattr(api, 'analyze_symptom_batch', lambda cases: [failed for _ in cases])
+            status, reply = self.post("/api/analysis", {"symptoms": "dry cough"})
+            assert status == 503 and reply["failed"] is True
+            status, reply = self.post("/api/analysis/batch", {"cases": [{"symptoms": "dry cough"}] * 2})
+            assert status == 503 and all(result["failed"] for result in reply["results"])
+
+    def test_batch_with_some_failures_is_200(self):
+        def analyze(cases):
+            return [analysis_result("ok", provider='stub'), analysis_result("unavailable", failed=True)]
+        with pytest.MonkeyPatch.context() as patch:
+            patch.setattr(api, 'analyze_symptom_batch', analyze)
+            status, reply = self.post("/api/analysis/batch", {"cases": [{"symptoms": "a"}, {"symptoms": "b"}]})
+        assert status == 200
+        assert [result["failed"] for result in reply["results"]] == [False, True]
+
+    def test_hospitals_require_credentials(self):
+        lookups = []
+
+        def nearby(location):
+            lookups.append(location)
+            return {"status": "OK", "hospitals": []}
+        with pytest.MonkeyPatch.context() as patch:
+            patch.setattr(api, 'get_nearby_hospitals', nearby)
+            assert self.get("/api/hospitals?location=Delhi", password=None)[0] == 401
+            assert self.get("/api/hospitals?location=Delhi", password="wrong")[0] == 401
+            assert lookups == []
+            assert self.get("/api/hospitals?location=Delhi") == (200, {"status": "OK", "hospitals": []})
+        assert lookups == ["Delhi"]
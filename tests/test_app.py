@@ -0,0 +1,141 @@
+# tests/test_app.py
+"""AppTest runs of both entry points: login, the patient analysis flow and the admin dashboard"""
+import os
+import uuid
+
+import pytest
+from streamlit.testing.v1 import AppTest
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ENTRY_POINTS = ["app.py", "text.py"]
+LOCATION = "Delhi, India"
+
+
+@pytest.fixture
+def patient():
+    from database import user_db
+
+    username = f"patient_{uuid.uuid4().hex[:8]}"
+    assert user_db.create_user(username, "secret123")[0]
+    return username
+
+
+@pytest.fixture(autouse=True)
+def offline_hospitals():
+    # Served from the shared cache, so the flow never reaches Nominatim
+    from shared_cache import shared_cache
+
+    shared_cache.set('hospitals', LOCATION.lower(), {
+        "status": "OK", "results": [{"name": "Test Hospital", "lat": 28.6, "lon": 77.2}]
+    }, ttl=3600)
+
+
+def app(entry_point, **session):
+    at = AppTest.from_file(os.path.join(REPO_DIR, entry_point), default_timeout=60)
+    for key, value in session.items():
+        at.session_state[key] = value
+    return at.run()
+
+
+def logged_in(entry_point, username, is_admin=False):
+    return app(entry_point, logged_in=True, is_admin=is_admin, current_user=username, current_language="en")
+
+
+def button(at, label):
+    return next(b for b in at.button if label in b.label)
+
+
+@pytest.mark.parametrize("entry_point", ENTRY_POINTS)
+def test_login_page_renders(entry_point):
+    at = app(entry_point)
+    assert not at.exception
+    assert len(at.tabs) == 3
+
+
+@pytest.mark.parametrize("entry_point", ENTRY_POINTS)
+def test_patient_login(entry_point, patient):
+    at = app(entry_point)
+    at.text_input(key="login_username").input(patient)
+    at.text_input(key="login_password").input("secret123")
+    at.button(key="login_btn").click().run()
+    assert not at.exception
+    assert at.session_state.logged_in and at.session_state.current_user == patient
+    assert not at.session_state.is_admin
+
+
+@pytest.mark.parametrize("entry_point", ENTRY_POINTS)
+def test_wrong_password_is_rejected(entry_point, patient):
+    at = app(entry_point)
+    at.text_input(key="login_username").input(patient)
+    at.text_input(key="login_password").input("wrong")
+    at.button(key="login_btn").click().run()
+    assert not at.session_state.logged_in
+    assert at.error
+
+
+@pytest.mark.parametrize("entry_point", ENTRY_POINTS)
+def test_patient_analysis_flow(entry_point, patient):
+    from database import user_db
+
+    at = logged_in(entry_point, patient)
+    assert not at.exception
+    at.text_area[0].input("dry cough and sore throat")
+    at.text_input[0].input(LOCATION)
+    button(at, "Analyze").click().run()
+    assert not at.exception
+    assert any("possible medical conditions" in m.value for m in at.markdown)
+    assert any("Test Hospital" in m.value for m in at.markdown)
+    assert at.success
+    assert user_db.get_symptom_history_page(patient, 0, 10)[1] == 1
+
+
+@pytest.fixture
+def rules_only():
+    import ai_translator
+    from model_providers import RuleBasedProvider
+
+    ai_translator._default_translator = ai_translator.AITranslator(RuleBasedProvider(), degraded=True)
+    yield
+    ai_translator.reset_default_translator()
+
+
+@pytest.mark.parametrize("entry_point", ENTRY_POINTS)
+def test_degraded_analysis_shows_a_notice(entry_point, patient, rules_only):
+    at = logged_in(entry_point, patient)
+    at.text_area[0].input("mild headache")
+    at.text_input[0].input(LOCATION)
+    button(at, "Analyze").click().run()
+    assert not at.exception
+    assert any("AI analysis is unavailable" in w.value for w in at.warning)
+
+
+@pytest.mark.parametrize("entry_point", ENTRY_POINTS)
+def test_double_click_and_rerun_save_one_row(entry_point, patient):
+    from database import user_db
+    from metrics import counters
+
+    at = logged_in(entry_point, patient)
+    at.text_area[0].input("runny nose and sneezing")
+    at.text_input[0].input(LOCATION)
+    duplicates = counters().get('duplicate_submissions', 0)
+    # A second click on the same input, then a plain rerun
+    button(at, "Analyze").click().run()
+    button(at, "Analyze").click().run()
+    assert any("possible medical conditions" in m.value for m in at.markdown)
+    at.run()
+    assert not at.exception
+    assert counters()['duplicate_submissions'] == duplicates + 1
+    assert user_db.get_symptom_history_page(patient, 0, 10)[1] == 1
+
+
+@pytest.mark.parametrize("entry_point", ENTRY_POINTS)
+def test_admin_dashboard(entry_point, patient):
+    at = app(entry_point)
+    at.text_input(key="admin_username").input("admin")
+    at.text_input(key="admin_password").input("admin123")
+    at.button(key="admin_login_btn").click().run()
+    assert at.session_state.is_admin
+    at.run()
+    assert not at.exception
+    assert len(at.tabs) >= 5
+    assert any(m.label for m in at.metric)
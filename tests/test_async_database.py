@@ -0,0 +1,67 @@
+# tests/test_async_database.py
+import asyncio
+
+import pytest
+
+import database
+from async_database import AsyncDatabaseAdmin, AsyncUserDatabase
+
+CALLERS = 5000
+USERS = 50
+
+
+@pytest.fixture
+def db_errors(monkeypatch):
+    """Messages UserDatabase reports through st.error instead of raising"""
+    errors = []
+    monkeypatch.setattr(database.st, 'error', errors.append)
+    return errors
+
+
+def test_thousands_of_concurrent_callers(user_database, db_path, db_errors):
+    usernames = [f"user{i}" for i in range(USERS)]
+    for username in usernames:
+        assert user_database.create_user(username, "secret123")[0]
+
+    async def run():
+        db = AsyncUserDatabase(db_path)
+        admin = AsyncDatabaseAdmin(db_path)
+
+        async def caller(i):
+            username = usernames[i % USERS]
+            kind = i % 5
+            if kind == 0:
+                return await db.save_symptom_history(
+                    username, f"cough {i}", "LOW", f"analysis {i}", "Delhi", submission_key=f"key-{i}"
+                )
+            if kind == 1:
+                return await db.update_user_profile(username, age=i % 90)
+            if kind == 2:
+                return await db.get_symptom_history(username)
+            if kind == 3:
+                return await db.authenticate_user(username, "secret123")
+            return await admin.get_database_stats()
+
+        results = await asyncio.gather(*(caller(i) for i in range(CALLERS)))
+        histories = await asyncio.gather(*(db.get_symptom_history_page(username, page_size=1000) for username in usernames))
+        await db.close()
+        await admin.close()
+        return db, admin, results, histories
+
+    db, admin, results, histories = asyncio.run(run())
+
+    # No "database is locked" or any other error was swallowed
+    assert db_errors == []
+    assert all(result is True for result in results[0::5])
+    assert all(results[1::5])
+    assert all(result[0] for result in results[3::5])
+    assert all(result['users_count'] == USERS for result in results[4::5])
+    saved = {row[1] for rows, _ in histories for row in rows}
+    assert saved == {f"cough {i}" for i in range(0, CALLERS, 5)}
+
+    # The DB threads stopped and took no more work
+    for layer in (db._layer, admin._layer):
+        assert not layer._thread.is_alive()
+        assert layer._requests.empty()
+    with pytest.raises(RuntimeError):
+        asyncio.run(db.get_symptom_history("user0"))
@@ -0,0 +1,54 @@
+# tests/test_bulk_import.py
+import sqlite3
+
+import pytest
+
+from bulk_import import BulkLoader
+
+
+def indexes(db_path):
+    conn = sqlite3.connect(db_path)
+    try:
+        return sorted(row[0] for row in conn.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'index' AND sql IS NOT NULL"
+        ))
+    finally:
+        conn.close()
+
+
+def count(db_path, table):
+    conn = sqlite3.connect(db_path)
+    try:
+        return conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+    finally:
+        conn.close()
+
+
+def test_indexes_are_rebuilt_after_a_load(user_database, db_path):
+    before = indexes(db_path)
+    with BulkLoader(db_path) as loader:
+        loader.load_users({'username': f"user{i}", 'password': "pw"} for i in range(50))
+        loader.load_history({'username': f"user{i % 50}", 'symptoms': "cough"} for i in range(200))
+    assert indexes(db_path) == before
+    assert count(db_path, 'symptom_history') == 200
+
+
+def test_failed_load_rolls_back_and_keeps_indexes(user_database, db_path):
+    before = indexes(db_path)
+
+    def records():
+        yield {'username': "someone", 'password': "pw"}
+        raise ValueError("bad input file")
+
+    with pytest.raises(ValueError):
+        with BulkLoader(db_path) as loader:
+            loader.load_users(records())
+    assert indexes(db_path) == before
+    assert count(db_path, 'users') == 0
+
+
+def test_unique_indexes_stay_during_a_load(user_database, db_path):
+    with BulkLoader(db_path) as loader:
+        during = indexes(db_path)
+        assert 'idx_symptom_history_submission' in during
+        assert 'idx_symptom_history_user' not in during
@@ -0,0 +1,22 @@
+# tests/test_database.py
+from concurrent.futures import ThreadPoolExecutor
+
+import database
+
+
+def test_a_failed_batch_does_not_roll_back_other_threads_writes(user_database, monkeypatch):
+    monkeypatch.setattr(database.st, "error", lambda message: None)
+    user_database.create_user("alice", "secret123")
+    # The last entry can't be bound, so each batch fails after its analyses were stored
+    bad_batch = [("cough", "LOW", f"Rest {i}.", "Delhi", "en") for i in range(20)] + [({}, "LOW", "", "", "en")]
+
+    def save(i):
+        if i % 4 == 0:
+            return user_database.save_symptom_histories("alice", bad_batch) == 0
+        return user_database.save_symptom_history("alice", f"fever {i}", "LOW", f"Fluids {i}.", "Delhi")
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        assert all(pool.map(save, range(400)))
+
+    saved = user_database.conn.execute("SELECT symptoms FROM symptom_history").fetchall()
+    assert sorted(symptoms for (symptoms,) in saved) == sorted(f"fever {i}" for i in range(400) if i % 4)
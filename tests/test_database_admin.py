@@ -0,0 +1,27 @@
+# tests/test_database_admin.py
+import csv
+import io
+
+from database_admin import DatabaseAdmin
+
+SYMPTOMS = 'cough, "dry" and\nsore throat'
+ANALYSIS = "* **Cold:** rest, fluids\n* **Flu:** see a doctor"
+
+
+def test_csv_export_quotes_commas_quotes_and_newlines(user_database, db_path, tmp_path):
+    user_database.create_user("alice", "secret123")
+    user_database.save_symptom_history("alice", SYMPTOMS, "LOW", ANALYSIS, "Delhi, India")
+    admin = DatabaseAdmin(db_path)
+    path = tmp_path / "history.csv"
+
+    assert admin.export_to_file('symptom_history', str(path), batch_size=1) == 1
+    with open(path, encoding='utf-8', newline='') as f:
+        streamed = list(csv.reader(f))
+    in_memory = list(csv.reader(io.StringIO(admin.export_data('symptom_history'))))
+
+    for rows in (streamed, in_memory):
+        assert len(rows) == 2
+        record = dict(zip(*rows))
+        assert record['symptoms'] == SYMPTOMS
+        assert record['suggested_conditions'] == ANALYSIS
+        assert record['location_searched'] == "Delhi, India"
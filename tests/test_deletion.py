@@ -0,0 +1,42 @@
+# tests/test_deletion.py
+from database_admin import DatabaseAdmin
+from deletion import DeletionEngine
+
+
+def _tombstone_bob(user_database, db_path):
+    for username in ("alice", "bob"):
+        assert user_database.create_user(username, "secret123")[0]
+        assert user_database.save_symptom_history(username, f"cough of {username}", "LOW", "", "Delhi")
+        assert user_database.update_user_profile(username, age=30, blood_type="A+")
+    assert DeletionEngine(db_path).soft_delete(["bob"]) == ["bob"]
+
+
+def test_tombstoned_users_are_left_out_of_admin_views(user_database, db_path):
+    _tombstone_bob(user_database, db_path)
+    admin = DatabaseAdmin(db_path)
+
+    columns, users = admin.get_all_data('users')
+    assert [row[columns.index('username')] for row in users] == ["alice"]
+    columns, history = admin.get_all_data('symptom_history')
+    assert [row[columns.index('symptoms')] for row in history] == ["cough of alice"]
+    assert len(admin.get_all_data('user_profiles')[1]) == 1
+
+    for stats in (admin.get_database_stats(), user_database.get_database_stats()):
+        assert stats['users_count'] == 1
+        assert stats['symptom_history_count'] == 1
+        assert stats['user_profiles_count'] == 1
+        assert stats['recent_users'] == 1
+
+
+def test_tombstoned_username_can_register_again(user_database, db_path):
+    _tombstone_bob(user_database, db_path)
+    assert user_database.create_user("bob", "newpass123") == (True, "User created successfully")
+    assert user_database.authenticate_user("bob", "newpass123")[0]
+    assert not user_database.authenticate_user("bob", "secret123")[0]
+    assert user_database.get_symptom_history("bob") == []
+    assert DeletionEngine(db_path).pending_purge() == []
+
+
+def test_live_username_still_cannot_register_twice(user_database):
+    assert user_database.create_user("alice", "secret123")[0]
+    assert user_database.create_user("alice", "other123") == (False, "Username already exists")
@@ -0,0 +1,41 @@
+# tests/test_gdpr_export.py
+import os
+
+import pytest
+
+from gdpr_export import GDPRExporter, archive_name, read_archive
+
+
+def test_archive_names_of_similar_usernames_differ():
+    names = {archive_name(username) for username in ("john doe", "john_doe", "john/doe")}
+    assert len(names) == 3
+    assert all("/" not in name for name in names)
+
+
+def test_users_with_similar_names_get_their_own_archives(user_database, db_path, tmp_path):
+    for username in ("john doe", "john_doe"):
+        assert user_database.create_user(username, "secret123")[0]
+        assert user_database.save_symptom_history(username, f"cough of {username}", "LOW", "", "Delhi")
+    archives = GDPRExporter(str(tmp_path / "out"), db_path).export(["john doe", "john_doe"])
+    assert len(set(archives.values())) == 2
+    for username, path in archives.items():
+        history = [line['symptoms'] for line in read_archive(path) if line['section'] == 'symptom_history']
+        assert history == [f"cough of {username}"]
+
+
+def test_unfinished_export_is_only_resumed_for_the_same_users(user_database, db_path, tmp_path):
+    for username in ("alice", "bob"):
+        user_database.create_user(username, "secret123")
+        user_database.save_symptom_history(username, "cough", "LOW", "", "Delhi")
+    out_dir = str(tmp_path / "out")
+
+    def interrupt(done, total):
+        raise KeyboardInterrupt
+
+    with pytest.raises(KeyboardInterrupt):
+        GDPRExporter(out_dir, db_path).export(["alice"], progress=interrupt)
+    with pytest.raises(ValueError):
+        GDPRExporter(out_dir, db_path).export(["bob"])
+    archives = GDPRExporter(out_dir, db_path).export(["alice"])
+    assert list(archives) == ["alice"]
+    assert os.path.exists(archives["alice"])
@@ -0,0 +1,39 @@
+# tests/test_location_service.py
+import ipaddress
+
+import location_service
+from location_service import GeoIPTable, parse_networks, resolve_client_ip
+
+LOOPBACK = parse_networks("127.0.0.1/32,::1/128")
+
+
+def test_forwarded_for_is_ignored_from_untrusted_peers():
+    assert resolve_client_ip("203.0.113.7", "8.8.8.8", networks=LOOPBACK) == "203.0.113.7"
+    assert resolve_client_ip("203.0.113.7", None, "8.8.8.8", networks=LOOPBACK) == "203.0.113.7"
+
+
+def test_trusted_proxy_hop_is_used():
+    # cluster.py appends the address it saw to whatever the client sent
+    assert resolve_client_ip("127.0.0.1", "8.8.8.8, 203.0.113.7", networks=LOOPBACK) == "203.0.113.7"
+    assert resolve_client_ip("127.0.0.1", None, "203.0.113.7", networks=LOOPBACK) == "203.0.113.7"
+
+
+def test_chained_trusted_proxies_are_skipped():
+    networks = parse_networks("127.0.0.1/32,10.0.0.0/8")
+    assert resolve_client_ip("127.0.0.1", "1.2.3.4, 203.0.113.7, 10.1.2.3", networks=networks) == "203.0.113.7"
+
+
+def test_lookups_before_the_table_loads_are_not_cached(monkeypatch):
+    monkeypatch.setattr(location_service, '_geoip_table', None)
+    monkeypatch.setattr(location_service, 'GEOIP_DB_PATH', '/nonexistent/geoip.csv')
+    location_service._lookup_ip_location.cache_clear()
+    assert location_service.lookup_ip_location("8.8.8.8") is None
+
+    table = GeoIPTable()
+    table.starts[4].append(int(ipaddress.ip_address("8.8.8.0")))
+    table.ends[4].append(int(ipaddress.ip_address("8.8.8.255")))
+    table.location_ids[4].append(0)
+    table.locations.append((37.4, -122.1, "Mountain View", "US"))
+    monkeypatch.setattr(location_service, '_geoip_table', table)
+    assert location_service.lookup_ip_location("8.8.8.8")['city'] == "Mountain View"
+    location_service._lookup_ip_location.cache_clear()
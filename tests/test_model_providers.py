@@ -0,0 +1,93 @@
+# tests/test_model_providers.py
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import ai_translator
+import model_providers
+from ai_translator import DISCLAIMER, AITranslator, get_prompt
+from metrics import counters
+from model_providers import ProviderUnavailable, RuleBasedProvider, StubProvider
+from semantic_cache import SemanticCache
+
+PROMPTS = [get_prompt('en').render(f"cough {i}") for i in range(2000)]
+
+
+def failing(provider):
+    return [prompt for prompt in PROMPTS if provider.fails(prompt)]
+
+
+def test_stub_failures_depend_only_on_prompt_and_seed():
+    expected = failing(StubProvider(failure_rate=0.2, seed=7))
+    assert 300 < len(expected) < 500
+    # Another instance, calls spread over threads in any order: the same prompts fail
+    provider = StubProvider(failure_rate=0.2, seed=7)
+    with ThreadPoolExecutor(8) as pool:
+        outcomes = dict(zip(reversed(PROMPTS), pool.map(provider.fails, reversed(PROMPTS))))
+    assert [prompt for prompt in PROMPTS if outcomes[prompt]] == expected
+    assert failing(StubProvider(failure_rate=0.2, seed=8)) != expected
+
+
+def test_stub_failure_rate_bounds():
+    assert failing(StubProvider(failure_rate=0)) == []
+    assert len(failing(StubProvider(failure_rate=1))) == len(PROMPTS)
+    with pytest.raises(ProviderUnavailable):
+        StubProvider(failure_rate=1).generate_content(PROMPTS[0])
+
+
+def test_stub_replies_are_deterministic():
+    first = StubProvider().generate_content(PROMPTS[0]).text
+    assert StubProvider(seed=3).generate_content(PROMPTS[0]).text == first
+    assert "cough 0" in first
+
+
+def test_failed_calls_are_answered_by_the_fallback_and_marked_degraded():
+    provider = StubProvider(failure_rate=1)
+    provider.name = 'stub-failing'  # its own circuit breaker, apart from the other tests' stub
+    answers = counters().get('ai_fallback_answers', 0)
+    result = AITranslator(provider, fallback=RuleBasedProvider()).analyze("chest pain", "en")
+    assert not result['failed']
+    assert result['degraded'] and result['provider'] == 'rules'
+    assert "chest pain" in result['text']
+    assert counters()['ai_fallback_answers'] == answers + 1
+
+
+def test_without_a_fallback_failed_calls_fail():
+    provider = StubProvider(failure_rate=1)
+    provider.name = 'stub-failing'
+    result = AITranslator(provider).analyze("cough", "en")
+    assert result['failed'] and not result['degraded']
+
+
+@pytest.fixture
+def broken_provider(monkeypatch):
+    def broken():
+        raise RuntimeError("no API key")
+    monkeypatch.setitem(model_providers.PROVIDERS, 'broken', broken)
+    monkeypatch.setattr(model_providers, 'AI_PROVIDER', 'broken')
+    monkeypatch.setattr(model_providers, 'AI_FALLBACK_PROVIDER', 'rules')
+    ai_translator.reset_default_translator()
+    yield
+    ai_translator.reset_default_translator()
+
+
+def test_provider_that_cannot_be_set_up_is_replaced_and_counted(broken_provider, user_database):
+    fallbacks = counters().get('ai_provider_fallbacks', 0)
+    translator = ai_translator.get_default_translator(user_database)
+    assert translator.provider.name == 'rules' and translator.degraded
+    assert counters()['ai_provider_fallbacks'] == fallbacks + 1
+    result = translator.analyze("cough", "en")
+    assert result['degraded'] and not result['failed']
+
+
+def test_local_provider_answers_are_never_served_from_the_cache(user_database):
+    user_database.create_user("alice", "secret123")
+    for provider in (StubProvider(), RuleBasedProvider()):
+        text = provider.generate_content(get_prompt('en').render(f"{provider.name} cough")).text
+        user_database.save_symptom_history("alice", f"{provider.name} cough", "LOW", text, "Delhi", 'en')
+    user_database.save_symptom_history("alice", "model cough", "LOW", f"Rest.\n\n{DISCLAIMER}", "Delhi", 'en')
+
+    translator = AITranslator(StubProvider(), SemanticCache(user_database))
+    assert not translator.analyze("stub cough", "en")['cached']
+    assert not translator.analyze("rules cough", "en")['cached']
+    assert translator.analyze("model cough", "en")['cached']
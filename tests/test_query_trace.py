@@ -0,0 +1,35 @@
+# tests/test_query_trace.py
+import pytest
+
+import query_trace
+from query_trace import connect
+
+
+@pytest.fixture
+def traced(monkeypatch, tmp_path):
+    # Every statement counts as slow, so each one gets its plan looked up
+    monkeypatch.setattr(query_trace, "SLOW_QUERY_MS", 0.0)
+    monkeypatch.setattr(query_trace, "PLAN_CACHE_SIZE", 3)
+    monkeypatch.setattr(query_trace, "_plans", query_trace.OrderedDict())
+    conn = connect(str(tmp_path / "trace.db"))
+    cursor = conn.cursor()
+    cursor.execute("CREATE TABLE items (id INTEGER PRIMARY KEY, name TEXT)")
+    yield cursor
+    conn.close()
+
+
+def test_plan_cache_keeps_only_the_most_recently_used_plans(traced):
+    for column in ("id", "name", "id, name", "name, id"):
+        traced.execute(f"SELECT {column} FROM items").fetchall()
+    traced.execute("SELECT name FROM items").fetchall()
+    assert list(query_trace._plans) == [
+        "SELECT id, name FROM items", "SELECT name, id FROM items", "SELECT name FROM items",
+    ]
+
+
+def test_executemany_is_not_explained(traced, monkeypatch):
+    explained = []
+    monkeypatch.setattr(query_trace, "_explain", lambda *args: explained.append(args) or [])
+    traced.executemany("INSERT INTO items (name) VALUES (?)", [("a",), ("b",)])
+    assert explained == []
+    assert query_trace.slow_queries()[0]["plan"] == []
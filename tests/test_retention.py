@@ -0,0 +1,22 @@
+# tests/test_retention.py
+from retention import HistoryArchive
+
+
+def test_archiving_bumps_the_history_versions_of_the_owners(user_database, db_path, tmp_path):
+    user_database.create_user("alice", "secret123")
+    user_database.create_user("bob", "secret123")
+    user_database.save_symptom_history("alice", "old cough", "LOW", "", "Delhi")
+    user_database.save_symptom_history("bob", "recent cough", "LOW", "", "Delhi")
+    user_database.conn.execute(
+        "UPDATE symptom_history SET created_at = '2020-01-15 10:00:00' WHERE symptoms = 'old cough'"
+    )
+    user_database.conn.commit()
+    before = {name: user_database.data_version(name, "symptom_history") for name in ("alice", "bob")}
+
+    archive = HistoryArchive(db_path, str(tmp_path / "archive"), retention_days=180)
+    assert archive.archive() == 1
+
+    assert user_database.data_version("alice", "symptom_history") == before["alice"] + 1
+    assert user_database.data_version("bob", "symptom_history") == before["bob"]
+    assert user_database.get_symptom_history("alice") == []
+    assert [row["symptoms"] for row in archive.user_history("alice")] == ["old cough"]
@@ -0,0 +1,95 @@
+# tests/test_semantic_cache.py
+import pytest
+
+from semantic_cache import RESPONSE_MARKER, SemanticCache, content_words, guard, normalize_text
+
+
+class FakeHistory:
+    """The two UserDatabase reads SemanticCache uses"""
+
+    def __init__(self, rows):
+        self.rows = rows  # (id, symptoms, language, analysis)
+
+    def get_analyses_since(self, last_id, marker, limit=10000):
+        # The newest `limit` matches, oldest first
+        return [(i, s, lang) for i, s, lang, text in self.rows if i > last_id and marker in text][-limit:]
+
+    def get_analysis_text(self, history_id):
+        return next(text for i, _, _, text in self.rows if i == history_id)
+
+
+def cache_with(*queries):
+    return SemanticCache(FakeHistory([
+        (i, symptoms, 'en', f"analysis {i} {RESPONSE_MARKER}") for i, symptoms in enumerate(queries, 1)
+    ]))
+
+
+def test_negation_is_not_served_from_another_query():
+    cache = cache_with("Fever for two days and I also have chest pain when breathing")
+    assert cache.lookup("Fever for two days and I have no chest pain when breathing", 'en') is None
+
+
+def test_numbers_are_not_served_from_another_query():
+    cache = cache_with("Headache and dizziness, my BP is 180/110")
+    assert cache.lookup("Headache and dizziness, my BP is 120/80", 'en') is None
+
+
+@pytest.mark.parametrize("stored, query", [
+    ("Headache and runny nose since yesterday", "headache and a runny nose since yesterday"),
+    ("Headache and runny nose since yesterday", "runny nose and headache since yesterday"),
+    ("Headache and runny nose since yesterday", "headche and runny nose since yesterday"),
+    ("I have a dry cough and sore throat", "dry cough and a sore throat"),
+    ("stomach pain and nausea after eating", "nausea and stomach pain after eating"),
+    ("सिरदर्द और बुखार", "मुझे बुखार और सिरदर्द है"),
+])
+def test_paraphrases_are_served(stored, query):
+    assert cache_with(stored).lookup(query, 'en') is not None
+
+
+@pytest.mark.parametrize("stored, query", [
+    ("Fever and cough", "No fever and cough"),
+    ("Fever and cough", "fever and cough for 3 days"),
+    ("Fever and cough", "High fever and cough"),
+    ("stomach pain and nausea after eating", "stomach ache and nausea after eating"),
+    ("dry cough", "wet cough"),
+    # Close in n-grams (cosine 0.94), one word apart
+    ("sharp pain and swelling in my left knee for a week after running, worse when climbing stairs",
+     "sharp pain and swelling in my right knee for a week after running, worse when climbing stairs"),
+    ("itchy red rash on both arms since I started a new soap",
+     "itchy red rash on both legs since I started a new soap"),
+    ("बुखार और सिरदर्द", "बुखार नहीं और सिरदर्द"),
+])
+def test_different_cases_are_not_served(stored, query):
+    assert cache_with(stored).lookup(query, 'en') is None
+
+
+def test_guard_keeps_negations_numbers_and_warning_signs():
+    assert guard("No chest pain, BP 120/80", 'en') == ('en', ('no',), ('120/80',), ('chest pain',), ())
+    assert content_words("I have a dry cough and a sore throat") == ('dry', 'cough', 'sore', 'throat')
+
+
+def test_same_query_after_normalization_is_served():
+    cache = cache_with("Headache and dizziness, my BP is 180/110")
+    assert cache.lookup("  headache AND dizziness,  my bp is 180/110. ", 'en').startswith("analysis 1")
+
+
+def test_other_language_is_not_served():
+    cache = cache_with("dry cough")
+    assert cache.lookup("dry cough", 'hi') is None
+
+
+def test_analyses_without_the_disclaimer_are_not_indexed():
+    cache = SemanticCache(FakeHistory([(1, "dry cough", 'en', "Error analyzing symptoms")]))
+    assert cache.lookup("dry cough", 'en') is None
+
+
+def test_least_recently_used_entries_are_dropped():
+    cache = SemanticCache(FakeHistory([
+        (i, f"cough {i}", 'en', RESPONSE_MARKER) for i in range(1, 4)
+    ]), max_entries=2)
+    assert cache.lookup("cough 1", 'en') is None
+    assert cache.lookup("cough 3", 'en') == RESPONSE_MARKER
+
+
+def test_normalize_text_keeps_negations_and_numbers():
+    assert normalize_text("  No  chest pain, BP 120/80! ") == "no chest pain, bp 120/80"
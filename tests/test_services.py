@@ -0,0 +1,78 @@
+# tests/test_services.py
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from health_connect import services
+
+
+def history_rows(db, username):
+    return db.get_symptom_history_page(username, 0, 100)[1]
+
+
+def test_a_saved_submission_key_is_saved_once(user_database):
+    user_database.create_user("alice", "secret123")
+    version = user_database.data_version("alice", "symptom_history")
+    for _ in range(2):
+        assert user_database.save_symptom_history("alice", "cough", "LOW", "Rest.", "Delhi", submission_key="k:1")
+    assert history_rows(user_database, "alice") == 1
+    # Only the insert that happened is a change
+    assert user_database.data_version("alice", "symptom_history") == version + 1
+
+
+def test_repeats_of_a_submission_within_the_window_are_saved_once(user_database):
+    user_database.create_user("alice", "secret123")
+    # As from two processes whose keys differ only in the suffix, e.g. on either side of a window boundary
+    assert user_database.save_symptom_history("alice", "cough", "LOW", "Rest.", "Delhi",
+                                              submission_key="k:59999", submission_window=60)
+    assert user_database.save_symptom_history("alice", "cough", "LOW", "Rest.", "Delhi",
+                                              submission_key="k:60001", submission_window=60)
+    assert history_rows(user_database, "alice") == 1
+    # Another submission, and the same one once the window has passed, are saved
+    assert user_database.save_symptom_history("alice", "fever", "LOW", "Rest.", "Delhi",
+                                              submission_key="other:60001", submission_window=60)
+    user_database.conn.execute("UPDATE symptom_history SET created_at = datetime('now', '-120 seconds')")
+    user_database.conn.commit()
+    assert user_database.save_symptom_history("alice", "cough", "LOW", "Rest.", "Delhi",
+                                              submission_key="k:180000", submission_window=60)
+    assert history_rows(user_database, "alice") == 3
+
+
+@pytest.fixture
+def patient(monkeypatch, user_database):
+    monkeypatch.setattr(services, 'user_db', user_database)
+    monkeypatch.setattr(services, '_submissions', {})
+    user_database.create_user("alice", "secret123")
+    return "alice"
+
+
+def test_concurrent_repeats_call_the_model_once(patient, user_database, monkeypatch):
+    calls = []
+    release = threading.Event()
+
+    def analysis(symptoms, language):
+        calls.append(symptoms)
+        release.wait(5)
+        return services.analysis_result("Rest.", provider='stub'), None
+    monkeypatch.setattr(services, '_disease_analysis', analysis)
+
+    with ThreadPoolExecutor(4) as pool:
+        futures = [pool.submit(services.submit_analysis, patient, " Cough ", "Delhi", "en") for _ in range(4)]
+        release.set()
+        results = [future.result() for future in futures]
+    assert calls == [" Cough "]
+    assert all(saved and analysis['text'] == "Rest." for analysis, saved in results)
+    assert history_rows(user_database, patient) == 1
+
+
+def test_errors_are_shown_on_the_calling_thread(patient, monkeypatch):
+    def broken(db):
+        raise RuntimeError("no API key")
+    monkeypatch.setattr(services, 'get_default_translator', broken)
+    shown = []
+    monkeypatch.setattr(services.st, 'error', lambda message: shown.append((message, threading.current_thread())))
+
+    analysis, saved = services.submit_analysis(patient, "cough", "Delhi", "en")
+    assert analysis['failed']
+    assert shown == [("Failed to configure Gemini API: no API key", threading.current_thread())]
@@ -0,0 +1,20 @@
+# tests/test_session_cache.py
+from database import UserDatabase
+
+
+def test_writes_in_one_process_are_seen_by_another(user_database, db_path):
+    # Two UserDatabase instances on one file, as in two cluster.py workers
+    other = UserDatabase(db_path)
+    assert other.data_version("alice", "user_profile") == 0
+    assert other.data_version() == 0
+
+    user_database.create_user("alice", "secret123")
+    user_database.update_user_profile("alice", age=30)
+    assert other.data_version("alice", "user_profile") == 1
+    assert other.data_version("alice", "symptom_history") == 0
+    assert other.data_version() == 2
+
+    other.save_symptom_history("alice", "cough", "LOW", "", "Delhi")
+    assert user_database.data_version("alice", "symptom_history") == 1
+    assert user_database.data_version() == 3
+    other.conn.close()